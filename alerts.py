@@ -0,0 +1,117 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Iterable, List
+
+from caller import Caller
+from log import BaseLog
+
+
+class CallFailed(Exception):
+    pass
+
+
+class AlertDispatcher(BaseLog):
+    '''Rings every enabled phone number through `Caller` for new alert keys (coins, events).
+
+    Keys already alerted within `dedup_window` seconds are ignored and numbers that were rung
+    less than `number_cooldown` seconds ago are skipped, so listings seconds apart ring each phone
+    once. Calls run on a pool of `concurrency`, each attempt is bounded by `timeout` and failed
+    calls are retried `retries` times with exponential backoff.
+    '''
+
+    def __init__(
+            self,
+            caller: Caller,
+            concurrency: int = 10,
+            dedup_window: float = 600,
+            number_cooldown: float = 60,
+            timeout: float = 15,
+            retries: int = 2,
+            retry_delay: float = 1.0,
+    ):
+        self.init_logger(
+            f'{self.__module__}.{self.__class__.__name__}',
+            '[alerts]'
+        )
+        self._caller = caller
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._dedup_window = dedup_window
+        self._number_cooldown = number_cooldown
+        self._timeout = timeout
+        self._retries = retries
+        self._retry_delay = retry_delay
+
+        self._alerted_at: Dict[str, float] = {}
+        self._called_at: Dict[str, float] = {}
+
+        self.alerts = 0
+        self.deduplicated = 0
+        self.calls = 0
+        self.failed_calls = 0
+        self.retried_calls = 0
+        self.last_latency: float = None
+
+    def __str__(self):
+        latency = '-' if self.last_latency is None else f'{self.last_latency * 1000:.1f} ms'
+        return (
+            f'alerts {self.alerts}, deduplicated {self.deduplicated}, calls {self.calls}, '
+            f'failed {self.failed_calls}, retried {self.retried_calls}, last detection->called {latency}'
+        )
+
+    async def alert(self, keys: Iterable[str], detected_at: float = None) -> List[str]:
+        '''Rings phones if any of `keys` is new, returns numbers that were called successfully.'''
+        now = time.monotonic()
+        keys = set(keys)
+        new_keys = {k for k in keys if now - self._alerted_at.get(k, -self._dedup_window) >= self._dedup_window}
+        self.deduplicated += len(keys) - len(new_keys)
+        if not new_keys:
+            await self.log('%s already alerted, skipping', ', '.join(sorted(keys)))
+            return []
+
+        for key in new_keys:
+            self._alerted_at[key] = now
+        self.alerts += 1
+
+        numbers = sorted(
+            n
+            for account in self._caller.accounts
+            for n in account.phone_numbers
+            if now - self._called_at.get(n, -self._number_cooldown) >= self._number_cooldown
+        )
+        if not numbers:
+            await self.log('%s: all numbers were called recently, skipping', ', '.join(sorted(new_keys)))
+            return []
+
+        results = await asyncio.gather(*[self._call(n) for n in numbers])
+        called = [n for n, ok in zip(numbers, results) if ok]
+
+        self.last_latency = time.monotonic() - (detected_at or now)
+        await self.log(
+            '%s: called %d of %d numbers, %.1f ms after detection',
+            ', '.join(sorted(new_keys)), len(called), len(numbers), self.last_latency * 1000
+        )
+        return called
+
+    async def _call(self, number: str) -> bool:
+        async with self._semaphore:
+            for attempt in range(self._retries + 1):
+                if attempt:
+                    self.retried_calls += 1
+                    await asyncio.sleep(self._retry_delay * 2 ** (attempt - 1))
+                try:
+                    result = await asyncio.wait_for(self._caller.make_call(number), self._timeout)
+                    if not isinstance(result, dict) or 'sid' not in result:
+                        raise CallFailed(result)
+                except Exception as e:
+                    await self.log(
+                        'call %s attempt %d failed (%s): %s', number, attempt + 1, type(e).__name__, e,
+                        level=logging.WARNING
+                    )
+                else:
+                    self.calls += 1
+                    self._called_at[number] = time.monotonic()
+                    return True
+
+        self.failed_calls += 1
+        return False
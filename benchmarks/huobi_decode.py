@@ -0,0 +1,87 @@
+'''Event loop thread CPU spent decoding Huobi websocket frames, before and after HuobiStreamDecoder.
+
+Frames are read from a file with one base64 encoded raw frame per line (record them by dumping
+`msg` in HuobiTradeExchange._ticker_ws_messages), or generated to look like a `market.tickers`
+stream with a ping every 5 frames when no file is given.
+
+    python -m benchmarks.huobi_decode --frames huobi_frames.b64
+'''
+import argparse
+import asyncio
+import base64
+import gzip
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import ujson
+
+from exchanges.trade.huobi.stream import HuobiStreamDecoder
+
+
+def synthetic_frames(count: int, symbols: int):
+    frames = []
+    for i in range(count):
+        if i % 5 == 0:
+            payload = {'ping': 1571234567890 + i}
+        else:
+            payload = {
+                'ch': 'market.tickers',
+                'ts': 1571234567890 + i,
+                'data': [
+                    {
+                        'open': random.random(), 'close': random.random(), 'low': random.random(),
+                        'high': random.random(), 'amount': random.random() * 1e6, 'vol': random.random() * 1e3,
+                        'count': random.randint(1, 10000), 'symbol': f'coin{s}btc',
+                    }
+                    for s in range(symbols)
+                ]
+            }
+        frames.append(gzip.compress(ujson.dumps(payload).encode()))
+    return frames
+
+
+def read_frames(path: str):
+    with open(path) as f:
+        return [base64.b64decode(line) for line in f if line.strip()]
+
+
+def decode_before(frame: bytes):
+    return ujson.loads(gzip.decompress(frame).decode('utf-8'))
+
+
+async def run(frames, decode):
+    started_at = time.thread_time()
+    for frame in frames:
+        await decode(frame)
+    return (time.thread_time() - started_at) * 1000
+
+
+async def main(frames, rounds: int):
+    inline = HuobiStreamDecoder()
+    offload = HuobiStreamDecoder(ThreadPoolExecutor(1))
+
+    async def before(frame):
+        return decode_before(frame)
+
+    variants = (('before', before), ('inline', inline.decode_async), ('offload', offload.decode_async))
+    results = {name: [] for name, _ in variants}
+    for _ in range(rounds):
+        for name, decode in variants:
+            results[name].append(await run(frames, decode))
+
+    for name, _ in variants:
+        cpu = min(results[name])
+        print(f'{name:>8}: {cpu:.1f} ms loop thread CPU for {len(frames)} frames ({cpu / len(frames) * 1000:.1f} us/frame)')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--frames', help='file with base64 encoded frames, one per line')
+    parser.add_argument('--count', type=int, default=500)
+    parser.add_argument('--symbols', type=int, default=600)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    frames = read_frames(args.frames) if args.frames else synthetic_frames(args.count, args.symbols)
+    asyncio.get_event_loop().run_until_complete(main(frames, args.rounds))
@@ -0,0 +1,91 @@
+'''Time from the start of a buy fan-out to the last order request reaching a local stub exchange.
+
+Compares the old per-order path (sign inside every request coroutine) with the batched
+one (sign all orders first, then send them concurrently).
+
+    python -m benchmarks.order_fanout --accounts 10 --quotes 4 --rounds 20
+'''
+import argparse
+import asyncio
+import statistics
+import time
+from decimal import Decimal
+
+from aiohttp import web
+
+from exchange_libs.aiobinance.client import Client
+
+
+async def start_stub(arrivals: list):
+    async def order(request: web.Request):
+        arrivals.append(time.perf_counter())
+        return web.json_response({'orderId': 1})
+
+    app = web.Application()
+    app.router.add_post('/api/v3/order', order)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f'http://127.0.0.1:{port}/api'
+
+
+def make_clients(count: int, api_url: str):
+    clients = []
+    for i in range(count):
+        client = Client(f'key{i}', f'secret{i}' * 8)
+        client._API_URL = api_url
+        clients.append(client)
+    return clients
+
+
+async def per_order(clients, symbols):
+    await asyncio.gather(
+        *[
+            c.order_limit_buy(s, '100', Decimal('0.00001234'))
+            for c in clients
+            for s in symbols
+        ]
+    )
+
+
+async def batched(clients, symbols):
+    prepared = [
+        (c, c.prepare_order_limit_buy(s, '100', Decimal('0.00001234')))
+        for c in clients
+        for s in symbols
+    ]
+    await asyncio.gather(*[c.send_prepared(r) for c, r in prepared])
+
+
+async def main(accounts: int, quotes: int, rounds: int):
+    arrivals = []
+    runner, api_url = await start_stub(arrivals)
+    clients = make_clients(accounts, api_url)
+    symbols = [f'COIN{q}BTC' for q in range(quotes)]
+
+    try:
+        await batched(clients, symbols)  # warm up connections
+        for name, fanout in (('per-order', per_order), ('batched', batched)):
+            results = []
+            for _ in range(rounds):
+                arrivals.clear()
+                started_at = time.perf_counter()
+                await fanout(clients, symbols)
+                results.append((max(arrivals) - started_at) * 1000)
+            print(f'{name:>10}: last request received after {statistics.median(results):.3f} ms (median)')
+    finally:
+        for c in clients:
+            await c._session.close()
+        await runner.cleanup()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--accounts', type=int, default=10)
+    parser.add_argument('--quotes', type=int, default=4)
+    parser.add_argument('--rounds', type=int, default=20)
+    args = parser.parse_args()
+
+    asyncio.get_event_loop().run_until_complete(main(args.accounts, args.quotes, args.rounds))
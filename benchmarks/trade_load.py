@@ -0,0 +1,140 @@
+'''Buy fan-out of a real trade exchange against a simulated one, for growing numbers of accounts.
+
+Every round starts a simulator, points the exchange endpoints at it, initializes the trade
+exchange with that many simulated accounts, lists a new coin and buys it like a trigger
+would, then cancels every open order in bulk. Reports the client side time of `buy`, when
+the first and last order reached the simulator, rate limited requests and the bulk cancel
+time, the round where those stop growing linearly is where the fan-out saturates.
+
+    python -m benchmarks.trade_load --exchange binance --accounts 10,100,300 --latency 0.05 --rate-limit 10
+'''
+import argparse
+import asyncio
+import time
+from decimal import Decimal
+from typing import List
+
+import settings
+from common import NTCredential
+from exchanges.registry import trade_exchanges
+from simulator.base import BaseSimulator, SimulatorConfig, SimulatorStats
+from simulator.binance import BinanceSimulator
+from simulator.huobi import HuobiSimulator
+
+SIMULATORS = {s.name: s for s in (BinanceSimulator, HuobiSimulator)}
+
+BALANCES = {'BTC': Decimal(1), 'ETH': Decimal(20), 'USDT': Decimal(10000), 'BNB': Decimal(100)}
+PRICES = {'BTC': Decimal('0.00001234'), 'ETH': Decimal('0.0003456'), 'USDT': Decimal('0.1234'), 'BNB': Decimal('0.01')}
+
+
+class Trigger:
+    name = 'loadtest'
+
+    @staticmethod
+    def buy_amount_percent(quote_symbol: str) -> int:
+        return 10
+
+
+def point_settings_at(sim: BaseSimulator):
+    settings.BINANCE_API_URL = settings.HUOBI_API_URL = sim.http_url
+    settings.BINANCE_WS_URL = settings.HUOBI_WS_URL = sim.ws_url
+
+
+async def init_exchange(name: str, credentials: List[NTCredential]):
+    exchange = trade_exchanges.get(name)()
+    await exchange.init(iter(()))
+    # init_accounts goes one account at a time, huobi waits a second per account stream auth
+    accounts = await asyncio.gather(
+        *[exchange._init_account(exchange, c) for c in credentials], return_exceptions=True
+    )
+    exchange.accounts = [a for a in accounts if not isinstance(a, Exception)]
+    return exchange, len(credentials) - len(exchange.accounts)
+
+
+async def close_exchange(exchange):
+    for account in exchange.accounts:
+        await account.close()
+    if getattr(exchange, 'streams', None):
+        await exchange.streams.close()
+    await exchange.http.close()
+
+    current = asyncio.current_task()
+    tasks = [t for t in asyncio.all_tasks() if t is not current]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def run_round(name: str, accounts: int, config: SimulatorConfig, symbol: str):
+    sim = SIMULATORS[name](config)
+    await sim.start()
+    point_settings_at(sim)
+    try:
+        quotes = sorted(trade_exchanges.get(name).buy_symbols.fget(None))
+        credentials = [
+            NTCredential(f'sim{i}', name, f'{name}-key{i}', f'{name}-secret{i}')
+            for i in range(accounts)
+        ]
+        for credential in credentials:
+            sim.add_account(credential.api_key, {q: BALANCES[q] for q in quotes})
+        # an existing market, so the ticker snapshot and stream are not empty
+        sim.list_market('ETH', 'BTC', Decimal('0.02'))
+
+        init_started_at = time.monotonic()
+        exchange, failed = await init_exchange(name, credentials)
+        init_time = time.monotonic() - init_started_at
+
+        for quote in quotes:
+            sim.list_market(symbol, quote, PRICES[quote])
+        sim.stats = SimulatorStats()
+
+        started_at = time.monotonic()
+        await exchange.buy(Trigger, symbol, 100)
+        buy_time = time.monotonic() - started_at
+        stats = sim.stats
+        arrivals = [(t - started_at) * 1000 for t in stats.order_times]
+
+        cancel_started_at = time.monotonic()
+        open_orders = await asyncio.gather(*[a.get_open_orders_id() for a in exchange.accounts])
+        canceled = await asyncio.gather(
+            *[a.cancel_orders(orders) for a, orders in zip(exchange.accounts, open_orders)]
+        )
+        cancel_time = time.monotonic() - cancel_started_at
+
+        print(
+            f'{accounts:>5} accounts ({failed} failed to init in {init_time:.1f} s): '
+            f'{stats.orders} orders, buy {buy_time * 1000:.1f} ms, '
+            f'first order after {min(arrivals, default=0):.1f} ms, last after {max(arrivals, default=0):.1f} ms, '
+            f'{stats.rate_limited} rate limited; '
+            f'canceled {sum(canceled)} in {cancel_time * 1000:.1f} ms'
+        )
+        await close_exchange(exchange)
+    finally:
+        await sim.close()
+
+
+async def main(name: str, accounts: List[int], config: SimulatorConfig, symbol: str):
+    # orders stay open until the bulk cancel
+    settings.ORDER_CANCEL_DELAY = 3600
+    for count in accounts:
+        await run_round(name, count, config, symbol)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--exchange', choices=sorted(SIMULATORS), default='binance')
+    parser.add_argument('--accounts', default='10,50,100,200', help='comma separated account counts, one round each')
+    parser.add_argument('--latency', type=float, default=0, help='seconds added to every REST response')
+    parser.add_argument('--jitter', type=float, default=0, help='up to that many random seconds more')
+    parser.add_argument('--rate-limit', type=int, default=0, help='REST requests per second per api key')
+    parser.add_argument('--symbol', default='SIM')
+    args = parser.parse_args()
+
+    asyncio.get_event_loop().run_until_complete(
+        main(
+            args.exchange,
+            [int(i) for i in args.accounts.split(',')],
+            SimulatorConfig(args.latency, args.jitter, args.rate_limit),
+            args.symbol,
+        )
+    )
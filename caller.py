@@ -3,9 +3,10 @@ import logging
 from typing import Set, Dict, List
 
 import aiohttp
-import yaml
 from aiohttp import ClientSession
 
+from utils import load_yaml
+
 
 class Account:
     enabled: bool
@@ -70,24 +71,36 @@ class Caller:
 
     _accounts: Set[Account]
 
-    def __init__(self, from_number: str, account_sid: str, auth_key: str, loop=None, filename='./phone_numbers.yaml'):
+    def __init__(self, from_number: str, account_sid: str, auth_key: str, loop=None, filename='./phone_numbers.yaml',
+                 api_url: str = 'https://api.twilio.com'):
         self._init_logger()
 
         self._from_number = from_number
         self._account_sid = account_sid
         self._auth_key = auth_key
+        self._api_url = api_url.rstrip('/')
 
         self._loop = loop or asyncio.get_event_loop()
         self._session = self._init_session()
 
+        self.filename = filename
         self._read_file(filename)
 
         self._accounts = set()
         self._parse_data()
 
     def __del__(self):
+        if self._session.closed or self._loop.is_closed() or self._loop.is_running():
+            return
         self._loop.run_until_complete(self._session.close())
 
+    @property
+    def accounts(self) -> Set[Account]:
+        return self._accounts
+
+    async def close(self):
+        await self._session.close()
+
     def _init_session(self) -> ClientSession:
         return ClientSession(
             loop=self._loop,
@@ -99,16 +112,23 @@ class Caller:
 
     def _read_file(self, filename):
         with open(filename) as f:
-            self._data = yaml.load(f.read(), Loader=yaml.FullLoader)
+            self._data = load_yaml(f.read())
 
     def _parse_data(self):
+        accounts = set()
         for account_name, data in self._data.items():
             parsed_account = Account(account_name, data)
             if parsed_account.enabled:
-                self._accounts.add(parsed_account)
+                accounts.add(parsed_account)
                 self._logger.info('Added account %r', parsed_account)
             else:
                 self._logger.info('Account %r is disabled, ignoring...', account_name)
+        # swapped only when the whole file is valid
+        self._accounts = accounts
+
+    def reload(self):
+        self._read_file(self.filename)
+        self._parse_data()
 
     async def _request(self, url: str, method: str, params: Dict):
         params = params or {}
@@ -124,7 +144,7 @@ class Caller:
             return await response.json()
 
     def _make_url(self, path: str):
-        return f'https://api.twilio.com/2010-04-01/Accounts/{self._account_sid}/{path}.json'
+        return f'{self._api_url}/2010-04-01/Accounts/{self._account_sid}/{path}.json'
 
     async def call_all(self):
         tasks = [
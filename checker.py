@@ -5,12 +5,13 @@ from aiogram.utils.markdown import hbold, text, hcode
 
 import settings
 from coinmarketcap import CoinMarketCap
+from events import bus
 from exchanges.trade.manager import trade_mgr, TradeExchangeManager
-from exchanges.trigger.base.exchange import BaseTriggerExchange
 from exchanges.trigger.manager import trigger_mgr, TriggerExchangeManager
-from mem import mem_watcher_tracemalloc, mem_watcher_pympler
+from rules import rules
 from tgbot.bot import start_bot, bot
 from tgbot.log import tg_log
+from utils import StartupProfile
 
 logging.basicConfig(
     level=logging.DEBUG if settings.DEBUG else logging.INFO,
@@ -20,16 +21,20 @@ logger = logging.getLogger(__name__)
 
 
 async def on_shutdown():
+    await bus.close()
     await trade_mgr.on_shutdown()
     await trigger_mgr.on_shutdown()
     await bot.close()
 
 
-async def send_start_msg(trade_mgr: TradeExchangeManager, trigger_mgr: TriggerExchangeManager):
+async def send_start_msg(trade_mgr: TradeExchangeManager, trigger_mgr: TriggerExchangeManager,
+                         profile: StartupProfile):
     msg = ''
 
     msg += 'Bot started.\n\n'
 
+    msg += text(hbold('Startup:'), str(profile), '\n')
+
     enabled_phone_accounts = [c.name for c in trade_mgr.caller._accounts]
     msg += text(hbold('Enabled phone accounts: '), ', '.join(enabled_phone_accounts), '\n')
 
@@ -51,8 +56,8 @@ async def send_start_msg(trade_mgr: TradeExchangeManager, trigger_mgr: TriggerEx
         msg += '\n'
 
     msg += '\n'
-    msg += hbold('Ignored coins: ')
-    msg += ', '.join(BaseTriggerExchange.EXCLUDED_COINS) + f', \'{BaseTriggerExchange.EXCLUDED_COINS_REGEX.pattern}\''
+    msg += hbold('Symbol rules: ')
+    msg += ', '.join(str(r) for r in rules.rules)
     msg += '\n'
 
     msg += '\n'
@@ -67,23 +72,32 @@ async def send_start_msg(trade_mgr: TradeExchangeManager, trigger_mgr: TriggerEx
 
 
 if __name__ == '__main__':
+    profile = StartupProfile()
     loop = asyncio.get_event_loop()
 
-    loop.create_task(mem_watcher_pympler())
-    loop.create_task(mem_watcher_tracemalloc())
+    if settings.MEM_CHECK_INTERVAL:
+        from mem import mem_watcher_tracemalloc, mem_watcher_pympler
+
+        loop.create_task(mem_watcher_pympler())
+        loop.create_task(mem_watcher_tracemalloc())
 
     logger.info('starting')
 
     cmc = CoinMarketCap(loop=loop)
     loop.run_until_complete(cmc.warmup())
+    profile.mark('cmc warmup')
 
     loop.run_until_complete(tg_log.init(loop))
+    profile.mark('telegram log')
 
     loop.run_until_complete(trade_mgr.init())
+    profile.mark('trade exchanges')
 
     loop.run_until_complete(trigger_mgr.init())
+    profile.mark('trigger exchanges')
 
-    loop.run_until_complete(send_start_msg(trade_mgr, trigger_mgr))
+    logger.info('startup profile: %s', profile)
+    loop.run_until_complete(send_start_msg(trade_mgr, trigger_mgr, profile))
 
     # loop.run_until_complete(tg_log.log('bot started'))
 
@@ -3,6 +3,8 @@ from decimal import Decimal
 from enum import Enum
 from typing import NamedTuple
 
+from tracing import Trace
+
 
 class CoinSource(Enum):
     API_WALLET = 'API wallet'
@@ -20,6 +22,8 @@ class Symbol(NamedTuple):
     symbol: str
     source: CoinSource
     url: str = None
+    # detection timestamps, does not take part in comparisons
+    trace: Trace = None
 
 
 class NTCredential(NamedTuple):
@@ -0,0 +1,71 @@
+import asyncio
+import logging
+import os
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from log import BaseLog
+
+
+def _mtime(filename: str) -> Optional[float]:
+    try:
+        return os.stat(filename).st_mtime
+    except FileNotFoundError:
+        return None
+
+
+class ConfigWatcher(BaseLog):
+    '''Polls modification time of config files and runs the reload callback of a changed file.
+
+    A callback must validate the new config before applying it, if it raises the error is
+    reported and the running config stays as it is.
+    '''
+
+    def __init__(self, interval: float):
+        self.init_logger(
+            f'{self.__module__}.{self.__class__.__name__}',
+            '[config]'
+        )
+        self._interval = interval
+        self._callbacks: Dict[str, Callable[[], Awaitable]] = {}
+        self._mtimes: Dict[str, Optional[float]] = {}
+        self._task: asyncio.Task = None
+
+    def watch(self, filename: str, callback: Callable[[], Awaitable]):
+        self._callbacks[filename] = callback
+        self._mtimes[filename] = _mtime(filename)
+
+    def start(self):
+        if self._interval and self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self._interval)
+            await self.check()
+
+    async def check(self) -> List[str]:
+        '''Reloads changed files, returns names of the ones reloaded successfully.'''
+        reloaded = []
+        for filename, callback in self._callbacks.items():
+            mtime = _mtime(filename)
+            if mtime is None or mtime == self._mtimes[filename]:
+                continue
+            self._mtimes[filename] = mtime
+
+            try:
+                await callback()
+            except Exception as e:
+                await self.log(
+                    '%s reload failed, keeping the running config (%s): %s', filename, type(e).__name__, e,
+                    level=logging.ERROR,
+                    send_tg=True
+                )
+            else:
+                reloaded.append(filename)
+        return reloaded
@@ -1,8 +1,7 @@
-from typing import List
-
-import yaml
+from typing import List, Tuple
 
 from common import NTCredential
+from utils import load_yaml
 
 FILENAME = './credentials.yaml'
 
@@ -25,7 +24,7 @@ def get_credentials():
                 credential['api_key'],
                 credential['secret_key']
             )
-            for exchange_name, accounts in yaml.load(read_file(), Loader=yaml.FullLoader).items()
+            for exchange_name, accounts in load_yaml(read_file()).items()
             for owner, credential in accounts.items()
             if credential['enabled']
         ]
@@ -43,3 +42,9 @@ def check_unique(creds: List[NTCredential]):
         raise NonUniqueCredentials('Found %d non unique credentials, please check!', diff)
 
     return creds
+
+
+def diff_credentials(old: List[NTCredential], new: List[NTCredential]) -> Tuple[List[NTCredential], List[NTCredential]]:
+    '''Returns added and removed credentials, a changed key shows up as both.'''
+    old_set, new_set = set(old), set(new)
+    return [c for c in new if c not in old_set], [c for c in old if c not in new_set]
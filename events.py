@@ -0,0 +1,165 @@
+import asyncio
+import logging
+import time
+from decimal import Decimal
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Type
+
+from common import Symbol, Balance
+from log import BaseLog
+
+
+# events, the event class is the topic
+
+class CoinDetected(NamedTuple):
+    trigger_exchange: Any
+    part: Any
+    coin: Symbol
+    detected_at: float
+
+
+class OrderPlaced(NamedTuple):
+    exchange: str
+    owner: str
+    pair: str
+    order_id: str
+    quote_symbol: str
+    quote_amount: Decimal
+    qty: int
+    price: Decimal
+
+
+class OrderFilled(NamedTuple):
+    exchange: str
+    owner: str
+    report: str
+
+
+class BalanceChanged(NamedTuple):
+    exchange: str
+    owner: str
+    symbol: str
+    previous: Optional[Balance]
+    balance: Balance
+
+
+class StreamStale(NamedTuple):
+    name: str
+    age: float
+
+
+class Subscriber(NamedTuple):
+    priority: int
+    callback: Callable[[Any], Any]
+
+
+class QueueConsumer:
+    '''Slow subscriber: events wait in a bounded queue, the oldest one is dropped when it is full.'''
+
+    def __init__(self, name: str, handler: Callable[[Any], Awaitable[Any]], maxsize: int, batch: bool):
+        self.name = name
+        self.handler = handler
+        self.batch = batch
+        self.queue = asyncio.Queue(maxsize)
+        self.task: asyncio.Task = None
+        self.handled = 0
+        self.dropped = 0
+        self.errors = 0
+        self.max_lag = 0.0
+
+    def put(self, event):
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait((time.monotonic(), event))
+
+    def __str__(self):
+        return (
+            f'{self.name}: queued {self.queue.qsize()}, handled {self.handled}, dropped {self.dropped}, '
+            f'errors {self.errors}, max lag {self.max_lag * 1000:.1f} ms'
+        )
+
+
+class EventBus(BaseLog):
+    '''In-process pub/sub.
+
+    Fast subscribers are plain callables run inline by `publish`, highest priority first, they must
+    not block. Slow subscribers are coroutines fed from their own bounded queue by a consumer task,
+    so they never add latency to the publisher.
+    '''
+
+    def __init__(self):
+        self.init_logger(
+            f'{self.__module__}.{self.__class__.__name__}',
+            '[bus]'
+        )
+        self._subscribers: Dict[Type, List[Subscriber]] = {}
+        self._consumers: Dict[Type, List[QueueConsumer]] = {}
+
+    def subscribe(self, topic: Type, callback: Callable[[Any], Any], priority: int = 0):
+        subscribers = self._subscribers.setdefault(topic, [])
+        subscribers.append(Subscriber(priority, callback))
+        subscribers.sort(key=lambda s: -s.priority)
+
+    def subscribe_queue(self, topic: Type, handler: Callable[[Any], Awaitable[Any]], name: str = None,
+                        maxsize: int = 100, batch: bool = False) -> QueueConsumer:
+        '''Runs `handler` for every event in a consumer task, with `batch` it gets a list of all queued events.'''
+        consumer = QueueConsumer(name or getattr(handler, '__qualname__', repr(handler)), handler, maxsize, batch)
+        consumer.task = asyncio.ensure_future(self._consume(consumer))
+        self._consumers.setdefault(topic, []).append(consumer)
+        return consumer
+
+    def unsubscribe(self, topic: Type, callback):
+        self._subscribers[topic] = [s for s in self._subscribers.get(topic, []) if s.callback != callback]
+        for consumer in self._consumers.get(topic, []):
+            if consumer.handler == callback:
+                consumer.task.cancel()
+        self._consumers[topic] = [c for c in self._consumers.get(topic, []) if c.handler != callback]
+
+    def publish(self, event):
+        topic = type(event)
+        for subscriber in self._subscribers.get(topic, ()):
+            try:
+                subscriber.callback(event)
+            except Exception as e:
+                self._logger.exception('%s subscriber %r failed: %s', topic.__name__, subscriber.callback, e)
+        for consumer in self._consumers.get(topic, ()):
+            consumer.put(event)
+
+    async def _consume(self, consumer: QueueConsumer):
+        queue = consumer.queue
+        while True:
+            items = [await queue.get()]
+            if consumer.batch:
+                while not queue.empty():
+                    items.append(queue.get_nowait())
+
+            consumer.max_lag = max(consumer.max_lag, time.monotonic() - items[0][0])
+            events = [event for _, event in items]
+            try:
+                if consumer.batch:
+                    await consumer.handler(events)
+                else:
+                    await consumer.handler(events[0])
+            except Exception as e:
+                consumer.errors += 1
+                await self.log(
+                    '%s failed (%s): %s', consumer.name, type(e).__name__, e,
+                    level=logging.ERROR
+                )
+            consumer.handled += len(events)
+
+    async def close(self):
+        tasks = [c.task for consumers in self._consumers.values() for c in consumers]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> str:
+        lines = []
+        for topic in sorted(set(self._subscribers) | set(self._consumers), key=lambda t: t.__name__):
+            lines.append(f'{topic.__name__}: {len(self._subscribers.get(topic, []))} fast subscribers')
+            lines.extend(f'  {c}' for c in self._consumers.get(topic, []))
+        return '\n'.join(lines)
+
+
+bus = EventBus()
@@ -4,10 +4,11 @@ import hmac
 from decimal import Decimal
 from enum import Enum
 from time import time
-from typing import Optional
+from typing import Optional, NamedTuple
 from urllib.parse import urlencode
 
 from aiohttp import ClientSession, ClientTimeout, ClientResponse, ContentTypeError
+from yarl import URL
 
 from exchange_libs.aiobinance.exceptions import BinanceAPIException, BinanceRequestException
 
@@ -19,6 +20,11 @@ class HttpMethod(Enum):
     DELETE = 'delete'
 
 
+class PreparedRequest(NamedTuple):
+    method: HttpMethod
+    url: URL
+
+
 class Client:
     _API_URL = 'https://api.binance.com/api'
 
@@ -35,18 +41,23 @@ class Client:
     TIME_IN_FORCE_IOC = 'IOC'  # Immediate or cancel
     TIME_IN_FORCE_FOK = 'FOK'  # Fill or kill
 
-    def __init__(self, api_key: str, api_secret: str, timeout=10, loop=None):
+    def __init__(self, api_key: str, api_secret: str, timeout=10, loop=None, api_url: str = None):
         self._API_KEY = api_key
         self._API_SECRET = api_secret
+        if api_url:
+            self._API_URL = api_url
 
         self._timeout = timeout
         self._loop = loop or asyncio.get_event_loop()
         self._session = self._init_session()
 
-    def _generate_signature(self, params):
+    async def close_session(self):
+        await self._session.close()
+
+    def _generate_signature(self, query: str):
         return hmac.new(
             self._API_SECRET.encode('u8'),
-            urlencode(params).encode('u8'),
+            query.encode('u8'),
             hashlib.sha256
         ).hexdigest()
 
@@ -73,14 +84,24 @@ class Client:
         )
 
     async def _request(self, method: HttpMethod, url: str, sign: bool = False, params: Optional[dict] = None):
+        return await self.send_prepared(self._prepare_request(method, url, sign, params))
+
+    def _prepare_request(self, method: HttpMethod, url: str, sign: bool = False,
+                         params: Optional[dict] = None) -> PreparedRequest:
         params = params or {}
 
         if sign:
             params.update({'timestamp': self._get_nonce()})
-            params.update({'signature': self._generate_signature(params)})
 
-        http_method = getattr(self._session, method.value)
-        async with http_method(url, params=params) as response:
+        query = urlencode(params)
+        if sign:
+            query = f'{query}&signature={self._generate_signature(query)}'
+
+        return PreparedRequest(method, URL(f'{url}?{query}' if query else url, encoded=True))
+
+    async def send_prepared(self, request: PreparedRequest):
+        http_method = getattr(self._session, request.method.value)
+        async with http_method(request.url) as response:
             return await self._handle_response(response)
 
     @staticmethod
@@ -329,6 +350,23 @@ class Client:
             }
         )
 
+    def prepare_order_limit_buy(self, symbol: str, quantity: str, price: Decimal,
+                                time_in_force=TIME_IN_FORCE_GTC) -> PreparedRequest:
+        """Signs a limit buy order without sending it, see :meth:`send_prepared`."""
+        return self._prepare_request(
+            HttpMethod.POST,
+            self._create_api_uri('order', True),
+            True,
+            {
+                'type': self.ORDER_TYPE_LIMIT,
+                'side': self.SIDE_BUY,
+                'symbol': symbol,
+                'quantity': quantity,
+                'price': str(price),
+                'timeInForce': time_in_force,
+            }
+        )
+
     async def create_test_order(self, symbol: str, side: str, type: str, quantity: Decimal):
         """Test new order creation and signature/recvWindow long. Creates and validates a new order but does not send it into the matching engine.
 
@@ -492,6 +530,21 @@ class Client:
         """
         return await self._delete('order', True, {'symbol': symbol, 'orderId': orderId})
 
+    async def cancel_open_orders(self, symbol: str):
+        """Cancel all active orders on a symbol.
+
+        https://github.com/binance-exchange/binance-official-api-docs/blob/master/rest-api.md#cancel-all-open-orders-on-a-symbol-trade
+
+        :param symbol: required
+        :type symbol: str
+
+        :returns: list of canceled orders, same format as for `cancel_order`
+
+        :raises: BinanceRequestException, BinanceAPIException
+
+        """
+        return await self._delete('openOrders', True, {'symbol': symbol})
+
     async def get_open_orders(self, symbol: str = None):
         """Get all open orders on a symbol.
 
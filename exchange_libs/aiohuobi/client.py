@@ -2,13 +2,15 @@ import asyncio
 import base64
 import hashlib
 import hmac
+import json
 from datetime import datetime
 from decimal import Decimal
 from enum import Enum
-from typing import Optional
+from typing import List, Optional, NamedTuple
 from urllib.parse import urlparse, urlencode
 
 import aiohttp
+from yarl import URL
 
 from exchange_libs.aiohuobi.exceptions import HuobiResponseException, HuobiAPIException, HuobiAuthenticationRequired
 
@@ -20,12 +22,21 @@ class HttpMethod(Enum):
     DELETE = 'delete'
 
 
+class PreparedRequest(NamedTuple):
+    method: HttpMethod
+    url: URL
+    body: str
+
+
 class Client:
     _API_URL = 'https://api.huobi.pro'
 
-    def __init__(self, access_key: str = None, secret_key: str = None, loop: asyncio.AbstractEventLoop = None):
+    def __init__(self, access_key: str = None, secret_key: str = None, loop: asyncio.AbstractEventLoop = None,
+                 api_url: str = None):
         self._access_key = access_key
         self._secret_key = secret_key
+        if api_url:
+            self._API_URL = api_url
 
         self._loop = loop or asyncio.get_event_loop()
         self._session = self._init_session()
@@ -50,17 +61,26 @@ class Client:
         return f'{self._API_URL}{path}'
 
     async def _request(self, method: HttpMethod, path: str, sign: bool = False, params: Optional[dict] = None):
-        params = params or {}
+        return await self.send_prepared(self._prepare_request(method, path, sign, params))
+
+    def _prepare_request(self, method: HttpMethod, path: str, sign: bool = False,
+                         params: Optional[dict] = None) -> PreparedRequest:
+        url = self._create_api_uri(path)
 
         if sign:
             if not self._access_key or not self._secret_key:
                 raise HuobiAuthenticationRequired(f'Authentication required for {path!r}')
-            signed_params = self._sign(path, method)
+            url = f'{url}?{urlencode(self._sign(path, method))}'
 
-        url = f'{self._create_api_uri(path)}?{urlencode(signed_params)}'
+        return PreparedRequest(method, URL(url, encoded=True), json.dumps(params or {}))
 
-        http_method = getattr(self._session, method.value)
-        async with http_method(url, json=params) as response:
+    async def send_prepared(self, request: PreparedRequest):
+        http_method = getattr(self._session, request.method.value)
+        async with http_method(
+                request.url,
+                data=request.body,
+                headers={'Content-Type': 'application/json'}
+        ) as response:
             return await self._handle_response(response)
 
     @staticmethod
@@ -156,12 +176,36 @@ class Client:
             }
         )
 
+    def prepare_buy_limit_order(self, account_id: int, amount: Decimal, symbol: str,
+                                price: Decimal) -> PreparedRequest:
+        return self._prepare_request(
+            HttpMethod.POST,
+            '/v1/order/orders/place',
+            True,
+            {
+                'account-id': account_id,
+                'amount': str(amount),
+                'source': 'api',
+                'symbol': symbol.lower(),
+                'price': str(price),
+                'type': 'buy-limit',
+            }
+        )
+
     async def cancel_order(self, order_id: str):
         return await self._post(
             f'/v1/order/orders/{order_id}/submitcancel',
             True,
         )
 
+    async def batch_cancel_orders(self, order_ids: List[str]):
+        '''Cancels up to 50 orders, data lists ids in `success` and errors in `failed`.'''
+        return await self._post(
+            '/v1/order/orders/batchcancel',
+            True,
+            {'order-ids': order_ids}
+        )
+
     async def get_open_orders(self, account_id):
         return await self._get(
             f'/v1/order/openOrders',
@@ -0,0 +1,46 @@
+import importlib
+from typing import Dict, List, Optional, Type
+
+# exchange name -> dotted path of its class, a module is imported on the first lookup of its exchange
+
+TRADE_EXCHANGES = {
+    'binance': 'exchanges.trade.binance.exchange.BinanceTradeExchange',
+    'bittrex': 'exchanges.trade.bittrex.exchange.BittrexTradeExchange',
+    'huobi': 'exchanges.trade.huobi.exchange.HuobiTradeExchange',
+}
+
+TRIGGER_EXCHANGES = {
+    'binance': 'exchanges.trigger.binance.exchange.BinanceTriggerExchange',
+    'bithumb': 'exchanges.trigger.bithumb.exchange.BithumbTriggerExchange',
+    'bittrex': 'exchanges.trigger.bittrex.exchange.BittrexTriggerExchange',
+    'coinbase': 'exchanges.trigger.coinbase.exchange.CoinbaseTriggerExchange',
+    'coinbase_pro': 'exchanges.trigger.coinbase_pro.exchange.CoinbaseProTriggerExchange',
+    'telegram': 'exchanges.trigger.telegram.exchange.TelegramTriggerExchange',
+    'upbit': 'exchanges.trigger.upbit.exchange.UpbitTriggerExchange',
+}
+
+
+class ExchangeRegistry:
+    '''Exchange classes by name, imported lazily so disabled exchanges and their libraries are never loaded.'''
+
+    def __init__(self, paths: Dict[str, str]):
+        self._paths = paths
+        self._classes: Dict[str, Type] = {}
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._paths)
+
+    def get(self, name: str) -> Optional[Type]:
+        cls = self._classes.get(name)
+        if cls is None and name in self._paths:
+            module_name, _, class_name = self._paths[name].rpartition('.')
+            cls = self._classes[name] = getattr(importlib.import_module(module_name), class_name)
+        return cls
+
+    def loaded(self) -> List[str]:
+        return list(self._classes)
+
+
+trade_exchanges = ExchangeRegistry(TRADE_EXCHANGES)
+trigger_exchanges = ExchangeRegistry(TRIGGER_EXCHANGES)
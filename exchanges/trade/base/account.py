@@ -2,14 +2,26 @@ import asyncio
 import logging
 from abc import ABC, abstractmethod
 from decimal import Decimal
-from typing import Any, Dict, Set
+from typing import Any, Awaitable, Dict, Iterable, List, Optional, Set, NamedTuple, Tuple, AsyncIterator
 
 import settings
 from common import NTCredential, Balance
+from events import bus, OrderPlaced, OrderFilled, BalanceChanged
+from exchanges.trade.base.portfolio import Portfolio
+from exchanges.trade.base.ws import WebsocketSupervisor
 from log import BaseLog
 from utils import norm
 
 
+class BuyOrder(NamedTuple):
+    pair: str
+    quote_symbol: str
+    qty: int
+    quote_amount: Decimal
+    price: Decimal
+    request: Any = None  # signed request, None if the client signs on send
+
+
 class BaseAccountAbstract(ABC):
     @abstractmethod
     async def _init_client(self):
@@ -25,11 +37,11 @@ class BaseAccountAbstract(ABC):
 
     @abstractmethod
     async def _create_account_ws_connection(self):
-        '''Creates WS connection to account stream (balance & order updates).'''
+        '''Creates and returns WS connection to account stream (balance & order updates).'''
 
     @abstractmethod
-    async def _ws_account_update_task(self):
-        ''''''
+    def _account_ws_messages(self, connection) -> AsyncIterator[Dict]:
+        '''Yields decoded messages from account websocket connection until it closes.'''
 
     @abstractmethod
     async def _process_account_update(self, data: Dict):
@@ -49,8 +61,12 @@ class BaseAccountAbstract(ABC):
         ''''''
 
     @abstractmethod
-    async def create_buy_order(self, symbol: str, qty: int, quote_amount_to_buy: Decimal = None):
-        '''Creates buy order.'''
+    def _prepare_buy_order(self, symbol: str, qty: int, quote_amount_to_buy: Decimal = None) -> Tuple[Decimal, Any]:
+        '''Returns limit price and signed buy order request, ready to be sent.'''
+
+    @abstractmethod
+    async def _send_buy_order(self, order: BuyOrder) -> str:
+        '''Sends prepared buy order, returns order id.'''
 
     @abstractmethod
     async def cancel_order(self, order_id: str, symbol: str = None):
@@ -60,11 +76,21 @@ class BaseAccountAbstract(ABC):
     async def get_open_orders_id(self) -> Set[str]:
         '''Returns set of all open orders ids for this account.'''
 
+    @abstractmethod
+    async def _close_client(self):
+        '''Closes HTTP session of the client.'''
+
 
 class BaseAccount(BaseLog, BaseAccountAbstract, ABC):
+    ACCOUNT_WS_STALE_TIMEOUT = None  # seconds, account streams without heartbeats may be silent for hours
+
     trade_exchange = None
     client: Any = None
     balance: Dict[str, Balance] = None
+    portfolio: Portfolio = None
+
+    account_ws: WebsocketSupervisor = None
+    _account_ws_task: asyncio.Task = None
 
     _credential: NTCredential = None
     _ws_account = None
@@ -79,6 +105,7 @@ class BaseAccount(BaseLog, BaseAccountAbstract, ABC):
         )
 
         self.balance = dict()
+        self.portfolio = Portfolio(trade_exchange, Decimal(settings.BALANCE_SHOW_LIMIT_BTC))
 
     async def init(self):
         await self.log('client init started')
@@ -89,19 +116,49 @@ class BaseAccount(BaseLog, BaseAccountAbstract, ABC):
         await self._init_balance()
         await self.log('balance init finished')
 
+        await self._init_account_ws()
+
+    async def _init_account_ws(self):
         await self.log('prepare ws account started')
         await self._prepare_ws_account_updates()
         await self.log('prepare ws account finished')
 
         await self.log('creating account ws started')
-        await self._create_account_ws_connection()
+        self._ws_account = await self._create_account_ws_connection()
         await self.log('creating account ws finished')
 
+        self.account_ws = WebsocketSupervisor(
+            'account',
+            self._connect_account_ws,
+            self._account_ws_messages,
+            self._process_account_update,
+            backfill=self._init_balance,
+            stale_timeout=self.ACCOUNT_WS_STALE_TIMEOUT,
+            prefix=f'[{self.trade_exchange.name}][{self._credential.owner}]',
+        )
+
         await self.log('creating account update task starting')
-        asyncio.create_task(self._ws_account_update_task())
+        self._account_ws_task = asyncio.create_task(self.account_ws.run(self._ws_account))
         await self.log('creating account update task finished')
 
+    async def close(self):
+        '''Stops account updates and closes the client, used when the credential is removed.'''
+        if self._account_ws_task:
+            self._account_ws_task.cancel()
+            await asyncio.gather(self._account_ws_task, return_exceptions=True)
+        self.portfolio.close()
+        await self._close_client()
+        await self.log('account closed')
+
+    async def _connect_account_ws(self):
+        await self._prepare_ws_account_updates()
+        self._ws_account = await self._create_account_ws_connection()
+        return self._ws_account
+
     async def buy(self, trigger_exchange, pair: str, quote_symbol):
+        await self.place_buy_order(self.prepare_buy(trigger_exchange, pair, quote_symbol))
+
+    def prepare_buy(self, trigger_exchange, pair: str, quote_symbol: str) -> BuyOrder:
         amount_to_buy_percent = trigger_exchange.buy_amount_percent(quote_symbol)
 
         balance: Balance = self.balance[quote_symbol]
@@ -109,21 +166,20 @@ class BaseAccount(BaseLog, BaseAccountAbstract, ABC):
         quote_amount_to_buy = balance.free * amount_to_buy_percent / 100
         ticker = self.trade_exchange.tickers[pair]
 
-        dirty_qty = quote_amount_to_buy / ticker.price
+        qty = int(quote_amount_to_buy / ticker.price)
 
-        qty = int(dirty_qty)
+        price, request = self._prepare_buy_order(pair, qty, quote_amount_to_buy)
 
-        await self.log(
-            '[%s] %s quote amount %s, dirty qty %s, qty %s',
-            pair, quote_symbol, quote_amount_to_buy, dirty_qty, qty
-        )
+        return BuyOrder(pair, quote_symbol, qty, quote_amount_to_buy, price, request)
+
+    async def create_buy_order(self, symbol: str, qty: int, quote_amount_to_buy: Decimal = None):
+        price, request = self._prepare_buy_order(symbol, qty, quote_amount_to_buy)
+        return await self._send_buy_order(BuyOrder(symbol, None, qty, quote_amount_to_buy, price, request))
 
+    async def place_buy_order(self, order: BuyOrder):
+        pair = order.pair
         try:
-            order_id = await self.create_buy_order(
-                pair,
-                qty,
-                quote_amount_to_buy
-            )
+            order_id = await self._send_buy_order(order)
         except Exception as e:
             await self.log(
                 '[%s] order create error (%s): %s',
@@ -142,11 +198,15 @@ class BaseAccount(BaseLog, BaseAccountAbstract, ABC):
                     pair
                 )
             )
-            await self.log('[%s] placed order with id %s', pair, order_id)
+            bus.publish(
+                OrderPlaced(
+                    self.trade_exchange.name, self.owner, pair, order_id,
+                    order.quote_symbol, order.quote_amount, order.qty, order.price
+                )
+            )
             await self.log(
-                '[%s] New buy order with id %s placed: %d %s for %s %s',
-                pair, order_id, qty, pair, quote_amount_to_buy, quote_symbol,
-                send_tg=True
+                '[%s] placed order with id %s: %s quote amount %s, qty %s, purchase price %s',
+                pair, order_id, order.quote_symbol, order.quote_amount, order.qty, order.price
             )
 
     async def cancel_and_check_with_delay(self, delay, order_id: str, symbol: str = None):
@@ -176,11 +236,38 @@ class BaseAccount(BaseLog, BaseAccountAbstract, ABC):
                 send_tg=True
             )
 
+    async def cancel_orders(self, orders: Set[Tuple[str, Optional[str]]]) -> int:
+        '''Cancels (order id, symbol) orders, returns how many were canceled.
+
+        Sends one cancel per order, accounts with batch cancel endpoints override it.
+        '''
+        results = await self._gather_bounded(self.cancel_order(order_id, symbol) for order_id, symbol in orders)
+        return sum([not isinstance(r, Exception) for r in results])
+
+    async def _gather_bounded(self, coros: Iterable[Awaitable]) -> List[Any]:
+        '''Runs at most ORDER_CANCEL_CONCURRENCY requests at once, logs and returns errors as results.'''
+        semaphore = asyncio.Semaphore(settings.ORDER_CANCEL_CONCURRENCY)
+
+        async def bounded(coro):
+            async with semaphore:
+                return await coro
+
+        results = await asyncio.gather(*[bounded(c) for c in coros], return_exceptions=True)
+        for e in results:
+            if isinstance(e, Exception):
+                await self.log('cancel error (%s): %s', type(e).__name__, e, level=logging.ERROR)
+        return results
+
     async def update_balance(self, symbol: str, balance: Balance) -> None:
         previous_balance = self.balance.get(symbol)
         if previous_balance != balance:
             await self.log('%s balance update: %s -> %s', symbol, previous_balance, balance)
             self.balance[symbol] = balance
+            self.portfolio.update_balance(symbol, balance)
+            bus.publish(BalanceChanged(self.trade_exchange.name, self.owner, symbol, previous_balance, balance))
+
+    def report_filled(self, order: Dict):
+        bus.publish(OrderFilled(self.trade_exchange.name, self.owner, self._format_order(order)))
 
     @staticmethod
     def _compose_order_report(order_side: str, qty: Decimal, price: Decimal, pair: str, total: Decimal):
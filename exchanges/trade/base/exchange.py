@@ -1,14 +1,27 @@
 import asyncio
+import functools
 import logging
+import time
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from decimal import Decimal
-from typing import List, Dict, Iterator, NamedTuple, Set
+from typing import List, Dict, Iterable, Iterator, NamedTuple, Optional, Set, Tuple, AsyncIterator, Awaitable, \
+    Callable
 
 import settings
 from common import NTCredential
-from exchanges.trade.base.account import BaseAccount
+from exchanges.trade.base.account import BaseAccount, BuyOrder
+from exchanges.trade.base.history import TickerHistory
+from exchanges.trade.base.orderbook import OrderBook
+from exchanges.trade.base.portfolio import Portfolio
+from exchanges.trade.base.ws import WebsocketSupervisor
 from log import BaseLog
 from network import AsyncHttp
+from symbols import SymbolIndex
+from tracing import mark
+
+
+_signing_executor = ThreadPoolExecutor(settings.ORDER_SIGNING_THREADS) if settings.ORDER_SIGNING_THREADS else None
 
 
 class SymbolTicker(NamedTuple):
@@ -16,6 +29,33 @@ class SymbolTicker(NamedTuple):
     price: Decimal
 
 
+class RawSymbolTicker:
+    '''SymbolTicker kept as raw stream floats, its Decimal fields are computed on first read.'''
+    __slots__ = ('raw_price', 'raw_open_price', '_price', '_price_change_percent')
+
+    def __init__(self, price: float, open_price: float):
+        self.raw_price = price
+        self.raw_open_price = open_price
+        self._price: Decimal = None
+        self._price_change_percent: Decimal = None
+
+    @property
+    def price(self) -> Decimal:
+        if self._price is None:
+            self._price = Decimal(str(self.raw_price))
+        return self._price
+
+    @property
+    def price_change_percent(self) -> Decimal:
+        if self._price_change_percent is None:
+            price_change = self.price / Decimal(str(self.raw_open_price))
+            self._price_change_percent = ((price_change - 1) * 100).quantize(Decimal('.01'))
+        return self._price_change_percent
+
+    def __repr__(self):
+        return f'SymbolTicker(price_change_percent={self.price_change_percent!r}, price={self.price!r})'
+
+
 class BaseTradeExchangeAbstract(ABC):
     @property
     @abstractmethod
@@ -40,17 +80,46 @@ class BaseTradeExchangeAbstract(ABC):
         '''Returns websocket connection to tickers websockets API.'''
 
     @abstractmethod
-    async def _ws_ticker_update_task(self):
-        ''''''
+    def _ticker_ws_messages(self, connection) -> AsyncIterator[Dict]:
+        '''Yields decoded messages from tickers websocket connection until it closes.'''
 
     @abstractmethod
-    async def _process_ticker_update(self, data: Dict):
-        ''''''
+    async def _process_ticker_update(self, data: Dict, stream: int = 0):
+        '''Process message from tickers websocket number `stream`.'''
 
     @abstractmethod
-    async def _process_ticker(self, data: Dict):
+    async def _process_ticker(self, data: Dict, event_ts: int = None, stream: int = 0):
         '''Process ticker updates from websockets API.'''
 
+    @abstractmethod
+    async def _fetch_ticker(self, pair: str) -> Optional[SymbolTicker]:
+        '''Requests single pair ticker from REST API, None if pair is unknown.'''
+
+    async def _stream_ticker(self, pair: str) -> Optional[SymbolTicker]:
+        '''Returns first ticker from single pair websocket stream, None if exchange has no such stream.'''
+        return None
+
+    async def _create_depth_ws_connection(self, pair: str):
+        '''Creates and returns WS connection to pair depth stream, only called when DEPTH_STREAM is set.'''
+        return None
+
+    def _depth_ws_messages(self, connection) -> AsyncIterator[Dict]:
+        '''Yields decoded messages from depth websocket connection until it closes, same decoding as tickers by default.'''
+        return self._ticker_ws_messages(connection)
+
+    def _process_depth_update(self, book: OrderBook, data: Dict):
+        '''Applies depth message to the book.'''
+
+    async def _init_depth(self, book: OrderBook):
+        '''Loads book snapshot over REST after (re)connect, not needed for full-snapshot streams.'''
+
+    async def _prepare_new_pairs(self, pairs: List[str]):
+        '''Loads what orders of pairs listed after startup need, e.g. price filters, before they are prepared.'''
+
+    async def _load_markets(self) -> Iterable[Tuple[str, str, str, bool]]:
+        '''Returns (base, quote, pair, trading) of every exchange market, without markets pairs are built with make_pair.'''
+        return []
+
     @staticmethod
     @abstractmethod
     def make_pair(base, quote):
@@ -66,11 +135,29 @@ class BaseTradeExchangeAbstract(ABC):
 
 
 class BaseTradeExchange(BaseLog, BaseTradeExchangeAbstract, ABC):
+    TICKER_WS_STALE_TIMEOUT = 30  # seconds
+    DEPTH_STREAM = False  # exchange implements depth stream hooks
+
     accounts: List[BaseAccount] = None
     tickers: Dict[str, SymbolTicker] = None
-    _ws_tickers = None
+    ticker_history: TickerHistory = None
+    ticker_ws_streams: List[WebsocketSupervisor] = None
+    order_books: Dict[str, OrderBook] = None
+    symbols: SymbolIndex = None
     http: AsyncHttp = None
 
+    # latest event timestamp per symbol, used to merge redundant ticker streams
+    _ticker_event_ts: Dict[str, int] = None
+    # monotonic time of last websocket update per symbol and of last REST snapshot
+    _ticker_updated_at: Dict[str, float] = None
+    _tickers_snapshot_at: float = 0
+    # pairs not listed yet, callback fires on their first ticker update
+    _pending_pairs: Dict[str, Callable[[str], None]] = None
+    # account portfolios valued with the pair
+    _price_watchers: Dict[str, List[Portfolio]] = None
+    # depth stream supervisor, its task and expiration handle per pair
+    _order_book_streams: Dict[str, Tuple[WebsocketSupervisor, asyncio.Task, asyncio.TimerHandle]] = None
+
     def __init__(self):
         self.init_logger(
             f'{self.__module__}.{self.__class__.__name__}',
@@ -78,7 +165,15 @@ class BaseTradeExchange(BaseLog, BaseTradeExchangeAbstract, ABC):
         )
         self.accounts = []
         self.tickers = {}
+        self.ticker_history = TickerHistory(settings.TICKER_HISTORY_SECONDS)
+        self.ticker_ws_streams = []
+        self._ticker_updated_at = {}
+        self._pending_pairs = {}
+        self._price_watchers = {}
+        self.order_books = {}
+        self._order_book_streams = {}
         self.price_filters = {}
+        self.symbols = SymbolIndex(self.make_pair)
 
     @property
     def limit_order_markup_percent(self) -> int:
@@ -89,12 +184,15 @@ class BaseTradeExchange(BaseLog, BaseTradeExchangeAbstract, ABC):
         await self.init_session()
         await self.log('init session finished')
 
+        # account portfolios resolve their valuation pairs against the markets
+        await self.init_markets()
+
         await self.log('init accounts started')
         await self.init_accounts(credentials)
         await self.log('init accounts finished')
 
         await self.log('init ticker started')
-        await self._init_ticker()
+        await self.snapshot_tickers()
         await self.log('init ticker finished')
 
         await self.log('init price filters started')
@@ -106,13 +204,224 @@ class BaseTradeExchange(BaseLog, BaseTradeExchangeAbstract, ABC):
         await self.log('init ticker ws finished')
 
     async def init_ticker_ws(self):
-        await self.log('create ticker ws started')
-        await self._create_ticker_ws_connection()
-        await self.log('create ticker ws finished')
+        streams_count = max(1, settings.TICKER_WS_CONNECTIONS)
+        if streams_count > 1:
+            self._ticker_event_ts = {}
+
+        for stream in range(streams_count):
+            self.ticker_ws_streams.append(await self._init_ticker_stream(stream))
+
+    async def _init_ticker_stream(self, stream: int) -> WebsocketSupervisor:
+        supervisor = WebsocketSupervisor(
+            f'tickers#{stream}',
+            self._create_ticker_ws_connection,
+            self._ticker_ws_messages,
+            functools.partial(self._process_ticker_update, stream=stream),
+            backfill=functools.partial(self._backfill_tickers, stream),
+            stale_timeout=self.TICKER_WS_STALE_TIMEOUT,
+            prefix=f'[{self.name}]',
+        )
+
+        await self.log('create ticker ws #%d started', stream)
+        connection = await self._create_ticker_ws_connection()
+        await self.log('create ticker ws #%d finished', stream)
+
+        asyncio.create_task(supervisor.run(connection))
+        return supervisor
+
+    async def _backfill_tickers(self, stream: int):
+        # a REST snapshot is older than what a live standby stream delivers, skip it then
+        if any(s.health.connected for i, s in enumerate(self.ticker_ws_streams) if i != stream):
+            return
+        await self.snapshot_tickers()
+
+    async def snapshot_tickers(self):
+        '''Replaces tickers with the REST snapshot, buys watched pairs it lists and revalues portfolios.
+
+        Snapshots bypass _set_ticker.
+        '''
+        await self._init_ticker()
+        self._tickers_snapshot_at = time.monotonic()
+        for pair in [p for p in self._pending_pairs if p in self.tickers]:
+            self._appeared(pair)
+        for pair, portfolios in list(self._price_watchers.items()):
+            ticker = self.tickers.get(pair)
+            if ticker:
+                for portfolio in list(portfolios):
+                    portfolio.update_price(pair, ticker)
+
+    def _set_ticker(self, symbol: str, ticker: SymbolTicker, event_ts: int = None, stream: int = 0):
+        if self._ticker_event_ts is not None and event_ts is not None:
+            health = self.ticker_ws_streams[stream].health
+            if event_ts <= self._ticker_event_ts.get(symbol, 0):
+                health.late_updates += 1
+                return
+            self._ticker_event_ts[symbol] = event_ts
+            health.first_updates += 1
+
+        now = time.monotonic()
+        self.tickers[symbol] = ticker
+        self._ticker_updated_at[symbol] = now
+        self.ticker_history.record(
+            symbol,
+            ticker.raw_price if isinstance(ticker, RawSymbolTicker) else float(ticker.price),
+            now
+        )
+
+        self._appeared(symbol)
+
+        portfolios = self._price_watchers.get(symbol)
+        if portfolios:
+            for portfolio in portfolios:
+                portfolio.update_price(symbol, ticker)
+
+    def _appeared(self, pair: str):
+        '''Calls the watch_pair callback of pair once it has a ticker.'''
+        if pair in self._pending_pairs:
+            self._pending_pairs.pop(pair)(pair)
 
-        await self.log('creating ticker update task started')
-        asyncio.create_task(self._ws_ticker_update_task())
-        await self.log('creating ticker update task finished')
+    @property
+    def pending_pairs(self) -> Set[str]:
+        return set(self._pending_pairs)
+
+    def watch_pair(self, pair: str, callback: Callable[[str], None]):
+        self._pending_pairs[pair] = callback
+
+    def unwatch_pair(self, pair: str):
+        self._pending_pairs.pop(pair, None)
+
+    def watch_price(self, pair: str, portfolio: Portfolio):
+        self._price_watchers.setdefault(pair, []).append(portfolio)
+
+    def unwatch_price(self, pair: str, portfolio: Portfolio):
+        portfolios = self._price_watchers.get(pair, [])
+        if portfolio in portfolios:
+            portfolios.remove(portfolio)
+        if not portfolios:
+            self._price_watchers.pop(pair, None)
+
+    def open_order_book(self, pair: str):
+        '''Starts maintaining depth of pair for ORDER_BOOK_TTL seconds, extends the time if already open.'''
+        if not self.DEPTH_STREAM or not settings.ORDER_BOOK_TTL:
+            return
+
+        stream = self._order_book_streams.get(pair)
+        if stream:
+            supervisor, task, expiration = stream
+            expiration.cancel()
+        else:
+            book = self.order_books[pair] = OrderBook(pair)
+            supervisor = WebsocketSupervisor(
+                f'depth:{pair}',
+                functools.partial(self._create_depth_ws_connection, pair),
+                self._depth_ws_messages,
+                functools.partial(self._process_depth_update, book),
+                backfill=functools.partial(self._init_depth, book),
+                stale_timeout=self.TICKER_WS_STALE_TIMEOUT,
+                prefix=f'[{self.name}]',
+            )
+            task = asyncio.ensure_future(supervisor.run())
+
+        expiration = asyncio.get_event_loop().call_later(settings.ORDER_BOOK_TTL, self.close_order_book, pair)
+        self._order_book_streams[pair] = (supervisor, task, expiration)
+
+    def close_order_book(self, pair: str):
+        stream = self._order_book_streams.pop(pair, None)
+        if stream:
+            _, task, expiration = stream
+            task.cancel()
+            expiration.cancel()
+        self.order_books.pop(pair, None)
+
+    async def wait_order_books(self, pairs: Iterable[str], timeout: float):
+        '''Waits at most `timeout` seconds for the books check_pair just opened to sync, 0 does not wait.'''
+        waiters = [
+            asyncio.ensure_future(book.wait_synced())
+            for book in (self.order_books.get(p) for p in pairs)
+            if book and not book.synced
+        ]
+        if not waiters:
+            return
+        if timeout:
+            await asyncio.wait(waiters, timeout=timeout)
+        for waiter in waiters:
+            waiter.cancel()
+
+    def order_book(self, pair: str) -> Optional[OrderBook]:
+        '''Returns pair book if it is open, synced and its stream is connected.'''
+        book = self.order_books.get(pair)
+        if not book or not book.synced or not self._order_book_streams[pair][0].health.connected:
+            return None
+        return book
+
+    def limit_price(self, pair: str, quote_amount: Decimal) -> Decimal:
+        '''Limit buy price: price that fills quote amount in the book plus buffer, capped by markup over ticker.'''
+        max_price = self.tickers[pair].price / 100 * (100 + self.limit_order_markup_percent)
+
+        book = self.order_book(pair)
+        fill_price = book.price_to_fill(float(quote_amount)) if book else None
+        if fill_price is None:
+            return max_price
+
+        return min(
+            Decimal(str(fill_price)) / 100 * (100 + settings.ORDER_BOOK_PRICE_BUFFER),
+            max_price
+        )
+
+    def ticker_age(self, pair: str) -> float:
+        updated_at = max(self._ticker_updated_at.get(pair, 0), self._tickers_snapshot_at)
+        return time.monotonic() - updated_at
+
+    async def refresh_ticker(self, pair: str) -> Optional[SymbolTicker]:
+        '''Races single pair REST request against single pair websocket, waits at most TICKER_REFRESH_TIMEOUT.
+
+        Gives up as soon as REST answers the pair is unknown, its stream would never tick.
+        '''
+        loop = asyncio.get_event_loop()
+        started_at = loop.time()
+        deadline = started_at + settings.TICKER_REFRESH_TIMEOUT
+        sources = {
+            asyncio.ensure_future(self._fetch_ticker(pair)): 'rest',
+            asyncio.ensure_future(self._stream_ticker(pair)): 'ws',
+        }
+
+        ticker, source, unknown = None, None, False
+        pending = set(sources)
+        try:
+            while pending and ticker is None and not unknown:
+                done, pending = await asyncio.wait(
+                    pending, timeout=max(0, deadline - loop.time()), return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    break
+                for task in done:
+                    if task.exception():
+                        e = task.exception()
+                        await self.log(
+                            'Pair %s %s ticker refresh failed (%s): %s',
+                            pair, sources[task], type(e).__name__, e,
+                            level=logging.WARNING
+                        )
+                    elif task.result() and ticker is None:
+                        ticker, source = task.result(), sources[task]
+                    elif sources[task] == 'rest':
+                        unknown = True
+        finally:
+            for task in pending:
+                task.cancel()
+
+        elapsed = (loop.time() - started_at) * 1000
+        if ticker is None:
+            await self.log(
+                'Pair %s ticker refresh got nothing in %.3f ms%s', pair, elapsed, ', pair is unknown' if unknown else ''
+            )
+            return None
+
+        await self.log('Pair %s ticker refreshed from %s in %.3f ms', pair, source, elapsed)
+        self.tickers[pair] = ticker
+        self._ticker_updated_at[pair] = time.monotonic()
+        self._appeared(pair)
+        return ticker
 
     async def init_price_filters_and_task(self):
         await self.log('init price filters started')
@@ -123,6 +432,23 @@ class BaseTradeExchange(BaseLog, BaseTradeExchangeAbstract, ABC):
         asyncio.create_task(self.price_filters_update_task())
         await self.log('create price filters update task finished')
 
+    async def init_markets(self):
+        await self.update_markets()
+        await self.log('symbol index has %d pairs', len(self.symbols))
+        if settings.MARKETS_UPDATE_INTERVAL:
+            asyncio.create_task(self.markets_update_task())
+
+    async def update_markets(self):
+        try:
+            self.symbols.load(await self._load_markets())
+        except Exception as e:
+            await self.log('Unable to load markets (%s): %s', type(e).__name__, e, level=logging.WARNING)
+
+    async def markets_update_task(self):
+        while True:
+            await asyncio.sleep(settings.MARKETS_UPDATE_INTERVAL)
+            await self.update_markets()
+
     async def init_accounts(self, credentials: Iterator[NTCredential]):
         for credential in credentials:
             try:
@@ -143,26 +469,59 @@ class BaseTradeExchange(BaseLog, BaseTradeExchangeAbstract, ABC):
             else:
                 self.accounts.append(account)
 
+    async def remove_account(self, credential: NTCredential) -> bool:
+        for account in self.accounts:
+            if account._credential == credential:
+                self.accounts.remove(account)
+                await account.close()
+                return True
+        return False
+
     async def init_session(self):
         self.http = AsyncHttp()
 
-    async def buy(self, trigger_exchange, symbol: str, price_change_limit: int):
-        tasks = [
-            self.buy_pair(
-                trigger_exchange,
-                self.make_pair(symbol, quote_symbol),
-                quote_symbol,
-                price_change_limit
-            )
+    async def buy(self, trigger_exchange, symbol: str, price_change_limit: int,
+                  on_not_listed: Callable[[str, str], Awaitable[None]] = None) -> List[Tuple[str, str]]:
+        '''Buys symbol for every quote, returns (pair, quote symbol) not listed on exchange yet.
+
+        Every pair is bought as soon as its own check passes, a slow ticker refresh of one quote
+        does not hold orders of the others. `on_not_listed` is awaited with every pair that is
+        not listed right after its check.
+        '''
+        pairs = [
+            (self.symbols.pair(symbol, quote_symbol), quote_symbol)
             for quote_symbol in self.buy_symbols
         ]
-        await asyncio.gather(*tasks)
+        await asyncio.gather(
+            *[
+                self._buy_quote(trigger_exchange, pair, quote_symbol, price_change_limit, on_not_listed)
+                for pair, quote_symbol in pairs
+            ]
+        )
+        return [p for p in pairs if p[0] not in self.tickers]
+
+    async def _buy_quote(self, trigger_exchange, pair: str, quote_symbol: str, price_change_limit: int,
+                         on_not_listed: Callable[[str, str], Awaitable[None]] = None):
+        await self.buy_pair(trigger_exchange, pair, quote_symbol, price_change_limit)
+        if on_not_listed and pair not in self.tickers:
+            await on_not_listed(pair, quote_symbol)
 
     async def buy_pair(self, trigger_exchange, pair: str, quote_symbol: str, price_change_limit: int):
+        passed = await self.check_pair(trigger_exchange, pair, quote_symbol, price_change_limit)
+        mark(f'{self.name}:checked')
+        if passed:
+            await self.place_buy_orders(trigger_exchange, [(pair, quote_symbol)])
+
+    async def check_pair(self, trigger_exchange, pair: str, quote_symbol: str, price_change_limit: int) -> bool:
+        self.open_order_book(pair)
+
         ticker = self.tickers.get(pair)
+        if (not ticker or self.ticker_age(pair) > settings.TICKER_MAX_AGE) and self._may_be_listed(pair):
+            ticker = await self.refresh_ticker(pair) or ticker
 
         if not ticker:
-            return await self.log('Pair %s not found, skipping...', pair, send_tg=True)
+            await self.log('Pair %s not found, skipping...', pair, send_tg=True)
+            return False
 
         await self.log(
             '%s buy amount percent is %s%%',
@@ -172,17 +531,76 @@ class BaseTradeExchange(BaseLog, BaseTradeExchangeAbstract, ABC):
         await self.log('Pair %s ticker: %s, limit is %s', pair, ticker, price_change_limit)
         await self.log('Pair %s ticker: %s, limit is %s', pair, ticker, price_change_limit, send_tg=True)
         if ticker.price_change_percent > price_change_limit:
-            return await self.log(
+            await self.log(
                 'Pair %s 24hr price change %s%% > %d%%, skipping...',
                 pair, ticker.price_change_percent, price_change_limit,
                 send_tg=True
             )
+            return False
 
-        for a in self.accounts:
-            asyncio.create_task(
-                a.buy(
-                    trigger_exchange,
-                    pair,
-                    quote_symbol
+        for seconds, limit in settings.SHORT_PRICE_CHANGE_LIMITS:
+            change = self.ticker_history.change_percent(pair, seconds)
+            if change is not None and change > limit:
+                await self.log(
+                    'Pair %s %ds price change %.2f%% > %d%%, skipping...',
+                    pair, seconds, change, limit,
+                    send_tg=True
                 )
+                return False
+
+        return True
+
+    def _may_be_listed(self, pair: str) -> bool:
+        '''False when loaded market metadata does not list the pair, an unknown pair would only time out refreshes.'''
+        return not len(self.symbols) or self.symbols.assets(pair) is not None
+
+    async def place_buy_orders(self, trigger_exchange, pairs: List[Tuple[str, str]]):
+        '''Signs orders for every account and pair in one batch, then sends them all at once.'''
+        if not pairs:
+            return
+
+        await asyncio.gather(
+            self.wait_order_books([pair for pair, _ in pairs], settings.ORDER_BOOK_SYNC_TIMEOUT),
+            self._prepare_new_pairs([pair for pair, _ in pairs]),
+        )
+
+        jobs = [
+            (account, pair, quote_symbol)
+            for pair, quote_symbol in pairs
+            for account in self.accounts
+        ]
+
+        started_at = time.monotonic()
+        if _signing_executor:
+            orders, errors = await asyncio.get_event_loop().run_in_executor(
+                _signing_executor, self._prepare_buy_orders, trigger_exchange, jobs
             )
+        else:
+            orders, errors = self._prepare_buy_orders(trigger_exchange, jobs)
+        prepared_at = time.monotonic()
+
+        await asyncio.gather(
+            *[
+                account.place_buy_order(order)
+                for account, order in orders
+            ]
+        )
+        mark(f'{self.name}:sent')
+
+        await self.log(
+            'sent %d buy orders: prepared in %.3f ms, sent in %.3f ms',
+            len(orders), (prepared_at - started_at) * 1000, (time.monotonic() - prepared_at) * 1000
+        )
+        for account, pair, e in errors:
+            await account.log('[%s] Unable to prepare order (%s): %s', pair, type(e).__name__, e, send_tg=True)
+
+    @staticmethod
+    def _prepare_buy_orders(trigger_exchange, jobs: List[Tuple[BaseAccount, str, str]]):
+        orders: List[Tuple[BaseAccount, BuyOrder]] = []
+        errors = []
+        for account, pair, quote_symbol in jobs:
+            try:
+                orders.append((account, account.prepare_buy(trigger_exchange, pair, quote_symbol)))
+            except Exception as e:
+                errors.append((account, pair, e))
+        return orders, errors
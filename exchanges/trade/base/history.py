@@ -0,0 +1,72 @@
+import sys
+import time
+from array import array
+from typing import Dict, Optional
+
+
+class PriceRing:
+    '''Last price of every `resolution` slot over the horizon, slots without updates repeat previous price.'''
+    __slots__ = ('prices', 'first_slot', 'last_slot')
+
+    def __init__(self, size: int, slot: int, price: float):
+        self.prices = array('d', [price]) * size
+        self.first_slot = slot
+        self.last_slot = slot
+
+
+class TickerHistory:
+    def __init__(self, horizon: int = 300, resolution: float = 1.0):
+        self.horizon = horizon
+        self.resolution = resolution
+        self._size = int(horizon / resolution) + 1
+        self._rings: Dict[str, PriceRing] = {}
+
+    def __len__(self):
+        return len(self._rings)
+
+    def record(self, symbol: str, price: float, now: float = None):
+        slot = int((time.monotonic() if now is None else now) / self.resolution)
+        ring = self._rings.get(symbol)
+        if ring is None:
+            self._rings[symbol] = PriceRing(self._size, slot, price)
+            return
+
+        last_slot = ring.last_slot
+        if slot < last_slot:
+            return
+
+        size = self._size
+        prices = ring.prices
+        if slot > last_slot:
+            previous = prices[last_slot % size]
+            for s in range(max(last_slot + 1, slot - size + 1), slot):
+                prices[s % size] = previous
+            ring.last_slot = slot
+        prices[slot % size] = price
+
+    def change_percent(self, symbol: str, seconds: float, now: float = None) -> Optional[float]:
+        '''Price change over last `seconds`, None without enough history.'''
+        ring = self._rings.get(symbol)
+        if ring is None:
+            return None
+
+        slot = int((time.monotonic() if now is None else now) / self.resolution)
+        target = slot - int(seconds / self.resolution)
+        if target < ring.first_slot or target < slot - self._size + 1:
+            return None
+
+        if target >= ring.last_slot:
+            return 0.0
+
+        size = self._size
+        past_price = ring.prices[target % size]
+        if not past_price:
+            return None
+        return (ring.prices[ring.last_slot % size] / past_price - 1) * 100
+
+    def footprint(self) -> int:
+        '''Approximate memory used by history in bytes.'''
+        return sys.getsizeof(self._rings) + sum(
+            sys.getsizeof(symbol) + sys.getsizeof(ring) + sys.getsizeof(ring.prices)
+            for symbol, ring in self._rings.items()
+        )
@@ -0,0 +1,103 @@
+import asyncio
+import time
+from bisect import bisect_left
+from typing import Iterable, List, Optional, Sequence
+
+
+class OrderBookGap(Exception):
+    '''Diff update does not follow the previous one, book has to be synced again.'''
+
+
+class BookSide:
+    '''Price levels kept sorted by bisect, best level first.'''
+    __slots__ = ('_keys', '_sizes', '_sign')
+
+    def __init__(self, descending: bool = False):
+        self._keys: List[float] = []
+        self._sizes: List[float] = []
+        self._sign = -1 if descending else 1
+
+    def __len__(self):
+        return len(self._keys)
+
+    def update(self, price: float, size: float):
+        keys = self._keys
+        key = price * self._sign
+        i = bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            if size:
+                self._sizes[i] = size
+            else:
+                del keys[i]
+                del self._sizes[i]
+        elif size:
+            keys.insert(i, key)
+            self._sizes.insert(i, size)
+
+    def replace(self, levels: Iterable[Sequence]):
+        sign = self._sign
+        pairs = sorted((float(p) * sign, float(q)) for p, q in levels if float(q))
+        self._keys = [k for k, _ in pairs]
+        self._sizes = [q for _, q in pairs]
+
+    def levels(self):
+        sign = self._sign
+        return ((k * sign, q) for k, q in zip(self._keys, self._sizes))
+
+    def best(self) -> Optional[float]:
+        return self._keys[0] * self._sign if self._keys else None
+
+
+class OrderBook:
+    def __init__(self, pair: str):
+        self.pair = pair
+        self.bids = BookSide(descending=True)
+        self.asks = BookSide()
+        self.last_update_id: int = None
+        self.synced = False
+        self.updated_at: float = None
+        self._sync_waiters: List[asyncio.Future] = []
+
+    def load_snapshot(self, bids: Iterable[Sequence], asks: Iterable[Sequence], last_update_id: int = None):
+        self.bids.replace(bids)
+        self.asks.replace(asks)
+        self.last_update_id = last_update_id
+        self.synced = True
+        self.updated_at = time.monotonic()
+        for waiter in self._sync_waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+        self._sync_waiters = []
+
+    async def wait_synced(self):
+        if not self.synced:
+            waiter = asyncio.get_event_loop().create_future()
+            self._sync_waiters.append(waiter)
+            await waiter
+
+    def apply_diff(self, bids: Iterable[Sequence], asks: Iterable[Sequence], first_update_id: int,
+                   last_update_id: int):
+        '''Applies sequenced diff, events already covered by the snapshot are dropped.'''
+        if self.last_update_id is None or first_update_id > self.last_update_id + 1:
+            self.synced = False
+            raise OrderBookGap(
+                f'{self.pair} update {first_update_id}-{last_update_id} after {self.last_update_id}'
+            )
+        if last_update_id <= self.last_update_id:
+            return
+
+        for p, q in bids:
+            self.bids.update(float(p), float(q))
+        for p, q in asks:
+            self.asks.update(float(p), float(q))
+        self.last_update_id = last_update_id
+        self.updated_at = time.monotonic()
+
+    def price_to_fill(self, quote_amount: float) -> Optional[float]:
+        '''Worst ask price reached when buying for `quote_amount`, None if book is not deep enough.'''
+        total = 0.0
+        for price, size in self.asks.levels():
+            total += price * size
+            if total >= quote_amount:
+                return price
+        return None
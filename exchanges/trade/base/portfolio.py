@@ -0,0 +1,107 @@
+from decimal import Decimal
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+from common import Balance
+from utils import norm
+
+
+class AssetValue(NamedTuple):
+    asset: str
+    balance: Balance
+    # None while the valuation pair has no ticker
+    value: Optional[Decimal]
+
+
+class Portfolio:
+    '''Valuation of one account's balances in `convert_to`, updated on balance and ticker changes.
+
+    Every held asset watches its valuation pair on the trade exchange, a ticker update
+    revalues only that asset. Assets worth less than `limit` are not significant, assets
+    without a ticker are kept significant so they are never hidden silently.
+    '''
+
+    def __init__(self, exchange, limit: Decimal, convert_to: str = 'BTC'):
+        self._exchange = exchange
+        self._limit = limit
+        self._convert_to = convert_to
+        self._balances: Dict[str, Balance] = {}
+        # asset -> (valuation pair, pair is quoted in the asset)
+        self._pairs: Dict[str, Tuple[str, bool]] = {}
+        self._assets_by_pair: Dict[str, str] = {}
+        self._values: Dict[str, Optional[Decimal]] = {}
+        self._significant: Set[str] = set()
+
+    def update_balance(self, asset: str, balance: Balance):
+        total = balance.total()
+        if norm(total) == '0':
+            self._remove(asset)
+            return
+
+        self._balances[asset] = balance
+        if asset == self._convert_to:
+            self._set_value(asset, total)
+            return
+
+        if asset not in self._pairs:
+            inverse = 'USD' in asset
+            if inverse:
+                pair = self._exchange.symbols.pair(self._convert_to, asset)
+            else:
+                pair = self._exchange.symbols.pair(asset, self._convert_to)
+            self._pairs[asset] = (pair, inverse)
+            self._assets_by_pair[pair] = asset
+            self._exchange.watch_price(pair, self)
+
+        pair, _ = self._pairs[asset]
+        self._revalue(asset, self._exchange.tickers.get(pair))
+
+    def update_price(self, pair: str, ticker):
+        asset = self._assets_by_pair.get(pair)
+        if asset is not None:
+            self._revalue(asset, ticker)
+
+    def _revalue(self, asset: str, ticker):
+        _, inverse = self._pairs[asset]
+        if ticker is None or inverse and not ticker.price:
+            self._set_value(asset, None)
+            return
+
+        price = Decimal(1) / ticker.price if inverse else ticker.price
+        self._set_value(asset, price * self._balances[asset].total())
+
+    def _set_value(self, asset: str, value: Optional[Decimal]):
+        self._values[asset] = value
+        if value is None or value >= self._limit:
+            self._significant.add(asset)
+        else:
+            self._significant.discard(asset)
+
+    def _remove(self, asset: str):
+        self._balances.pop(asset, None)
+        self._values.pop(asset, None)
+        self._significant.discard(asset)
+        pair, _ = self._pairs.pop(asset, (None, None))
+        if pair is not None:
+            del self._assets_by_pair[pair]
+            self._exchange.unwatch_price(pair, self)
+
+    def close(self):
+        '''Stops watching the valuation pairs, used when the account is removed.'''
+        for pair in list(self._assets_by_pair):
+            self._exchange.unwatch_price(pair, self)
+        self._assets_by_pair.clear()
+        self._pairs.clear()
+
+    def significant(self) -> List[AssetValue]:
+        return [
+            AssetValue(asset, self._balances[asset], self._values[asset])
+            for asset in sorted(self._significant)
+        ]
+
+    @property
+    def total(self) -> Decimal:
+        '''Value of the priced assets.'''
+        return sum((v for v in self._values.values() if v is not None), Decimal(0))
+
+    def __len__(self):
+        return len(self._balances)
@@ -0,0 +1,201 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
+
+from events import bus, StreamStale
+from log import BaseLog
+
+
+class StreamHealth:
+    '''Per-stream counters shown by /ws.'''
+
+    def __init__(self):
+        self.connected = False
+        self.connects = 0
+        self.messages = 0
+        self.errors = 0
+        self.stale = 0
+        self.backfills = 0
+        # with redundant streams: updates this stream delivered before / after the others
+        self.first_updates = 0
+        self.late_updates = 0
+        self.connected_at: float = None
+        self.last_message_at: float = None
+
+    def message_age(self) -> Optional[float]:
+        last = self.last_message_at or self.connected_at
+        return time.monotonic() - last if last else None
+
+    def __str__(self):
+        age = self.message_age()
+        result = (
+            f'{"up" if self.connected else "down"}, last message {"-" if age is None else f"{age:.1f}s"} ago, '
+            f'messages {self.messages}, connects {self.connects}, stale {self.stale}, errors {self.errors}'
+        )
+        if self.first_updates or self.late_updates:
+            result += f', first {self.first_updates}, late {self.late_updates}'
+        return result
+
+
+class WebsocketSupervisor(BaseLog):
+    '''Keeps a websocket stream alive.
+
+    Reconnects with jittered exponential backoff when the connection drops or no message
+    (heartbeats included) arrived for `stale_timeout` seconds, and runs `backfill` after
+    every reconnect so state missed while disconnected is fetched over REST. `stale_timeout`
+    may be changed while running, a change wakes up the check.
+    '''
+
+    def __init__(
+            self,
+            name: str,
+            connect: Callable[[], Awaitable[Any]],
+            messages: Callable[[Any], AsyncIterator[Any]],
+            handle: Callable[[Any], Any],
+            backfill: Callable[[], Awaitable[Any]] = None,
+            stale_timeout: Optional[float] = None,
+            backoff_base: float = 1.0,
+            backoff_max: float = 60.0,
+            prefix: str = '',
+    ):
+        self.init_logger(
+            f'{self.__module__}.{self.__class__.__name__}',
+            f'{prefix}[{name}]'
+        )
+        self.name = name
+        self.health = StreamHealth()
+        self.connection = None
+
+        self._connect = connect
+        self._messages = messages
+        self._handle = handle
+        self._backfill = backfill
+        self._stale_timeout = stale_timeout
+        self._stale_timeout_changed: asyncio.Future = None
+        self._backoff_base = backoff_base
+        self._backoff_max = backoff_max
+
+    @property
+    def stale_timeout(self) -> Optional[float]:
+        return self._stale_timeout
+
+    @stale_timeout.setter
+    def stale_timeout(self, value: Optional[float]):
+        self._stale_timeout = value
+        if self._stale_timeout_changed is not None and not self._stale_timeout_changed.done():
+            self._stale_timeout_changed.set_result(None)
+
+    def _backoff(self, attempt: int) -> float:
+        return min(self._backoff_max, self._backoff_base * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+    async def run(self, connection=None):
+        '''Supervises the stream forever, starting from an already open `connection` if given.'''
+        attempt = 0
+        while True:
+            if connection is None:
+                try:
+                    connection = await self._connect()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self.health.errors += 1
+                    delay = self._backoff(attempt)
+                    attempt += 1
+                    await self.log('Unable to connect (%s): %s, retry in %.1fs', type(e).__name__, e, delay)
+                    await asyncio.sleep(delay)
+                    continue
+
+                await self._run_backfill()
+
+            messages_before = self.health.messages
+            try:
+                await self._consume(connection)
+            finally:
+                await self._close(connection)
+            connection = None
+
+            if self.health.messages > messages_before:
+                attempt = 0
+            delay = self._backoff(attempt)
+            attempt += 1
+            await self.log('Reconnecting in %.1fs...', delay)
+            await asyncio.sleep(delay)
+
+    async def _run_backfill(self):
+        if not self._backfill:
+            return
+        try:
+            await self._backfill()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.health.errors += 1
+            await self.log('Backfill error (%s): %s', type(e).__name__, e, level=logging.WARNING)
+        else:
+            self.health.backfills += 1
+
+    async def _consume(self, connection):
+        self.connection = connection
+        self.health.connected = True
+        self.health.connects += 1
+        self.health.connected_at = time.monotonic()
+        self.health.last_message_at = None
+
+        listener = asyncio.ensure_future(self._listen(connection))
+        try:
+            while True:
+                stale_timeout = self._stale_timeout
+                self._stale_timeout_changed = asyncio.get_event_loop().create_future()
+                done, _ = await asyncio.wait(
+                    {listener, self._stale_timeout_changed},
+                    timeout=stale_timeout / 2 if stale_timeout else None,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                if listener in done:
+                    break
+                if self._stale_timeout_changed.done():
+                    continue
+                if stale_timeout and self.health.message_age() > stale_timeout:
+                    self.health.stale += 1
+                    bus.publish(StreamStale(self._prefix, self.health.message_age()))
+                    await self.log(
+                        'No messages for %.1fs, stream is stale', self.health.message_age(),
+                        level=logging.WARNING
+                    )
+                    listener.cancel()
+                    return
+
+            e = listener.exception()
+            if e is None:
+                await self.log('Connection closed')
+            else:
+                self.health.errors += 1
+                await self.log('Connection error (%s): %r', type(e).__name__, e)
+        finally:
+            if not listener.done():
+                listener.cancel()
+            if self._stale_timeout_changed is not None:
+                self._stale_timeout_changed.cancel()
+                self._stale_timeout_changed = None
+            self.health.connected = False
+
+    async def _listen(self, connection):
+        async for msg in self._messages(connection):
+            self.health.messages += 1
+            self.health.last_message_at = time.monotonic()
+            result = self._handle(msg)
+            if asyncio.iscoroutine(result):
+                await result
+
+    async def _close(self, connection):
+        close = getattr(connection, 'close', None)
+        if close is None:
+            return
+        try:
+            await close()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await self.log('Close error (%s): %s', type(e).__name__, e, level=logging.DEBUG)
@@ -1,13 +1,15 @@
 import asyncio
+import logging
 from decimal import Decimal
-from typing import Dict, Any, Set
+from typing import Dict, Any, Optional, Set, Tuple
 
 import ujson
 import websockets
 
 import exchange_libs.aiobinance.client
+import settings
 from common import Balance
-from exchanges.trade.base.account import BaseAccount
+from exchanges.trade.base.account import BaseAccount, BuyOrder
 
 
 class BinanceAccount(BaseAccount):
@@ -17,7 +19,8 @@ class BinanceAccount(BaseAccount):
     async def _init_client(self):
         self.client = exchange_libs.aiobinance.client.Client(
             self._credential.api_key,
-            self._credential.api_secret
+            self._credential.api_secret,
+            api_url=f'{settings.BINANCE_API_URL}/api'
         )
 
     async def _init_balance(self):
@@ -25,6 +28,43 @@ class BinanceAccount(BaseAccount):
         for symbol, balance in self._parse_account_balances(account, False).items():
             await self.update_balance(symbol, balance)
 
+    async def _init_account_ws(self):
+        streams = self.trade_exchange.streams
+        if not streams:
+            return await super()._init_account_ws()
+
+        self._listen_key = await self.client.create_listen_key()
+        streams.add_listen_key(self.client, self._listen_key)
+        self.account_ws = await streams.subscribe(
+            self._listen_key,
+            self._process_account_update,
+            backfill=self._init_balance,
+            stale_timeout=self.ACCOUNT_WS_STALE_TIMEOUT,
+        )
+        await self.log('account stream added to shared connection %s', self.account_ws.name)
+
+    async def close(self):
+        streams = self.trade_exchange.streams
+        if streams:
+            streams.remove_listen_key(self._listen_key)
+            await streams.unsubscribe(self._listen_key)
+        elif self.keepalive_task:
+            self.keepalive_task.cancel()
+        try:
+            await self.client.close_listen_key(self._listen_key)
+        except Exception as e:
+            await self.log('Unable to close listen key (%s): %s', type(e).__name__, e, level=logging.WARNING)
+        await super().close()
+
+    async def _close_client(self):
+        await self.client.close_session()
+
+    async def _renew_listen_key(self):
+        streams = self.trade_exchange.streams
+        streams.remove_listen_key(self._listen_key)
+        await streams.unsubscribe(self._listen_key)
+        await self._init_account_ws()
+
     async def _prepare_ws_account_updates(self):
         await self._init_listen_key()
 
@@ -47,26 +87,11 @@ class BinanceAccount(BaseAccount):
             await self.log('Listen key keepalive result: %s', result)
 
     async def _create_account_ws_connection(self):
-        while True:
-            try:
-                connection = await websockets.connect(f'wss://stream.binance.com:9443/ws/{self._listen_key}')
-            except Exception as e:
-                await self.log('Unable to create ws connection (%s): %s', type(e).__name__, e)
-            else:
-                self._ws_account = connection
-                return
-
-    async def _ws_account_update_task(self):
-        while True:
-            try:
-                async for msg in self._ws_account:
-                    await self._process_account_update(ujson.loads(msg))
-            except websockets.exceptions.ConnectionClosed as e:
-                await self.log('Account websockets connection closed: %r, restarting...', e)
-            except Exception as e:
-                await self.log('Account websockets unknown error: %r', e)
-            await self._prepare_ws_account_updates()
-            await self._create_account_ws_connection()
+        return await websockets.connect(f'{settings.BINANCE_WS_URL}/ws/{self._listen_key}')
+
+    async def _account_ws_messages(self, connection):
+        async for msg in connection:
+            yield ujson.loads(msg)
 
     async def _process_account_update(self, data: Dict):
         event = data.get('e')
@@ -75,6 +100,9 @@ class BinanceAccount(BaseAccount):
             await self._process_balance_update(data)
         elif event == 'executionReport':
             await self._process_order_update(data)
+        elif event == 'listenKeyExpired' and self.trade_exchange.streams:
+            await self.log('listen key expired, renewing')
+            await self._renew_listen_key()
 
     async def _process_balance_update(self, data: Dict[str, Any]):
         for symbol, balance in self._parse_account_balances(data, True).items():
@@ -83,7 +111,7 @@ class BinanceAccount(BaseAccount):
     async def _process_order_update(self, data: Dict):
         await self.log('order report: %s', data)
         if data['X'] == 'FILLED':
-            await self.log('order report: %s', self._format_order(data), send_tg=True, silent=True)
+            self.report_filled(data)
 
     @staticmethod
     def _parse_account_balances(account, ws=False) -> Dict[str, Balance]:
@@ -110,17 +138,13 @@ class BinanceAccount(BaseAccount):
             total=Decimal(order['Z'])
         )
 
-    async def create_buy_order(self, symbol: str, qty: int, quote_amount_to_buy: Decimal = None):
-        price = self.trade_exchange.tickers[symbol].price
-        markup = self.trade_exchange.limit_order_markup_percent
-        purchase_price = price / 100 * (100 + markup)
-        await self.log('purchase price %s', purchase_price)
+    def _prepare_buy_order(self, symbol: str, qty: int, quote_amount_to_buy: Decimal = None):
+        purchase_price = self.trade_exchange.limit_price(symbol, quote_amount_to_buy).quantize(Decimal('.000000'))
 
-        order_result = await self.client.order_limit_buy(
-            symbol,
-            str(qty),
-            purchase_price.quantize(Decimal('.000000')),
-        )
+        return purchase_price, self.client.prepare_order_limit_buy(symbol, str(qty), purchase_price)
+
+    async def _send_buy_order(self, order: BuyOrder) -> str:
+        order_result = await self.client.send_prepared(order.request)
 
         order_id = order_result['orderId']
         return order_id
@@ -128,6 +152,12 @@ class BinanceAccount(BaseAccount):
     async def cancel_order(self, order_id: str, symbol: str = None):
         return await self.client.cancel_order(symbol, order_id)
 
+    async def cancel_orders(self, orders: Set[Tuple[str, Optional[str]]]) -> int:
+        # one request per symbol cancels all its open orders
+        symbols = sorted({symbol for _, symbol in orders})
+        results = await self._gather_bounded(self.client.cancel_open_orders(symbol) for symbol in symbols)
+        return sum(len(r) for r in results if not isinstance(r, Exception))
+
     async def get_open_orders_id(self) -> Set[str]:
         orders = await self.client.get_open_orders()
         return {
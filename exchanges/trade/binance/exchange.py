@@ -1,15 +1,29 @@
+import functools
 import ujson
 from decimal import Decimal
-from typing import Dict, Set
+from typing import Dict, Iterable, Optional, Set, Tuple
 
 import websockets
 
+import settings
 from common import NTCredential
 from exchanges.trade.base.exchange import BaseTradeExchange, SymbolTicker
+from exchanges.trade.base.orderbook import OrderBook
+from exchanges.trade.base.ws import WebsocketSupervisor
 from exchanges.trade.binance.account import BinanceAccount
+from exchanges.trade.binance.stream import BinanceStreamMux
 
 
 class BinanceTradeExchange(BaseTradeExchange):
+    DEPTH_STREAM = True
+
+    streams: BinanceStreamMux = None
+
+    def __init__(self):
+        super().__init__()
+        if settings.BINANCE_STREAM_MUX:
+            self.streams = BinanceStreamMux(prefix=f'[{self.name}]')
+
     async def init_price_filters(self):
         return
 
@@ -41,36 +55,80 @@ class BinanceTradeExchange(BaseTradeExchange):
             for data in await self.ticker_24h()
         }
 
+    async def _init_ticker_stream(self, stream: int) -> WebsocketSupervisor:
+        # standby ticker streams keep their own sockets, they exist to not share failures
+        if not self.streams or stream:
+            return await super()._init_ticker_stream(stream)
+        return await self.streams.subscribe(
+            '!ticker@arr',
+            functools.partial(self._process_ticker_update, stream=stream),
+            backfill=functools.partial(self._backfill_tickers, stream),
+            stale_timeout=self.TICKER_WS_STALE_TIMEOUT,
+        )
+
     async def _create_ticker_ws_connection(self):
-        self._ws_tickers = await websockets.connect('wss://stream.binance.com:9443/ws/!ticker@arr')
-
-    async def _ws_ticker_update_task(self):
-        while True:
-            try:
-                async for msg in self._ws_tickers:
-                    self._process_ticker_update(ujson.loads(msg))
-            except websockets.exceptions.ConnectionClosed as e:
-                await self.log('Ticker websockets connection closed: %r, restarting...', e)
-            except Exception as e:
-                await self.log('Ticker websockets unknown error: %r', e)
-            await self._create_ticker_ws_connection()
-
-    def _process_ticker_update(self, data: Dict):
+        return await websockets.connect(f'{settings.BINANCE_WS_URL}/ws/!ticker@arr')
+
+    async def _ticker_ws_messages(self, connection):
+        async for msg in connection:
+            yield ujson.loads(msg)
+
+    def _process_ticker_update(self, data: Dict, stream: int = 0):
         for ticker in data:
-            self._process_ticker(ticker)
+            self._process_ticker(ticker, ticker['E'], stream)
+
+    def _process_ticker(self, data: Dict, event_ts: int = None, stream: int = 0):
+        self._set_ticker(
+            data['s'],
+            SymbolTicker(
+                Decimal(data['P']),
+                Decimal(data['a'])
+            ),
+            event_ts,
+            stream
+        )
 
-    def _process_ticker(self, data: Dict):
-        symbol = data['s']
-        self.tickers[symbol] = SymbolTicker(
+    async def _fetch_ticker(self, pair: str) -> Optional[SymbolTicker]:
+        data = await self.http.get(f'{settings.BINANCE_API_URL}/api/v1/ticker/24hr?symbol={pair}')
+        return SymbolTicker(
+            Decimal(data['priceChangePercent']),
+            Decimal(data['askPrice'])
+        )
+
+    async def _stream_ticker(self, pair: str) -> Optional[SymbolTicker]:
+        async with websockets.connect(f'{settings.BINANCE_WS_URL}/ws/{pair.lower()}@ticker') as connection:
+            data = ujson.loads(await connection.recv())
+        return SymbolTicker(
             Decimal(data['P']),
             Decimal(data['a'])
         )
 
+    async def _create_depth_ws_connection(self, pair: str):
+        return await websockets.connect(f'{settings.BINANCE_WS_URL}/ws/{pair.lower()}@depth@100ms')
+
+    async def _depth_ws_messages(self, connection):
+        async for msg in connection:
+            yield ujson.loads(msg)
+
+    def _process_depth_update(self, book: OrderBook, data: Dict):
+        book.apply_diff(data['b'], data['a'], data['U'], data['u'])
+
+    async def _init_depth(self, book: OrderBook):
+        snapshot = await self.http.get(f'{settings.BINANCE_API_URL}/api/v1/depth?symbol={book.pair}&limit=1000')
+        book.load_snapshot(snapshot['bids'], snapshot['asks'], snapshot['lastUpdateId'])
+
     async def ticker_24h(self) -> Dict:
-        return await self.http.get('https://api.binance.com/api/v1/ticker/24hr')
+        return await self.http.get(f'{settings.BINANCE_API_URL}/api/v1/ticker/24hr')
+
+    async def _load_markets(self) -> Iterable[Tuple[str, str, str, bool]]:
+        # not trading symbols are kept, a listing shows up before its trading starts
+        return [
+            (i['baseAsset'], i['quoteAsset'], i['symbol'], i['status'] == 'TRADING')
+            for i in (await self.exchange_info())['symbols']
+        ]
 
     async def exchange_info(self) -> Dict:
-        return await self.http.get('https://api.binance.com/api/v1/exchangeInfo')
+        return await self.http.get(f'{settings.BINANCE_API_URL}/api/v1/exchangeInfo')
 
     @staticmethod
     def make_pair(base, quote):
@@ -0,0 +1,201 @@
+import asyncio
+import itertools
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Set
+
+import ujson
+import websockets
+
+import settings
+from exchanges.trade.base.ws import WebsocketSupervisor
+from log import BaseLog
+
+
+class StreamRoute(NamedTuple):
+    handle: Callable[[Any], Any]
+    backfill: Optional[Callable[[], Awaitable[Any]]] = None
+    stale_timeout: Optional[float] = None
+
+
+class MuxConnection:
+    '''One combined-stream socket: its streams, the open websocket and the supervisor keeping it up.'''
+
+    def __init__(self, number: int):
+        self.number = number
+        self.routes: Dict[str, StreamRoute] = {}
+        self.subscribed: Set[str] = set()
+        # streams the previous socket carried, only those may have missed messages
+        self.resubscribed: Set[str] = set()
+        self.websocket = None
+        self.supervisor: WebsocketSupervisor = None
+        self.task: asyncio.Task = None
+
+    def stale_timeout(self) -> Optional[float]:
+        '''The shortest stale timeout of the routes, None when none of them sends regularly.'''
+        timeouts = [r.stale_timeout for r in self.routes.values() if r.stale_timeout]
+        return min(timeouts) if timeouts else None
+
+
+class BinanceStreamMux(BaseLog):
+    '''Carries market streams and account listen keys of all accounts over few combined-stream sockets.
+
+    Messages are routed to handlers by stream name. Streams added while a socket is open are
+    subscribed on the fly, on reconnect the socket url lists every stream again and the
+    routes the previous socket carried are backfilled. A socket is stale after the shortest
+    stale timeout of its routes, so sockets of listen keys only may stay silent.
+    Listen keys are kept alive together by one task.
+    '''
+    MAX_STREAMS_PER_CONNECTION = 200
+    LISTEN_KEY_KEEPALIVE_INTERVAL = 60 * 5
+
+    def __init__(self, prefix: str = ''):
+        self.init_logger(
+            f'{self.__module__}.{self.__class__.__name__}',
+            f'{prefix}[mux]'
+        )
+        self._prefix = prefix
+        self.URL = f'{settings.BINANCE_WS_URL}/stream?streams='
+        self._connections: List[MuxConnection] = []
+        self._request_ids = itertools.count(1)
+        self._listen_keys: Dict[str, Any] = {}
+        self._keepalive_task: asyncio.Task = None
+
+    @property
+    def connections(self) -> List[MuxConnection]:
+        return list(self._connections)
+
+    async def subscribe(self, stream: str, handle: Callable[[Any], Any],
+                        backfill: Callable[[], Awaitable[Any]] = None,
+                        stale_timeout: float = None) -> WebsocketSupervisor:
+        '''Routes `stream` messages to `handle`, returns supervisor of the socket carrying it.
+
+        The first stream of a socket opens it and raises if that fails, like an own socket
+        would. `backfill` runs when the stream reconnects, not on the first connect: the
+        caller has just initialized its state. `stale_timeout` is how long the stream may
+        stay silent.
+        '''
+        conn = self._find_connection(stream)
+        conn.routes[stream] = StreamRoute(handle, backfill, stale_timeout)
+
+        if conn.supervisor is None:
+            conn.supervisor = WebsocketSupervisor(
+                f'streams#{conn.number}',
+                lambda: self._connect(conn),
+                self._messages,
+                lambda msg: self._route(conn, msg),
+                backfill=lambda: self._backfill(conn),
+                stale_timeout=conn.stale_timeout(),
+                prefix=self._prefix,
+            )
+            try:
+                websocket = await self._connect(conn)
+            except Exception:
+                conn.routes.pop(stream, None)
+                if conn.routes:
+                    # streams added while connecting keep retrying
+                    conn.task = asyncio.ensure_future(conn.supervisor.run())
+                else:
+                    conn.supervisor = None
+                raise
+            conn.task = asyncio.ensure_future(conn.supervisor.run(websocket))
+        else:
+            conn.supervisor.stale_timeout = conn.stale_timeout()
+            if conn.websocket is not None and stream not in conn.subscribed:
+                await self._send_subscription(conn, 'SUBSCRIBE', [stream])
+
+        return conn.supervisor
+
+    async def close(self):
+        tasks = [c.task for c in self._connections] + [self._keepalive_task]
+        for task in tasks:
+            if task:
+                task.cancel()
+        await asyncio.gather(*[t for t in tasks if t], return_exceptions=True)
+
+    async def unsubscribe(self, stream: str):
+        for conn in self._connections:
+            if conn.routes.pop(stream, None) is None:
+                continue
+            conn.supervisor.stale_timeout = conn.stale_timeout()
+            if conn.websocket is not None and stream in conn.subscribed:
+                await self._send_subscription(conn, 'UNSUBSCRIBE', [stream])
+
+    def _find_connection(self, stream: str) -> MuxConnection:
+        for conn in self._connections:
+            if stream in conn.routes:
+                return conn
+        for conn in self._connections:
+            if len(conn.routes) < self.MAX_STREAMS_PER_CONNECTION:
+                return conn
+        conn = MuxConnection(len(self._connections))
+        self._connections.append(conn)
+        return conn
+
+    async def _connect(self, conn: MuxConnection):
+        conn.websocket = None
+        streams = list(conn.routes)
+        websocket = await websockets.connect(self.URL + '/'.join(streams))
+        conn.resubscribed = conn.subscribed.intersection(streams)
+        conn.subscribed = set(streams)
+        conn.websocket = websocket
+
+        # streams added while connecting
+        missed = [s for s in conn.routes if s not in conn.subscribed]
+        if missed:
+            await self._send_subscription(conn, 'SUBSCRIBE', missed)
+        return websocket
+
+    async def _send_subscription(self, conn: MuxConnection, method: str, streams: List[str]):
+        await conn.websocket.send(
+            ujson.dumps({'method': method, 'params': streams, 'id': next(self._request_ids)})
+        )
+        if method == 'SUBSCRIBE':
+            conn.subscribed.update(streams)
+        else:
+            conn.subscribed.difference_update(streams)
+
+    @staticmethod
+    async def _messages(connection):
+        async for msg in connection:
+            yield ujson.loads(msg)
+
+    def _route(self, conn: MuxConnection, msg: Dict):
+        route = conn.routes.get(msg.get('stream'))
+        if route is None:
+            # subscription replies and messages of just removed streams
+            return None
+        return route.handle(msg['data'])
+
+    async def _backfill(self, conn: MuxConnection):
+        backfills = [
+            r.backfill() for s, r in conn.routes.items() if r.backfill and s in conn.resubscribed
+        ]
+        results = await asyncio.gather(*backfills, return_exceptions=True)
+        errors = [r for r in results if isinstance(r, Exception)]
+        if errors:
+            raise errors[0]
+
+    def add_listen_key(self, client, listen_key: str):
+        '''Keeps `listen_key` of `client` alive together with the other keys.'''
+        self._listen_keys[listen_key] = client
+        if self._keepalive_task is None:
+            self._keepalive_task = asyncio.ensure_future(self._listen_keys_keepalive())
+
+    def remove_listen_key(self, listen_key: str):
+        self._listen_keys.pop(listen_key, None)
+
+    async def _listen_keys_keepalive(self):
+        while True:
+            await asyncio.sleep(self.LISTEN_KEY_KEEPALIVE_INTERVAL)
+            keys = list(self._listen_keys.items())
+            results = await asyncio.gather(
+                *[client.keepalive_listen_key(key) for key, client in keys],
+                return_exceptions=True
+            )
+            failed = [(key, r) for (key, _), r in zip(keys, results) if isinstance(r, Exception)]
+            await self.log('Listen keys keepalive: %d ok, %d failed', len(keys) - len(failed), len(failed))
+            for key, e in failed:
+                await self.log(
+                    'Listen key %s... keepalive error (%s): %s', key[:8], type(e).__name__, e,
+                    level=logging.WARNING
+                )
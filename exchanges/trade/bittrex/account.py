@@ -4,7 +4,7 @@ from typing import Dict, Set
 import aiobittrex
 
 from common import Balance
-from exchanges.trade.base.account import BaseAccount
+from exchanges.trade.base.account import BaseAccount, BuyOrder
 from exchanges.trade.base.exchange import BaseTradeExchange
 
 
@@ -32,16 +32,10 @@ class BittrexAccount(BaseAccount):
             self._credential.api_key,
             self._credential.api_secret,
         )
-        self._ws_account = await self._ws_client.create_ws()
+        return await self._ws_client.create_ws()
 
-    async def _ws_account_update_task(self):
-        while True:
-            try:
-                async for msg in self._ws_client.listen_account(ws=self._ws_account):
-                    await self._process_account_update(msg)
-            except Exception as e:
-                await self.log('Account websockets unknown error: %r', e)
-            await self._create_account_ws_connection()
+    def _account_ws_messages(self, connection):
+        return self._ws_client.listen_account(ws=connection)
 
     async def _process_account_update(self, data):
         if 'delta' in data and 'balance' in data['delta'] and 'available' in data['delta']:
@@ -73,7 +67,7 @@ class BittrexAccount(BaseAccount):
     async def _process_order_update(self, data: Dict):
         await self.log('order report: %s', data['order'])
         if data['order']['closed'] and not data['order']['cancel_initiated']:
-            await self.log('order report: %s', self._format_order(data['order']), send_tg=True, silent=True)
+            self.report_filled(data['order'])
 
     @staticmethod
     def _parse_account_balances(balances) -> Dict[str, Balance]:
@@ -95,19 +89,24 @@ class BittrexAccount(BaseAccount):
             total=Decimal(order['price'])
         )
 
-    async def create_buy_order(self, symbol: str, qty: int, quote_amount_to_buy: Decimal = None):
-        price = self.trade_exchange.tickers[symbol].price
-        markup = self.trade_exchange.limit_order_markup_percent
-        purchase_price = price / 100 * (100 + markup)
-        await self.log('purchase price %s', purchase_price)
+    def _prepare_buy_order(self, symbol: str, qty: int, quote_amount_to_buy: Decimal = None):
+        purchase_price = self.trade_exchange.limit_price(symbol, quote_amount_to_buy)
+
+        # aiobittrex signs requests itself on send
+        return purchase_price.quantize(Decimal('.000000')), None
+
+    async def _send_buy_order(self, order: BuyOrder) -> str:
         order_result = await self.client.buy_limit(
-            symbol,
-            qty,
-            purchase_price.quantize(Decimal('.000000')),
+            order.pair,
+            order.qty,
+            order.price,
         )
         order_id = order_result['uuid']
         return order_id
 
+    async def _close_client(self):
+        await self.client.close()
+
     async def cancel_order(self, order_id: str, symbol: str = None):
         return await self.client.cancel_order(order_id)
 
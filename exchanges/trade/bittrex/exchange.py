@@ -1,14 +1,23 @@
+import time
 from decimal import Decimal
-from typing import Dict, Set
+from typing import Dict, Iterable, Optional, Set, Tuple
 
 import aiobittrex
 
 from common import NTCredential
-from exchanges.trade.base.exchange import BaseTradeExchange, SymbolTicker
+from exchanges.trade.base.exchange import BaseTradeExchange, RawSymbolTicker, SymbolTicker
 from exchanges.trade.bittrex.account import BittrexAccount
 
 
 class BittrexTradeExchange(BaseTradeExchange):
+    TICKER_WS_STALE_TIMEOUT = 60
+    INCORRECT_TICKERS_LOG_INTERVAL = 60  # seconds
+
+    _incorrect_tickers = 0
+    _incorrect_tickers_total = 0
+    _incorrect_logged_at = 0.0
+    _last_incorrect_ticker: Dict = None
+
     async def init_price_filters(self):
         return
 
@@ -42,31 +51,40 @@ class BittrexTradeExchange(BaseTradeExchange):
 
     async def _create_ticker_ws_connection(self):
         self._ws_client = aiobittrex.BittrexSocket()
-        self._ws_tickers = await self._ws_client.create_ws()
-
-    async def _ws_ticker_update_task(self):
-        while True:
-            try:
-                async for msg in self._ws_client.listen_summary(ws=self._ws_tickers):
-                    await self._process_ticker_update(msg)
-            except Exception as e:
-                await self.log('Ticker websockets unknown error: %r', e)
-            await self._create_ticker_ws_connection()
-
-    async def _process_ticker_update(self, data: Dict):
-        tickers = data['deltas']
-        for t in tickers:
-            await self._process_ticker(t)
-
-    async def _process_ticker(self, data: Dict):
-        if data['ask'] and data['prev_day']:
-            symbol = data['market_name']
-            self.tickers[symbol] = SymbolTicker(
-                self.calc_price_change_percent(data['ask'], data['prev_day']),
-                Decimal(str(data['ask']))
+        return await self._ws_client.create_ws()
+
+    def _ticker_ws_messages(self, connection):
+        return self._ws_client.listen_summary(ws=connection)
+
+    async def _process_ticker_update(self, data: Dict, stream: int = 0):
+        event_ts = data.get('nonce')
+        process_ticker = self._process_ticker
+        for t in data['deltas']:
+            if not process_ticker(t, event_ts, stream):
+                self._incorrect_tickers += 1
+                self._last_incorrect_ticker = t
+
+        now = time.monotonic()
+        if self._incorrect_tickers and now - self._incorrect_logged_at >= self.INCORRECT_TICKERS_LOG_INTERVAL:
+            await self.log(
+                '%d incorrect tickers since last report, last one: %s',
+                self._incorrect_tickers, self._last_incorrect_ticker
             )
-        else:
-            await self.log('incorrect ticker: %s', data)
+            self._incorrect_tickers_total += self._incorrect_tickers
+            self._incorrect_tickers = 0
+            self._incorrect_logged_at = now
+
+    def _process_ticker(self, data: Dict, event_ts: int = None, stream: int = 0) -> bool:
+        ask, prev_day = data['ask'], data['prev_day']
+        if not ask or not prev_day:
+            return False
+        # Decimal price and change percent are only computed when the ticker is read
+        self._set_ticker(data['market_name'], RawSymbolTicker(ask, prev_day), event_ts, stream)
+        return True
+
+    @property
+    def incorrect_tickers(self) -> int:
+        return self._incorrect_tickers_total + self._incorrect_tickers
 
     @staticmethod
     def calc_price_change_percent(ask: float, prev_day: float):
@@ -77,6 +95,22 @@ class BittrexTradeExchange(BaseTradeExchange):
     async def ticker_24h(self) -> Dict:
         return await self.http.get('https://bittrex.com/api/v1.1/public/getmarketsummaries')
 
+    async def _fetch_ticker(self, pair: str) -> Optional[SymbolTicker]:
+        response = await self.http.get(f'https://bittrex.com/api/v1.1/public/getmarketsummary?market={pair}')
+        if not response['success'] or not response['result']:
+            return None
+        data = response['result'][0]
+        return SymbolTicker(
+            self.calc_price_change_percent(data['Ask'], data['PrevDay']) if data['PrevDay'] else Decimal(0),
+            Decimal(str(data['Ask']))
+        )
+
+    async def _load_markets(self) -> Iterable[Tuple[str, str, str, bool]]:
+        return [
+            (i['MarketCurrency'], i['BaseCurrency'], i['MarketName'], i['IsActive'])
+            for i in (await self.get_markets())['result']
+        ]
+
     async def get_markets(self) -> Dict:
         return await self.http.get('https://bittrex.com/api/v1.1/public/getmarkets')
 
@@ -1,30 +1,38 @@
 import asyncio
 import base64
-import gzip
 import hashlib
 import hmac
 from collections import OrderedDict, defaultdict
 from datetime import datetime
 from decimal import Decimal
-from typing import Dict, Any, Set
+from typing import Dict, Any, Optional, Set, Tuple
 from urllib.parse import urlparse, urlencode
 
 import ujson
 import websockets
 
 import exchange_libs.aiohuobi.client
+import settings
 from common import Balance
-from exchanges.trade.base.account import BaseAccount
+from exchanges.trade.base.account import BaseAccount, BuyOrder
+from exchanges.trade.huobi.stream import decoder
 
 
 class HuobiAccount(BaseAccount):
+    ACCOUNT_WS_STALE_TIMEOUT = 120  # server pings every 30 seconds
+    BATCH_CANCEL_SIZE = 50
+
     client: exchange_libs.aiohuobi.client.Client
-    _WS_ACCOUNT_URL = 'wss://api.huobi.pro/ws/v1'
+
+    @property
+    def _ws_account_url(self) -> str:
+        return f'{settings.HUOBI_WS_URL}/ws/v1'
 
     async def _init_client(self):
         self.client = exchange_libs.aiohuobi.client.Client(
             self._credential.api_key,
-            self._credential.api_secret
+            self._credential.api_secret,
+            api_url=settings.HUOBI_API_URL
         )
 
     async def _init_balance(self):
@@ -38,31 +46,28 @@ class HuobiAccount(BaseAccount):
         return
 
     async def _create_account_ws_connection(self):
-        self._ws_account = await websockets.connect(self._WS_ACCOUNT_URL)
-
-    async def _ws_account_update_task(self):
-        while True:
-            await self.auth_ws()
-            await self.ws_subscribe('accounts')
-            await self.ws_subscribe('orders.*')
-            try:
-                async for msg in self._ws_account:
-                    await self._process_account_update(self.decode_ws_payload(msg))
-            except websockets.exceptions.ConnectionClosed as e:
-                await self.log('Account websockets connection closed: %r, restarting...', e)
-            except Exception as e:
-                await self.log('Account websockets unknown error: %r', e)
-            await self._create_account_ws_connection()
+        self._ws_account = await websockets.connect(self._ws_account_url)
+        await self.auth_ws()
+        await self.ws_subscribe('accounts')
+        await self.ws_subscribe('orders.*')
+        return self._ws_account
+
+    async def _account_ws_messages(self, connection):
+        async for msg in connection:
+            data = await decoder.decode_async(msg)
+            if data.get('op') == 'ping':
+                await connection.send(
+                    self.encode_ws_payload(
+                        {
+                            'op': 'pong',
+                            'ts': data['ts']
+                        }
+                    )
+                )
+            yield data
 
     async def _process_account_update(self, data: Dict):
         if 'op' in data and data['op'] == 'ping':
-            msg = self.encode_ws_payload(
-                {
-                    'op': 'pong',
-                    'ts': data['ts']
-                }
-            )
-            await self._ws_account.send(msg)
             return
 
         if 'op' in data and data['op'] == 'sub':
@@ -83,7 +88,7 @@ class HuobiAccount(BaseAccount):
     async def _process_order_update(self, data: Dict):
         await self.log('order report: %s', data)
         if data['data']['order-state'] == 'filled':
-            await self.log('order report: %s', self._format_order(data), send_tg=True, silent=True)
+            self.report_filled(data)
 
     @staticmethod
     def _parse_account_balances(balances) -> Dict[str, Decimal]:
@@ -109,7 +114,7 @@ class HuobiAccount(BaseAccount):
                 continue
             cur = i['currency'].upper()
             typ = i['type'].lower()
-            i[cur][typ] = Decimal(i['balance'])
+            result[cur][typ] = Decimal(i['balance'])
 
         return {
             currency: Balance(
@@ -129,46 +134,57 @@ class HuobiAccount(BaseAccount):
             total=Decimal(data['order-amount']) * Decimal(data['price'])
         )
 
-    async def create_buy_order(self, symbol: str, qty: int, quote_amount_to_buy: Decimal = None):
-        price = self.trade_exchange.tickers[symbol].price
-        markup = self.trade_exchange.limit_order_markup_percent
-        purchase_price = price / 100 * (100 + markup)
+    def _prepare_buy_order(self, symbol: str, qty: int, quote_amount_to_buy: Decimal = None):
+        purchase_price = self.trade_exchange.limit_price(symbol, quote_amount_to_buy)
 
         price_filters = self.trade_exchange.price_filters[symbol]
 
         price_precision = price_filters['price_precision']
         amount_precision = price_filters['amount_precision']
 
-        await self.log('purchase price %s', purchase_price)
         if price_precision == 0:
             purchase_price = purchase_price.to_integral()
         else:
             purchase_price = purchase_price.quantize(Decimal('.' + '0' * price_precision))
-        await self.log('normalized purchase price %s', purchase_price)
 
-        await self.log('amount %s', quote_amount_to_buy)
         if amount_precision == 0:
             quote_amount_to_buy = quote_amount_to_buy.to_integral()
         else:
             quote_amount_to_buy = quote_amount_to_buy.quantize(Decimal('.' + '0' * amount_precision))
-        await self.log('normalized amount %s', quote_amount_to_buy)
 
-        order_result = await self.client.buy_limit_order(
+        return purchase_price, self.client.prepare_buy_limit_order(
             self.account_id,
             quote_amount_to_buy,
             symbol.lower(),
             purchase_price
         )
 
+    async def _send_buy_order(self, order: BuyOrder) -> str:
+        order_result = await self.client.send_prepared(order.request)
+
         order_id = order_result['data']
         return order_id
 
     async def cancel_order(self, order_id: str, symbol: str = None):
         return await self.client.cancel_order(order_id)
 
+    async def _close_client(self):
+        await self.client.close_session()
+
+    async def cancel_orders(self, orders: Set[Tuple[str, Optional[str]]]) -> int:
+        order_ids = sorted(order_id for order_id, _ in orders)
+        results = await self._gather_bounded(
+            self.client.batch_cancel_orders(order_ids[i:i + self.BATCH_CANCEL_SIZE])
+            for i in range(0, len(order_ids), self.BATCH_CANCEL_SIZE)
+        )
+        for r in results:
+            if not isinstance(r, Exception) and r['data']['failed']:
+                await self.log('batch cancel failures: %s', r['data']['failed'])
+        return sum(len(r['data']['success']) for r in results if not isinstance(r, Exception))
+
     @staticmethod
     def decode_ws_payload(data):
-        return ujson.loads(gzip.decompress(data).decode('utf-8'))
+        return decoder.decode(data)
 
     @staticmethod
     def encode_ws_payload(data):
@@ -199,7 +215,7 @@ class HuobiAccount(BaseAccount):
         await asyncio.sleep(1)
 
     def generate_signature(self, params):
-        parsed_url = urlparse(self._WS_ACCOUNT_URL)
+        parsed_url = urlparse(self._ws_account_url)
 
         method, host, path = 'GET', parsed_url.netloc, parsed_url.path
 
@@ -1,19 +1,24 @@
 import asyncio
-import gzip
+import logging
 import ujson
 from decimal import Decimal
-from typing import Dict, Set
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 
 import websockets
 
+import settings
 from common import NTCredential
 from exchanges.trade.base.exchange import BaseTradeExchange, SymbolTicker
+from exchanges.trade.base.orderbook import OrderBook
 from exchanges.trade.huobi.account import HuobiAccount
+from exchanges.trade.huobi.stream import decoder
 
 
 class HuobiTradeExchange(BaseTradeExchange):
+    DEPTH_STREAM = True
+
     async def init_price_filters(self):
-        response = await self.http.get('https://api.huobi.pro/v1/common/symbols')
+        response = await self.http.get(f'{settings.HUOBI_API_URL}/v1/common/symbols')
         data = response['data']
         for i in data:
             s = i['symbol'].upper()
@@ -25,7 +30,7 @@ class HuobiTradeExchange(BaseTradeExchange):
     async def price_filters_update_task(self):
         while True:
             await asyncio.sleep(60 * 60)
-            response = await self.http.get('https://api.huobi.pro/v1/common/symbols')
+            response = await self.http.get(f'{settings.HUOBI_API_URL}/v1/common/symbols')
             data = response['data']
             for i in data:
                 s = i['symbol'].upper()
@@ -34,6 +39,22 @@ class HuobiTradeExchange(BaseTradeExchange):
                     'amount_precision': i['amount-precision'],
                 }
 
+    async def _prepare_new_pairs(self, pairs: List[str]):
+        # price filters refresh hourly, a pair listed since then has none
+        if all(p in self.price_filters for p in pairs):
+            return
+        try:
+            await self.init_price_filters()
+        except Exception as e:
+            await self.log('Unable to refresh price filters (%s): %s', type(e).__name__, e, level=logging.WARNING)
+
+    async def _load_markets(self) -> Iterable[Tuple[str, str, str, bool]]:
+        response = await self.http.get(f'{settings.HUOBI_API_URL}/v1/common/symbols')
+        return [
+            (i['base-currency'], i['quote-currency'], i['symbol'].upper(), i.get('state', 'online') == 'online')
+            for i in response['data']
+        ]
+
     @property
     def name(self) -> str:
         return 'huobi'
@@ -67,54 +88,81 @@ class HuobiTradeExchange(BaseTradeExchange):
         }
 
     async def _create_ticker_ws_connection(self):
-        self._ws_tickers = await websockets.connect('wss://api.huobi.pro/ws')
-        await self._ws_tickers.send(
+        connection = await websockets.connect(f'{settings.HUOBI_WS_URL}/ws')
+        await connection.send(
             self.encode_ws_payload(
                 {
                     'sub': 'market.tickers',
                 }
             )
         )
-
-    async def _ws_ticker_update_task(self):
-        while True:
-            try:
-                async for msg in self._ws_tickers:
-                    await self._process_ticker_update(self.decode_ws_payload(msg))
-            except websockets.exceptions.ConnectionClosed as e:
-                await self.log('Ticker websockets connection closed: %r, restarting...', e)
-            except Exception as e:
-                await self.log('Ticker websockets unknown error: %r', e)
-            await self._create_ticker_ws_connection()
-
-    async def _process_ticker_update(self, data: Dict):
-        if 'ping' in data:
-            await self._ws_tickers.send(
-                self.encode_ws_payload(
-                    {'pong': data['ping']}
+        return connection
+
+    async def _ticker_ws_messages(self, connection):
+        async for msg in connection:
+            data = await decoder.decode_async(msg)
+            if 'ping' in data:
+                await connection.send(
+                    self.encode_ws_payload(
+                        {'pong': data['ping']}
+                    )
                 )
-            )
-            return
+            yield data
 
+    async def _process_ticker_update(self, data: Dict, stream: int = 0):
         if 'subbed' in data:
             await self.log('%s subscription status: %s', data['subbed'], data['status'])
             return
 
         if 'ch' in data and data['ch'] == 'market.tickers':
+            event_ts = data.get('ts')
             for ticker in data['data']:
-                self._process_ticker(ticker)
-
-    def _process_ticker(self, data: Dict):
-        if not data['open'] or not data['close']:
-            return
-        symbol = data['symbol'].upper()
-        self.tickers[symbol] = SymbolTicker(
-            self.calc_price_change_percent(data['close'], data['open']),
-            Decimal(str(data['close']))
+                self._process_ticker(ticker, event_ts, stream)
+
+    def _process_ticker(self, data: Dict, event_ts: int = None, stream: int = 0):
+        ticker = self._make_ticker(data)
+        if ticker:
+            self._set_ticker(data['symbol'].upper(), ticker, event_ts, stream)
+
+    async def _fetch_ticker(self, pair: str) -> Optional[SymbolTicker]:
+        response = await self.http.get(f'{settings.HUOBI_API_URL}/market/detail/merged?symbol={pair.lower()}')
+        if response.get('status') != 'ok':
+            return None
+        return self._make_ticker(response['tick'])
+
+    async def _stream_ticker(self, pair: str) -> Optional[SymbolTicker]:
+        channel = f'market.{pair.lower()}.detail'
+        async with websockets.connect(f'{settings.HUOBI_WS_URL}/ws') as connection:
+            await connection.send(self.encode_ws_payload({'sub': channel}))
+            async for msg in connection:
+                data = await decoder.decode_async(msg)
+                if 'ping' in data:
+                    await connection.send(self.encode_ws_payload({'pong': data['ping']}))
+                elif data.get('status') == 'error':
+                    return None
+                elif data.get('ch') == channel:
+                    return self._make_ticker(data['tick'])
+
+    async def _create_depth_ws_connection(self, pair: str):
+        connection = await websockets.connect(f'{settings.HUOBI_WS_URL}/ws')
+        await connection.send(self.encode_ws_payload({'sub': f'market.{pair.lower()}.depth.step0'}))
+        return connection
+
+    def _process_depth_update(self, book: OrderBook, data: Dict):
+        # every depth message is a full snapshot of top levels
+        if 'tick' in data:
+            book.load_snapshot(data['tick']['bids'], data['tick']['asks'], data['tick'].get('version'))
+
+    def _make_ticker(self, tick: Dict) -> Optional[SymbolTicker]:
+        if not tick['open'] or not tick['close']:
+            return None
+        return SymbolTicker(
+            self.calc_price_change_percent(tick['close'], tick['open']),
+            Decimal(str(tick['close']))
         )
 
     async def ticker_24h(self) -> Dict:
-        return await self.http.get('https://api.huobi.pro/market/tickers')
+        return await self.http.get(f'{settings.HUOBI_API_URL}/market/tickers')
 
     @staticmethod
     def calc_price_change_percent(close_price: float, open_price: float):
@@ -126,7 +174,7 @@ class HuobiTradeExchange(BaseTradeExchange):
 
     @staticmethod
     def decode_ws_payload(data):
-        return ujson.loads(gzip.decompress(data).decode('utf-8'))
+        return decoder.decode(data)
 
     @staticmethod
     def encode_ws_payload(data):
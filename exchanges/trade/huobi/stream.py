@@ -0,0 +1,51 @@
+import asyncio
+import zlib
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Dict, Optional
+
+import ujson
+
+import settings
+
+# every Huobi frame is a complete gzip member, so each one is inflated in a single zlib call
+_GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+
+class HuobiStreamDecoder:
+    '''Decodes gzipped Huobi websocket frames, optionally on a worker thread.
+
+    Frames of at least `offload_size` compressed bytes go to the executor, smaller ones
+    (pings, subscription acks, account updates) are decoded inline. Callers await frames
+    one by one, so delivery order is preserved.
+    '''
+    _PING_PREFIX = b'{"ping":'
+    _OP_PING_PREFIX = b'{"op":"ping","ts":'
+
+    def __init__(self, executor: Optional[Executor] = None, offload_size: int = 2048):
+        self._executor = executor
+        self._offload_size = offload_size
+
+    def decode(self, frame: bytes) -> Dict:
+        raw = zlib.decompress(frame, _GZIP_WBITS)
+
+        # pings arrive every few seconds on each stream, answer them without a json parse
+        if raw.startswith(self._PING_PREFIX) and raw[-1:] == b'}':
+            ts = raw[len(self._PING_PREFIX):-1]
+            if ts.isdigit():
+                return {'ping': int(ts)}
+        elif raw.startswith(self._OP_PING_PREFIX) and raw[-1:] == b'}':
+            ts = raw[len(self._OP_PING_PREFIX):-1]
+            if ts.isdigit():
+                return {'op': 'ping', 'ts': int(ts)}
+
+        return ujson.loads(raw.decode('utf-8'))
+
+    async def decode_async(self, frame: bytes) -> Dict:
+        if self._executor is None or len(frame) < self._offload_size:
+            return self.decode(frame)
+        return await asyncio.get_event_loop().run_in_executor(self._executor, self.decode, frame)
+
+
+decoder = HuobiStreamDecoder(
+    ThreadPoolExecutor(settings.HUOBI_DECODE_THREADS) if settings.HUOBI_DECODE_THREADS else None
+)
@@ -1,16 +1,21 @@
 import asyncio
+import functools
+import time
 from itertools import groupby
-from typing import List, Type
+from typing import Iterable, List, Optional, Type
 
 import credentials
 import settings
+from alerts import AlertDispatcher
 from caller import Caller
 from common import Symbol, NTCredential
+from config import ConfigWatcher
+from events import bus, CoinDetected, OrderPlaced, OrderFilled, StreamStale
+from exchanges.registry import trade_exchanges
 from exchanges.trade.base.exchange import BaseTradeExchange
-from exchanges.trade.binance.exchange import BinanceTradeExchange
-from exchanges.trade.bittrex.exchange import BittrexTradeExchange
-from exchanges.trade.huobi.exchange import HuobiTradeExchange
+from exchanges.trade.watcher import PairWatcher
 from log import BaseLog
+from tracing import current_trace
 
 
 class TradeExchangeManager(BaseLog):
@@ -22,21 +27,107 @@ class TradeExchangeManager(BaseLog):
             f'{self.__module__}.{self.__class__.__name__}',
             f'[trade_mgr]'
         )
-        self._trade_exchange_classes = [
-            BinanceTradeExchange,
-            BittrexTradeExchange,
-            HuobiTradeExchange,
-        ]
+        self.pair_watcher = PairWatcher(settings.PAIR_WATCH_WINDOW)
+        self.config_watcher = ConfigWatcher(settings.CONFIG_RELOAD_INTERVAL)
 
     async def init(self):
         await self._init_caller()
         await self._init_credentials()
         await self._init_exchanges()
+        self._subscribe()
+        self._watch_config()
+
+    def _watch_config(self):
+        self.config_watcher.watch(credentials.FILENAME, self.reload_credentials)
+        self.config_watcher.watch(self.caller.filename, self.reload_phone_numbers)
+        self.config_watcher.start()
+
+    async def reload_credentials(self):
+        '''Adds and removes accounts of changed credentials, other accounts and all streams keep running.'''
+        new_credentials = sorted(
+            credentials.get_credentials(),
+            key=lambda x: x.exchange_name
+        )
+        added, removed = credentials.diff_credentials(self._credentials, new_credentials)
+        self._credentials = new_credentials
+
+        for credential in removed:
+            exchange = self.get_trade_exchange(credential.exchange_name)
+            if exchange and await exchange.remove_account(credential):
+                await self.log('[%s] removed %s account', exchange.name, credential.owner, send_tg=True)
+
+        for exchange_name, creds in groupby(added, lambda x: x.exchange_name):
+            creds = list(creds)
+            exchange = self.get_trade_exchange(exchange_name)
+            if exchange:
+                await exchange.init_accounts(creds)
+            else:
+                await self._init_exchange(exchange_name, creds)
+            await self.log(
+                '[%s] added %s accounts', exchange_name, ', '.join(c.owner for c in creds),
+                send_tg=True
+            )
+
+    async def reload_phone_numbers(self):
+        self.caller.reload()
+        await self.log(
+            'phone accounts reloaded: %s', ', '.join(a.name for a in self.caller.accounts),
+            send_tg=True
+        )
+
+    def _subscribe(self):
+        # buying is the latency critical path, everything else is reporting
+        bus.subscribe(CoinDetected, self._on_coin_detected, priority=100)
+        bus.subscribe_queue(CoinDetected, self._call_on_coins, name='caller', batch=True)
+        bus.subscribe_queue(OrderPlaced, self._report_order_placed, name='order placed report')
+        bus.subscribe_queue(OrderFilled, self._report_order_filled, name='order filled report')
+        bus.subscribe_queue(StreamStale, self._report_stream_stale, name='stale stream report')
+
+    def _on_coin_detected(self, event: CoinDetected):
+        trigger_exchange = event.trigger_exchange
+        if settings.DISABLE_BUY or 'buy' not in trigger_exchange.part_actions(event.part):
+            return
+        asyncio.ensure_future(
+            self.process_coin(trigger_exchange, event.coin, trigger_exchange.part_price_change_limit(event.part))
+        )
+
+    async def _call_on_coins(self, events: List[CoinDetected]):
+        # one call round for coins detected together
+        events = [e for e in events if 'call' in e.trigger_exchange.part_actions(e.part)]
+        if settings.DEBUG or not events:
+            return
+        await self.alerts.alert(
+            [e.coin.symbol for e in events],
+            detected_at=min(e.detected_at for e in events)
+        )
+
+    async def _report_order_placed(self, event: OrderPlaced):
+        await self.log(
+            '[%s][%s] [%s] New buy order with id %s placed: %d %s for %s %s',
+            event.exchange, event.owner, event.pair, event.order_id, event.qty, event.pair,
+            event.quote_amount, event.quote_symbol,
+            send_tg=True
+        )
+
+    async def _report_order_filled(self, event: OrderFilled):
+        await self.log(
+            '[%s][%s] order report: %s', event.exchange, event.owner, event.report,
+            send_tg=True, silent=True
+        )
+
+    async def _report_stream_stale(self, event: StreamStale):
+        await self.log('%s stream is stale, no messages for %.1fs', event.name, event.age, send_tg=True)
 
     async def on_shutdown(self):
+        await self.config_watcher.close()
         for e in self.exchanges:
+            streams = getattr(e, 'streams', None)
+            if streams:
+                await self.log('closing shared streams')
+                await streams.close()
             await self.log('closing session')
             await e.http.close()
+        await self.caller.close()
 
     async def _init_credentials(self):
         self._credentials = sorted(
@@ -46,31 +137,53 @@ class TradeExchangeManager(BaseLog):
 
     async def _init_exchanges(self):
         for exchange_name, creds in groupby(self._credentials, lambda x: x.exchange_name):
-            trade_exchange_cls = self.get_trade_exchange_cls_by_name(exchange_name)
+            await self._init_exchange(exchange_name, creds)
 
-            if not trade_exchange_cls:
-                await self.log('Unable to find trade exchange with name %r!', exchange_name)
-                continue
+    async def _init_exchange(self, exchange_name: str, creds: Iterable[NTCredential]):
+        trade_exchange_cls = self.get_trade_exchange_cls_by_name(exchange_name)
 
-            trade_exchange = trade_exchange_cls()
+        if not trade_exchange_cls:
+            await self.log('Unable to find trade exchange with name %r!', exchange_name)
+            return
 
-            await trade_exchange.init(creds)
+        trade_exchange = trade_exchange_cls()
 
-            self.exchanges.append(trade_exchange)
+        await trade_exchange.init(creds)
+
+        self.exchanges.append(trade_exchange)
 
     async def _init_caller(self):
         self.caller = Caller(
             settings.TWILIO_FROM_NUMBER,
             settings.TWILIO_ACCOUNT_SID,
-            settings.TWILIO_AUTH_KEY
+            settings.TWILIO_AUTH_KEY,
+            api_url=settings.TWILIO_API_URL,
+        )
+        self.alerts = AlertDispatcher(
+            self.caller,
+            concurrency=settings.ALERT_CONCURRENCY,
+            dedup_window=settings.ALERT_DEDUP_WINDOW,
+            number_cooldown=settings.ALERT_NUMBER_COOLDOWN,
+            timeout=settings.ALERT_CALL_TIMEOUT,
+            retries=settings.ALERT_CALL_RETRIES,
         )
 
-    def get_trade_exchange_cls_by_name(self, exchange_name: str) -> Type[BaseTradeExchange]:
-        for exchange in self._trade_exchange_classes:
-            if exchange().name == exchange_name:
+    def get_trade_exchange(self, exchange_name: str) -> Optional[BaseTradeExchange]:
+        for exchange in self.exchanges:
+            if exchange.name == exchange_name:
                 return exchange
 
+    @staticmethod
+    def get_trade_exchange_cls_by_name(exchange_name: str) -> Optional[Type[BaseTradeExchange]]:
+        return trade_exchanges.get(exchange_name)
+
     async def process_coin(self, trigger_exchange, coin: Symbol, price_change_limit: int):
+        started_at = time.monotonic()
+        if coin.trace is not None:
+            # marks of buy_pair and order sending go to this trace, the pair watcher keeps it for watched pairs
+            current_trace.set(coin.trace)
+            coin.trace.mark('process', started_at)
+
         other_exchanges = [
             e for e in self.exchanges
             if e.name != trigger_exchange.name
@@ -92,12 +205,25 @@ class TradeExchangeManager(BaseLog):
             e.buy(
                 trigger_exchange,
                 coin.symbol,
-                price_change_limit
+                price_change_limit,
+                # watching starts right after the pair check, not after orders of listed pairs are sent
+                functools.partial(self._watch_pair, e, trigger_exchange, price_change_limit)
+                if settings.PAIR_WATCH_WINDOW else None
             )
             for e in other_exchanges
         ]
 
         await asyncio.gather(*tasks)
 
+        await self.log(
+            'coin %s: buy orders placed %.3f ms after process_coin entry',
+            coin.symbol, (time.monotonic() - started_at) * 1000
+        )
+
+    async def _watch_pair(self, exchange: BaseTradeExchange, trigger_exchange, price_change_limit: int,
+                          pair: str, quote_symbol: str):
+        self.pair_watcher.watch(exchange, trigger_exchange, [(pair, quote_symbol)], price_change_limit)
+        await self.log('[%s] watching %s for %ss', exchange.name, pair, settings.PAIR_WATCH_WINDOW)
+
 
 trade_mgr = TradeExchangeManager()
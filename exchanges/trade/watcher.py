@@ -0,0 +1,72 @@
+import asyncio
+import functools
+import time
+from typing import Dict, List, Optional, Tuple
+
+from exchanges.trade.base.exchange import BaseTradeExchange
+from log import BaseLog
+from tracing import Trace, current_trace
+
+
+class PairWatcher(BaseLog):
+    '''Buys pairs that were not listed yet when coin was detected, as soon as their first ticker arrives.
+
+    The first ticker comes from the ticker stream task, so the listing trace is kept from `watch`.
+    '''
+
+    def __init__(self, window: float):
+        self.init_logger(
+            f'{self.__module__}.{self.__class__.__name__}',
+            f'[pair_watcher]'
+        )
+        self.window = window
+        self._expirations: Dict[Tuple[str, str], asyncio.TimerHandle] = {}
+
+    def watch(self, exchange: BaseTradeExchange, trigger_exchange, pairs: List[Tuple[str, str]],
+              price_change_limit: int):
+        loop = asyncio.get_event_loop()
+        started_at = time.monotonic()
+        trace = current_trace.get()
+        for pair, quote_symbol in pairs:
+            key = (exchange.name, pair)
+            if key in self._expirations:
+                self._expirations.pop(key).cancel()
+
+            exchange.open_order_book(pair)
+            exchange.watch_pair(
+                pair,
+                functools.partial(
+                    self._on_appeared, exchange, trigger_exchange, quote_symbol, price_change_limit, started_at, trace
+                )
+            )
+            self._expirations[key] = loop.call_later(self.window, self._on_expired, exchange, pair)
+
+    @property
+    def watching(self) -> List[Tuple[str, str]]:
+        return list(self._expirations)
+
+    def _on_appeared(self, exchange: BaseTradeExchange, trigger_exchange, quote_symbol: str,
+                     price_change_limit: int, started_at: float, trace: Optional[Trace], pair: str):
+        handle = self._expirations.pop((exchange.name, pair), None)
+        if handle:
+            handle.cancel()
+        asyncio.ensure_future(
+            self._buy(exchange, trigger_exchange, pair, quote_symbol, price_change_limit, started_at, trace)
+        )
+
+    def _on_expired(self, exchange: BaseTradeExchange, pair: str):
+        self._expirations.pop((exchange.name, pair), None)
+        exchange.unwatch_pair(pair)
+        asyncio.ensure_future(
+            self.log('[%s] pair %s did not appear in %ss, stopped watching', exchange.name, pair, self.window)
+        )
+
+    async def _buy(self, exchange: BaseTradeExchange, trigger_exchange, pair: str, quote_symbol: str,
+                   price_change_limit: int, started_at: float, trace: Optional[Trace] = None):
+        current_trace.set(trace)
+        await self.log(
+            '[%s] pair %s appeared %.3f s after detection, buying',
+            exchange.name, pair, time.monotonic() - started_at,
+            send_tg=True
+        )
+        await exchange.buy_pair(trigger_exchange, pair, quote_symbol, price_change_limit)
@@ -1,18 +1,22 @@
 import asyncio
 import collections
 import logging
-import re
+import time
 from abc import ABC, abstractmethod
-from typing import Set, List, Iterable, Dict
+from typing import Set, List, Iterable, Dict, FrozenSet, Optional, Tuple
 
 from aiogram.utils.markdown import hbold
 
-import settings
 from coinmarketcap import CoinMarketCap
-from common import Symbol
-from exchanges.trade.manager import trade_mgr
-from exchanges.trigger.base.part import BaseTriggerExchangePart, BaseTriggerExchangeGeneratorPart
+from common import Symbol, CoinSource
+from events import bus, CoinDetected
+from exchanges.trigger.base.part import BaseTriggerExchangePart, BaseTriggerExchangeGeneratorPart, \
+    BaseTriggerExchangePushPart
+from exchanges.trigger.config import PartConfig, TriggerExchangeConfig
 from log import BaseLog
+from rules import rules
+from symbols import canonical_symbol
+from tracing import Trace, current_trace, traces
 
 
 class BaseTriggerExchangeAbstract(ABC):
@@ -31,20 +35,14 @@ class BaseTriggerExchangeAbstract(ABC):
 class BaseTriggerExchange(BaseLog, BaseTriggerExchangeAbstract, ABC):
     known_coins: Set = None
     call_coins: Set = None
+    # part name -> symbols the part has seen, to trace parts that detect a listing after another one
+    part_coins: Dict[str, Set[str]] = None
     _parts: List[BaseTriggerExchangePart] = []
-    EXCLUDED_COINS = {
-        'BTC',
-        'ETH',
-        'KRW',
-        'PAX',
-        'DAI',
-        'BCHABC',
-        'BCHSV',
-        'PST',
-        'BTT',
-        'CELR'
-    }
-    EXCLUDED_COINS_REGEX = re.compile(r'\w?USD\w?')
+    _parts_by_source: Dict[CoinSource, BaseTriggerExchangePart] = None
+    # enabled parts are in _parts, disabled ones only here
+    _all_parts: List[BaseTriggerExchangePart] = []
+    _part_tasks: Dict[str, asyncio.Task] = None
+    _config: TriggerExchangeConfig = TriggerExchangeConfig()
 
     def __init__(self):
         self.init_logger(
@@ -53,11 +51,35 @@ class BaseTriggerExchange(BaseLog, BaseTriggerExchangeAbstract, ABC):
         )
         self.cmc = CoinMarketCap()
 
+    @property
+    def parts(self) -> List[BaseTriggerExchangePart]:
+        return list(self._parts)
+
     def buy_amount_percent(self, symbol: str) -> int:
         return self._buy_amounts.get(symbol)
 
+    def configure(self, config: TriggerExchangeConfig):
+        self._config = config
+        if config.buy_amounts is not None:
+            self._buy_amounts = dict(config.buy_amounts)
+
+    @staticmethod
+    def part_name(part) -> str:
+        return type(part).__name__
+
+    def _part_config(self, part) -> PartConfig:
+        return self._config.parts.get(self.part_name(part)) or PartConfig()
+
+    def part_actions(self, part) -> FrozenSet[str]:
+        actions = self._part_config(part).actions
+        return actions if actions is not None else part.trigger_actions
+
+    def part_price_change_limit(self, part) -> int:
+        limit = self._part_config(part).price_change_limit
+        return limit if limit is not None else part.price_change_limit
+
     async def on_shutdown(self):
-        for part in self._parts:
+        for part in self._all_parts:
             if isinstance(part, BaseTriggerExchangePart):
                 await part.on_shutdown()
 
@@ -66,7 +88,7 @@ class BaseTriggerExchange(BaseLog, BaseTriggerExchangeAbstract, ABC):
 
         for c in coins:
             if isinstance(c, Symbol):
-                result.add(c.symbol)
+                result.add(canonical_symbol(c.symbol))
             elif isinstance(c, collections.Iterable):
                 result.update(self.get_symbols(c))
 
@@ -74,21 +96,34 @@ class BaseTriggerExchange(BaseLog, BaseTriggerExchangeAbstract, ABC):
 
     async def init(self):
         await self._init_parts()
+        await self._apply_parts_config()
         await self._init_coins()
 
+    async def _apply_parts_config(self):
+        self._all_parts = list(self._parts)
+        self._part_tasks = {}
+
+        unknown = set(self._config.parts) - {self.part_name(p) for p in self._all_parts}
+        if unknown:
+            await self.log('unknown parts in config: %s', ', '.join(sorted(unknown)), level=logging.WARNING)
+
+        for part in self._all_parts:
+            delay = self._part_config(part).delay
+            if delay is not None and isinstance(part, BaseTriggerExchangePart):
+                part.DELAY = delay
+
+        self._parts = [p for p in self._all_parts if self._part_config(p).enabled]
+
     async def _init_coins(self):
         self.known_coins = set()
         self.call_coins = set()
+        self.part_coins = {}
 
         exclude_parts = set()
 
         for part in self._parts:
             try:
-                if isinstance(part, BaseTriggerExchangeGeneratorPart):
-                    await self.log('%s: is a generator, skipping...', part.__class__.__name__)
-                    continue
-
-                coins = await part.get()
+                await self._init_part_coins(part)
             except Exception as e:
                 await self.log(
                     '%s: unable to init coins; %s, %s',
@@ -96,75 +131,158 @@ class BaseTriggerExchange(BaseLog, BaseTriggerExchangeAbstract, ABC):
                     send_tg=True
                 )
                 exclude_parts.add(part)
-            else:
-                part_coins = self.get_symbols(coins)
-                if part.trigger_actions == {'call'}:
-                    self.call_coins.update(part_coins)
-                else:
-                    self.known_coins.update(part_coins)
-                await self.log(
-                    '%s: initial launch, added %d coins',
-                    part.__class__.__name__, len(part_coins),
-                )
 
         if exclude_parts:
             await self.log('excluded parts %s', exclude_parts, level=logging.WARNING)
 
         self._parts = [p for p in self._parts if p not in exclude_parts]
+        self._index_parts()
+
+    async def _init_part_coins(self, part):
+        '''Remembers coins a polling part already lists, so they are not detected as new.'''
+        if isinstance(part, BaseTriggerExchangeGeneratorPart):
+            await self.log('%s: is a generator, skipping...', part.__class__.__name__)
+            return
+
+        if isinstance(part, BaseTriggerExchangePushPart):
+            await self.log('%s: is push-based, skipping...', part.__class__.__name__)
+            return
+
+        coins = await part.get()
+        part_coins = self.get_symbols(coins)
+        self.part_coins[self.part_name(part)] = set(part_coins)
+        if self.part_actions(part) == {'call'}:
+            self.call_coins.update(part_coins)
+        else:
+            self.known_coins.update(part_coins)
+        await self.log(
+            '%s: initial launch, added %d coins',
+            part.__class__.__name__, len(part_coins),
+        )
+
+    def _index_parts(self):
+        self._parts_by_source = {}
+        for part in self._parts:
+            self._parts_by_source.setdefault(part.source, part)
+
+    def get_part(self, source: CoinSource) -> Optional[BaseTriggerExchangePart]:
+        return self._parts_by_source.get(source) if self._parts_by_source else None
 
     async def schedule_parts_check(self):
         for part in self._parts:
-            asyncio.create_task(part.check_part())
+            self._start_part(part)
+
+    def _start_part(self, part):
+        self._part_tasks[self.part_name(part)] = asyncio.create_task(part.check_part())
+
+    def _find_part(self, name: str):
+        for part in self._all_parts:
+            if self.part_name(part).lower() == name.lower():
+                return part
+
+    def parts_status(self) -> List[Tuple[str, bool, Optional[float]]]:
+        '''Returns name, running flag and poll delay (None for stream and push parts) of every part.'''
+        return [
+            (
+                self.part_name(part),
+                part in self._parts,
+                part.DELAY if isinstance(part, BaseTriggerExchangePart) else None,
+            )
+            for part in self._all_parts
+        ]
+
+    async def enable_part(self, name: str) -> bool:
+        part = self._find_part(name)
+        if part is None or part in self._parts:
+            return False
+
+        await self._init_part_coins(part)
+        self._parts = [p for p in self._all_parts if p in self._parts or p is part]
+        self._index_parts()
+        self._start_part(part)
+        await self.log('%s enabled', self.part_name(part))
+        return True
+
+    async def disable_part(self, name: str) -> bool:
+        part = self._find_part(name)
+        if part is None or part not in self._parts:
+            return False
+
+        self._parts = [p for p in self._parts if p is not part]
+        self._index_parts()
+        task = self._part_tasks.pop(self.part_name(part), None)
+        if task:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        await self.log('%s disabled', self.part_name(part))
+        return True
+
+    def set_part_delay(self, name: str, delay: float) -> bool:
+        part = self._find_part(name)
+        if not isinstance(part, BaseTriggerExchangePart):
+            return False
+        part.DELAY = delay
+        return True
+
+    def _new_coins(self, coins: Set[Symbol], seen: Set[str]) -> Set[Symbol]:
+        '''Coins with symbols not seen yet and allowed by rules, renamed to their canonical symbols.'''
+        new_coins = set()
+        for c in coins:
+            symbol = canonical_symbol(c.symbol)
+            if symbol in seen or not rules.allowed(symbol, c.source):
+                continue
+            new_coins.add(c if symbol == c.symbol else c._replace(symbol=symbol))
+        return new_coins
 
     async def process_coins(self, part: BaseTriggerExchangePart, coins: Set[Symbol]):
-        if part.trigger_actions == {'call'}:
-            new_coins = set(
-                c for c in coins
-                if c.symbol not in self.call_coins and
-                c.symbol not in self.EXCLUDED_COINS and
-                not self.EXCLUDED_COINS_REGEX.match(c.symbol)
-            )
+        # first sightings of this part, late ones are traced before the dedup against other parts
+        part_coins = self.part_coins.setdefault(self.part_name(part), set())
+        sighted_coins = self._new_coins(coins, part_coins)
+        part_coins.update(self.get_symbols(sighted_coins))
+
+        if self.part_actions(part) == {'call'}:
+            new_coins = self._new_coins(coins, self.call_coins)
             self.call_coins.update(self.get_symbols(new_coins))
         else:
-            new_coins = set(
-                c for c in coins
-                if c.symbol not in self.known_coins and
-                c.symbol not in self.EXCLUDED_COINS and
-                not self.EXCLUDED_COINS_REGEX.match(c.symbol)
-            )
+            new_coins = self._new_coins(coins, self.known_coins)
             self.known_coins.update(self.get_symbols(new_coins))
 
-        if not new_coins:
+        if not new_coins and not sighted_coins:
             return
 
-        await self.log('got %d new coins: %s', len(new_coins), '\n'.join(str(c) for c in new_coins))
+        detected_at = time.monotonic()
+        trace = current_trace.get() or Trace()
+        new_symbols = self.get_symbols(new_coins)
+        for coin in sighted_coins:
+            if coin.symbol not in new_symbols:
+                coin_trace = trace.copy()
+                coin_trace.mark('detected', detected_at)
+                traces.record(self.name, part.source.value, coin.symbol, coin_trace, self.part_name(part), first=False)
+
+        if not new_coins:
+            return
 
         for coin in new_coins:
-            cmc_result = await self.cmc.get_name_and_url(coin.symbol)
-            if not cmc_result:
-                coin_title = hbold(coin.symbol)
-            else:
-                name, url = cmc_result
-                url = url + '#markets'
-                coin_title = f'{name} ({coin.symbol}):\n{url}'
-
-            coin_info = f'{coin.source.value}, {coin.url}'
-
-            await self.log(
-                f'listed {coin_title} ({coin_info})',
-                send_tg=True,
-                quote=False
-            )
+            coin = coin._replace(trace=trace.copy())
+            coin.trace.mark('detected', detected_at)
+            traces.record(self.name, part.source.value, coin.symbol, coin.trace, self.part_name(part))
+            bus.publish(CoinDetected(self, part, coin, detected_at))
 
-        if not settings.DEBUG and 'call' in part.trigger_actions:
-            asyncio.create_task(trade_mgr.caller.call_all())
+        await self.log('got %d new coins: %s', len(new_coins), '\n'.join(str(c) for c in new_coins))
 
-        if settings.DISABLE_BUY:
-            return  # temporary
+    async def announce_coin(self, coin: Symbol):
+        cmc_result = await self.cmc.get_name_and_url(coin.symbol)
+        if not cmc_result:
+            coin_title = hbold(coin.symbol)
+        else:
+            name, url = cmc_result
+            url = url + '#markets'
+            coin_title = f'{name} ({coin.symbol}):\n{url}'
 
-        if 'buy' in part.trigger_actions:
-            for coin in new_coins:
-                await self._process_coin(coin, part.price_change_limit)
+        coin_info = f'{coin.source.value}, {coin.url}'
 
-    async def _process_coin(self, coin: Symbol, price_change_limit: int):
-        await trade_mgr.process_coin(self, coin, price_change_limit)
+        await self.log(
+            f'listed {coin_title} ({coin_info})',
+            send_tg=True,
+            quote=False
+        )
@@ -1,13 +1,15 @@
 import asyncio
+import random
+import time
 from abc import ABC, abstractmethod
 from logging import ERROR
-from typing import Set, AsyncGenerator
+from typing import Set, AsyncGenerator, Tuple
 
 import settings
 from common import CoinSource, Symbol
 from log import BaseLog
-from network import TooManyRequests, AsyncHttp
-from twitter import TwitterPeonySingle
+from network import TooManyRequests, AsyncHttp, HedgePolicy
+from tracing import Trace, current_trace
 
 
 class BasePartException(Exception):
@@ -32,6 +34,8 @@ class BaseTriggerExchangePartAbstract(ABC):
 
 class BaseTriggerExchangePart(BaseLog, BaseTriggerExchangePartAbstract, ABC):
     DELAY = 0
+    HEDGE = False
+    hedge: HedgePolicy = None
 
     def __init__(self, trigger_exchange):
         self._trigger_exchange = trigger_exchange
@@ -40,6 +44,8 @@ class BaseTriggerExchangePart(BaseLog, BaseTriggerExchangePartAbstract, ABC):
             f'[{self._trigger_exchange.name}][{self.source.value}]'
         )
         self.http = AsyncHttp()
+        if self.HEDGE:
+            self.hedge = HedgePolicy()
 
     @property
     def price_change_limit(self):
@@ -50,6 +56,8 @@ class BaseTriggerExchangePart(BaseLog, BaseTriggerExchangePartAbstract, ABC):
         return {'buy', 'call'}
 
     async def on_shutdown(self):
+        if self.hedge:
+            await self.log('hedging stats: %s', self.hedge)
         await self.log('closing session')
         await self.http.close()
 
@@ -57,7 +65,11 @@ class BaseTriggerExchangePart(BaseLog, BaseTriggerExchangePartAbstract, ABC):
         while True:
             try:
                 await asyncio.sleep(self.DELAY)
+                trace = Trace()
+                trace.mark('fetch')
+                current_trace.set(trace)
                 coins = await self.get()
+                trace.mark('parsed')
             except TooManyRequests as e:
                 if not e.retry_after:
                     sleep_time = 60 * 10
@@ -76,12 +88,63 @@ class BaseTriggerExchangePart(BaseLog, BaseTriggerExchangePartAbstract, ABC):
                 await asyncio.sleep(sleep_time)
             except BasePartException as e:
                 await self.log(str(e))
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
                 await self.log(f'Unknown error ({type(e).__name__}): {e}')
             else:
                 await self._trigger_exchange.process_coins(self, coins)
 
 
+class BaseTriggerExchangePushPartAbstract(ABC):
+    @property
+    @abstractmethod
+    def source(self) -> CoinSource:
+        '''Returns part source.'''
+
+
+class BaseTriggerExchangePushPart(BaseLog, BaseTriggerExchangePushPartAbstract, ABC):
+    '''Part fed by producers through `push`, the consumer sleeps on the queue until coins arrive.'''
+    _queue: 'asyncio.Queue[Tuple[float, Set[Symbol]]]'
+
+    def __init__(self, trigger_exchange):
+        self._trigger_exchange = trigger_exchange
+        self.init_logger(
+            f'{self.__module__}.{self.__class__.__name__}',
+            f'[{self._trigger_exchange.name}][{self.source.value}]'
+        )
+        self._queue = asyncio.Queue()
+
+    @property
+    def price_change_limit(self):
+        return settings.PRICE_CHANGE_LIMIT_IN_PERCENT
+
+    @property
+    def trigger_actions(self):
+        return {'buy', 'call'}
+
+    def push(self, coins: Set[Symbol]):
+        if coins:
+            self._queue.put_nowait((time.monotonic(), coins))
+
+    async def check_part(self):
+        while True:
+            enqueued_at, coins = await self._queue.get()
+            trace = Trace()
+            trace.mark('received', enqueued_at)
+            current_trace.set(trace)
+            await self.log(
+                '%s: got %d coins, enqueue->process latency %.3f ms',
+                self.__class__.__name__, len(coins), (time.monotonic() - enqueued_at) * 1000
+            )
+            try:
+                await self._trigger_exchange.process_coins(self, coins)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                await self.log(f'Unknown error ({type(e).__name__}): {e}')
+
+
 class BaseTriggerExchangeGeneratorPartAbstract(ABC):
     @property
     @abstractmethod
@@ -94,6 +157,10 @@ class BaseTriggerExchangeGeneratorPartAbstract(ABC):
 
 
 class BaseTriggerExchangeGeneratorPart(BaseLog, BaseTriggerExchangeGeneratorPartAbstract, ABC):
+    '''Part fed by a long-lived stream, the stream is restarted with backoff whenever it fails or ends.'''
+    RECONNECT_BACKOFF_BASE = 1.0  # seconds
+    RECONNECT_BACKOFF_MAX = 300.0
+
     def __init__(self, trigger_exchange):
         self._trigger_exchange = trigger_exchange
         self.init_logger(
@@ -105,6 +172,8 @@ class BaseTriggerExchangeGeneratorPart(BaseLog, BaseTriggerExchangeGeneratorPart
             self._logger.warning('twitter disabled')
             return
 
+        # peony is imported only when twitter is enabled
+        from twitter import TwitterPeonySingle
         self.client = TwitterPeonySingle(
             consumer_key=settings.TWITTER_CONSUMER_KEY,
             consumer_secret=settings.TWITTER_CONSUMER_SECRET,
@@ -124,5 +193,26 @@ class BaseTriggerExchangeGeneratorPart(BaseLog, BaseTriggerExchangeGeneratorPart
         if not settings.TWITTER_ENABLED:
             self._logger.warning('twitter disabled')
             return
-        async for coins in self.stream():
-            await self._trigger_exchange.process_coins(self, coins)
+
+        attempt = 0
+        while True:
+            started_at = time.monotonic()
+            try:
+                async for coins in self.stream():
+                    trace = Trace()
+                    trace.mark('received')
+                    current_trace.set(trace)
+                    await self._trigger_exchange.process_coins(self, coins)
+                await self.log('%s: stream ended', self.__class__.__name__, level=ERROR)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                await self.log('%s: stream error (%s): %s', self.__class__.__name__, type(e).__name__, e, level=ERROR)
+
+            # a stream that stayed up longer than the max backoff starts the backoff over
+            if time.monotonic() - started_at > self.RECONNECT_BACKOFF_MAX:
+                attempt = 0
+            delay = min(self.RECONNECT_BACKOFF_MAX, self.RECONNECT_BACKOFF_BASE * 2 ** attempt) * random.uniform(.5, 1)
+            attempt += 1
+            await self.log('%s: reconnecting in %.1fs', self.__class__.__name__, delay)
+            await asyncio.sleep(delay)
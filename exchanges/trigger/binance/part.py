@@ -73,13 +73,15 @@ class ApiPairCoinsPart(BaseTriggerExchangePart):
 
 
 class ApiPairCoinsExchangePart(BaseTriggerExchangePart):
+    HEDGE = True
+
     @property
     def source(self) -> CoinSource:
         return CoinSource.API_PAIR
 
     async def get(self) -> Set[Symbol]:
         url = 'https://api.binance.com/api/v1/exchangeInfo'
-        response = await self.http.get(url)
+        response = await self.http.get_hedged([url, 'https://api1.binance.com/api/v1/exchangeInfo'], self.hedge)
         if not response or 'symbols' not in response:
             raise BinancePartException(url, response)
         return set(
@@ -1,8 +1,8 @@
 import asyncio
 import re
-from typing import Set, AsyncIterable
+import time
+from typing import Set, AsyncIterable, Dict, Optional
 
-import peony
 import ujson
 
 from common import CoinSource, Symbol
@@ -74,63 +74,81 @@ class ApiAnnouncementsPart(BaseTriggerExchangePart):
 
 
 class TwitterPart(BaseTriggerExchangeGeneratorPart):
-    REGEX = re.compile(r'([A-Z]+\b)')
+    USER_IDS = {
+        720487892670410753,  # CoinbasePro
+        # 902585667947036672,  # ape36484
+    }
+    LISTING_REGEX = re.compile(
+        r'launch|now available|now live|inbound transfers|begin(?:s)? accepting|trading (?:will )?(?:begin|open)',
+        re.IGNORECASE
+    )
+    SYMBOL_REGEX = re.compile(r'\(([A-Z0-9]{2,10})\)|\$([A-Z][A-Z0-9]{1,9})\b')
+    _USER_ID_MARKER = b'"user":{"id":'
+
+    tweets = 0
+    listing_tweets = 0
+    max_latency_ms = 0
 
     @property
     def source(self) -> CoinSource:
         return CoinSource.TWITTER
 
-    async def stream(self) -> AsyncIterable[Set[Symbol]]:
-        user_ids = [
-            '720487892670410753',  # CoinbasePro
-            # '902585667947036672',  # ape36484
-        ]
+    def _loads(self, line: bytes) -> Optional[Dict]:
+        # followed users' tweets are rare in the stream (replies and retweets by others come too),
+        # so the author id is read straight from the raw line and only their tweets are decoded
+        start = line.find(self._USER_ID_MARKER)
+        if start == -1:
+            return None
+        start += len(self._USER_ID_MARKER)
+        end = line.find(b',', start)
+        try:
+            user_id = int(line[start:end])
+        except ValueError:
+            return None
+        if user_id not in self.USER_IDS:
+            return None
+        return ujson.loads(line)
 
-        req = self.client.stream.statuses.filter.post(follow=','.join(user_ids))
+    async def stream(self) -> AsyncIterable[Set[Symbol]]:
+        req = self.client.stream.statuses.filter.post(follow=','.join(str(i) for i in self.USER_IDS))
+        req.loads = self._loads
         async with req as stream:
             async for tweet in stream:
-                try:
-                    await self.log(tweet)
-                except Exception as e:
-                    await self.log('unable to log tweet: %s', e)
-
-                if not peony.events.tweet(tweet):
+                if not tweet or 'user' not in tweet:
                     continue
 
-                if str(tweet.user.id) not in user_ids:
-                    continue
+                self.tweets += 1
+                received_at = time.time()
+                text = self._get_text(tweet)
+                await self.log('tweet %s: %s', tweet.get('id_str'), text)
 
-                if self._has_usdc_in_text(tweet):
+                if 'USDC' in text or not self.LISTING_REGEX.search(text):
                     continue
 
-                symbols = self._get_symbols(tweet)
+                symbols = self._get_symbols(text)
                 if not symbols:
                     continue
 
-                await self.log('new coins: %s', symbols)
+                self.listing_tweets += 1
+                latency_ms = received_at * 1000 - int(tweet.get('timestamp_ms', received_at * 1000))
+                self.max_latency_ms = max(self.max_latency_ms, latency_ms)
+                await self.log('new coins: %s, tweet created->processed %.0f ms', symbols, latency_ms)
 
                 yield set(
                     Symbol(
                         symbol,
                         CoinSource.TWITTER,
-                        f'https://twitter.com/{tweet.user.screen_name}/status/{tweet.id}'
+                        f'https://twitter.com/{tweet["user"]["screen_name"]}/status/{tweet["id_str"]}'
                     )
                     for symbol in symbols
                 )
 
     @staticmethod
-    def _has_usdc_in_text(tweet):
-        try:
-            text = tweet.text
-        except KeyError:
-            return False
-        else:
-            return 'USDC' in text
-
-    def _get_symbols(self, tweet):
-        try:
-            text = tweet.text
-        except KeyError:
-            return []
-        else:
-            return {s for s in self.REGEX.findall(text)}
+    def _get_text(tweet: Dict) -> str:
+        extended = tweet.get('extended_tweet')
+        if extended:
+            return extended.get('full_text', '')
+        return tweet.get('text', '')
+
+    def _get_symbols(self, text: str) -> Set[str]:
+        return {a or b for a, b in self.SYMBOL_REGEX.findall(text)}
@@ -0,0 +1,93 @@
+import os
+from typing import Dict, FrozenSet, Iterable, NamedTuple, Optional
+
+from utils import load_yaml
+
+ACTIONS = frozenset({'buy', 'call'})
+
+
+class PartConfig(NamedTuple):
+    enabled: bool = True
+    # seconds between polls, polling parts only
+    delay: Optional[float] = None
+    actions: Optional[FrozenSet[str]] = None
+    price_change_limit: Optional[int] = None
+
+
+class TriggerExchangeConfig(NamedTuple):
+    enabled: bool = True
+    buy_amounts: Optional[Dict[str, int]] = None
+    # part class name -> config, parts not listed run with their defaults
+    parts: Dict[str, PartConfig] = {}
+
+
+class InvalidTriggersConfig(Exception):
+    pass
+
+
+def _check(condition: bool, message: str, *args):
+    if not condition:
+        raise InvalidTriggersConfig(message % args)
+
+
+def parse_part(exchange_name: str, part_name: str, data: Dict) -> PartConfig:
+    where = f'{exchange_name}.{part_name}'
+    _check(isinstance(data, dict), '%s must be a mapping', where)
+    _check(not set(data) - set(PartConfig._fields), '%s has unknown keys %s', where, set(data) - set(PartConfig._fields))
+
+    enabled = data.get('enabled', True)
+    _check(isinstance(enabled, bool), '%s.enabled must be bool', where)
+
+    delay = data.get('delay')
+    _check(delay is None or isinstance(delay, (int, float)) and delay >= 0, '%s.delay must be seconds', where)
+
+    actions = data.get('actions')
+    if actions is not None:
+        _check(isinstance(actions, list) and set(actions) <= ACTIONS, '%s.actions must be a list of %s', where, ACTIONS)
+        actions = frozenset(actions)
+
+    limit = data.get('price_change_limit')
+    _check(limit is None or isinstance(limit, int), '%s.price_change_limit must be int', where)
+
+    return PartConfig(enabled, delay, actions, limit)
+
+
+def parse_triggers(data: Dict, known_exchanges: Iterable[str]) -> Dict[str, TriggerExchangeConfig]:
+    '''Validates triggers config, raises InvalidTriggersConfig on the first error.'''
+    _check(isinstance(data, dict), 'triggers config must be a mapping of exchange names')
+    known_exchanges = set(known_exchanges)
+
+    result = {}
+    for name, exchange in data.items():
+        _check(name in known_exchanges, 'unknown trigger exchange %r', name)
+        exchange = exchange or {}
+        _check(isinstance(exchange, dict), '%s must be a mapping', name)
+
+        enabled = exchange.get('enabled', True)
+        _check(isinstance(enabled, bool), '%s.enabled must be bool', name)
+
+        buy_amounts = exchange.get('buy_amounts')
+        _check(
+            buy_amounts is None or isinstance(buy_amounts, dict) and all(
+                isinstance(v, int) and 0 < v <= 100 for v in buy_amounts.values()
+            ),
+            '%s.buy_amounts must map quote symbols to percents', name
+        )
+
+        parts = exchange.get('parts') or {}
+        _check(isinstance(parts, dict), '%s.parts must be a mapping of part class names', name)
+
+        result[name] = TriggerExchangeConfig(
+            enabled,
+            buy_amounts,
+            {part_name: parse_part(name, part_name, part or {}) for part_name, part in parts.items()}
+        )
+    return result
+
+
+def load_triggers(filename: str, known_exchanges: Iterable[str]) -> Optional[Dict[str, TriggerExchangeConfig]]:
+    '''Returns None when there is no config file.'''
+    if not os.path.exists(filename):
+        return None
+    with open(filename) as f:
+        return parse_triggers(load_yaml(f.read()), known_exchanges)
@@ -1,33 +1,27 @@
 import asyncio
-from typing import List
+from typing import List, Dict, Optional
 
+import settings
+from events import bus, CoinDetected
+from exchanges.registry import trigger_exchanges
 from exchanges.trigger.base.exchange import BaseTriggerExchange
-from exchanges.trigger.coinbase.exchange import CoinbaseTriggerExchange
-from exchanges.trigger.coinbase_pro.exchange import CoinbaseProTriggerExchange
-from exchanges.trigger.telegram.exchange import TelegramTriggerExchange
-from exchanges.trigger.upbit.exchange import UpbitTriggerExchange
+from exchanges.trigger.config import TriggerExchangeConfig, load_triggers
 from log import BaseLog
+from symbols import canonical_symbol
 
 
 class TriggerExchangeManager(BaseLog):
     exchanges: List[BaseTriggerExchange] = None
+    _exchanges_by_name: Dict[str, BaseTriggerExchange] = None
 
     def __init__(self):
         self.init_logger(
             f'{self.__module__}.{self.__class__.__name__}',
             '[trigger_mgr]'
         )
-        self.trigger_exchanges = [
-            # BinanceTriggerExchange,
-            # BittrexTriggerExchange,
-            # BithumbTriggerExchange,
-            CoinbaseTriggerExchange,
-            CoinbaseProTriggerExchange,
-            UpbitTriggerExchange,
-            TelegramTriggerExchange
-        ]
 
     async def init(self):
+        bus.subscribe_queue(CoinDetected, self._announce_coin, name='coin announcer')
         await self._init_exchanges()
         await self._init_coins()
         await self._schedule_exchange_parts_check()
@@ -37,11 +31,31 @@ class TriggerExchangeManager(BaseLog):
             await self.log('closing %s sessions', e.name)
             await e.on_shutdown()
 
+    @staticmethod
+    async def _announce_coin(event: CoinDetected):
+        await event.trigger_exchange.announce_coin(event.coin)
+
     async def _init_exchanges(self):
-        self.exchanges = [
-            e()
-            for e in self.trigger_exchanges
-        ]
+        config = load_triggers(settings.TRIGGERS_FILE, trigger_exchanges.names)
+        if config is None:
+            await self.log('%s not found, running %s', settings.TRIGGERS_FILE, ', '.join(settings.TRIGGER_EXCHANGES))
+            config = {name: TriggerExchangeConfig() for name in settings.TRIGGER_EXCHANGES}
+
+        self.exchanges = []
+        for name, exchange_config in config.items():
+            if not exchange_config.enabled:
+                continue
+            exchange_cls = trigger_exchanges.get(name)
+            if not exchange_cls:
+                await self.log('Unable to find trigger exchange with name %r!', name)
+                continue
+            exchange = exchange_cls()
+            exchange.configure(exchange_config)
+            self.exchanges.append(exchange)
+        self._exchanges_by_name = {e.name: e for e in self.exchanges}
+
+    def get_exchange(self, name: str) -> Optional[BaseTriggerExchange]:
+        return self._exchanges_by_name.get(name) if self._exchanges_by_name else None
 
     async def _init_coins(self):
         await asyncio.gather(
@@ -56,12 +70,13 @@ class TriggerExchangeManager(BaseLog):
             await e.schedule_parts_check()
 
     async def drop_coin(self, exchange_name: str, coin: str):
-        c = coin.upper()
-        for e in self.exchanges:
-            if e.name == exchange_name:
-                if c in e.known_coins:
-                    e.known_coins.discard(c)
-                    return True
+        c = canonical_symbol(coin)
+        e = self.get_exchange(exchange_name)
+        if e and c in e.known_coins:
+            e.known_coins.discard(c)
+            for part_coins in e.part_coins.values():
+                part_coins.discard(c)
+            return True
 
 
 trigger_mgr = TriggerExchangeManager()
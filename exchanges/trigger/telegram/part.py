@@ -1,30 +1,19 @@
-from typing import Set
-
 import settings
-from common import CoinSource, Symbol
-from exchanges.trigger.base.part import BasePartException, BaseTriggerExchangePart
+from common import CoinSource
+from exchanges.trigger.base.part import BasePartException, BaseTriggerExchangePushPart
 
 
 class TelegramPartException(BasePartException):
     pass
 
 
-class TelegramTriggerPart(BaseTriggerExchangePart):
-    coins = set()
-
+class TelegramTriggerPart(BaseTriggerExchangePushPart):
     @property
     def source(self) -> CoinSource:
         return CoinSource.TELEGRAM
 
-    async def get(self) -> Set[Symbol]:
-        result = self.coins
-        self.coins = set()
-        return result
-
-
-class TelegramChannelUpbitKRWTriggerPart(BaseTriggerExchangePart):
-    coins = set()
 
+class TelegramChannelUpbitKRWTriggerPart(BaseTriggerExchangePushPart):
     @property
     def price_change_limit(self):
         return settings.UPBIT_KRW_PRICE_CHANGE_LIMIT
@@ -33,15 +22,8 @@ class TelegramChannelUpbitKRWTriggerPart(BaseTriggerExchangePart):
     def source(self) -> CoinSource:
         return CoinSource.TG_CHNL_UPBIT_KRW
 
-    async def get(self) -> Set[Symbol]:
-        result = self.coins
-        self.coins = set()
-        return result
-
-
-class TelegramChannelUpbitBTCTriggerPart(BaseTriggerExchangePart):
-    coins = set()
 
+class TelegramChannelUpbitBTCTriggerPart(BaseTriggerExchangePushPart):
     @property
     def price_change_limit(self):
         return settings.UPBIT_BTC_PRICE_CHANGE_LIMIT
@@ -49,8 +31,3 @@ class TelegramChannelUpbitBTCTriggerPart(BaseTriggerExchangePart):
     @property
     def source(self) -> CoinSource:
         return CoinSource.TG_CHNL_UPBIT_BTC
-
-    async def get(self) -> Set[Symbol]:
-        result = self.coins
-        self.coins = set()
-        return result
@@ -10,13 +10,21 @@ class UpbitPartException(BasePartException):
 
 
 class ApiPairsPart(BaseTriggerExchangePart):
+    HEDGE = True
+
     @property
     def source(self) -> CoinSource:
         return CoinSource.API_PAIR
 
     async def get(self) -> Set[Symbol]:
-        url = f'https://s3.ap-northeast-2.amazonaws.com/crix-production/crix_master?nonce={self.nonce()}'
-        response = await self.http.get(url)
+        nonce = self.nonce()
+        # the backup gets its own nonce, the same url may be answered by the same stale cache
+        urls = [
+            f'https://s3.ap-northeast-2.amazonaws.com/crix-production/crix_master?nonce={n}'
+            for n in (nonce, nonce + 1)
+        ]
+        url = urls[0]
+        response = await self.http.get_hedged(urls, self.hedge)
         if not isinstance(response, list):
             raise UpbitPartException(url, response)
 
@@ -32,7 +40,8 @@ class ApiPairsPart(BaseTriggerExchangePart):
 
     @staticmethod
     def nonce():
-        return int(time.time())
+        # milliseconds, so the backup nonce is not the nonce of the next request
+        return int(time.time() * 1000)
 
     @property
     def price_change_limit(self):
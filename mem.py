@@ -6,7 +6,6 @@ import ujson
 from datetime import datetime as dt
 from pathlib import Path
 
-from pympler import muppy, summary
 
 import settings
 
@@ -29,6 +28,8 @@ async def mem_watcher_pympler():
 
 
 def print_report_pympler():
+    from pympler import muppy, summary
+
     TYPE, COUNT, SIZE = range(3)
 
     all_objects = muppy.get_objects()
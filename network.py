@@ -1,13 +1,17 @@
 import asyncio
+import collections
 import logging
 import os
 import random
+import time
 from enum import Enum
-from typing import Union, Optional, Dict, List
+from typing import Union, Optional, Dict, List, Sequence
 
 import aiohttp
 from aiohttp import ClientSession, ClientTimeout
 
+import tracing
+
 
 class AsyncHttpException(Exception):
     pass
@@ -52,6 +56,48 @@ class HttpMethod(Enum):
     POST = 'post'
 
 
+class HedgePolicy:
+    '''Fires a backup request once the primary is slower than the recent p95 latency.
+
+    Backup requests are capped by `max_extra_ratio` of all requests made through the policy.
+    '''
+
+    def __init__(
+            self,
+            percentile: float = 0.95,
+            window: int = 100,
+            min_samples: int = 20,
+            initial_delay: float = 1.0,
+            min_delay: float = 0.05,
+            max_extra_ratio: float = 0.1,
+    ):
+        self._percentile = percentile
+        self._latencies = collections.deque(maxlen=window)
+        self._min_samples = min_samples
+        self._initial_delay = initial_delay
+        self._min_delay = min_delay
+        self._max_extra_ratio = max_extra_ratio
+
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_won = 0
+
+    def delay(self) -> float:
+        if len(self._latencies) < self._min_samples:
+            return self._initial_delay
+        ordered = sorted(self._latencies)
+        return max(self._min_delay, ordered[int((len(ordered) - 1) * self._percentile)])
+
+    def can_hedge(self) -> bool:
+        return self.hedged < self.requests * self._max_extra_ratio
+
+    def record(self, latency: float):
+        self._latencies.append(latency)
+
+    def __str__(self):
+        return f'requests {self.requests}, hedged {self.hedged}, hedge won {self.hedge_won}, delay {self.delay():.3f}s'
+
+
 class AsyncHttp:
     def __init__(self, loop=None):
         self._timeout = int(os.environ.get('REQUEST_TIMEOUT', 60))
@@ -79,6 +125,48 @@ class AsyncHttp:
     ) -> Union[Dict, List, str]:
         return await self._request(url, headers, output, HttpMethod.GET)
 
+    async def get_hedged(
+            self,
+            urls: Sequence[str],
+            policy: HedgePolicy,
+            output: OutputFormat = OutputFormat.JSON,
+            headers: Optional[dict] = None,
+    ) -> Union[Dict, List, str]:
+        '''GETs `urls[0]`, hedging with `urls[1]` (or the same url over another connection) when it is slow.'''
+        policy.requests += 1
+        started_at = time.monotonic()
+
+        primary = asyncio.ensure_future(self.get(urls[0], output, headers))
+        tasks = [primary]
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=policy.delay())
+            if done or not policy.can_hedge():
+                result = await primary
+                policy.record(time.monotonic() - started_at)
+                return result
+
+            policy.hedged += 1
+            backup_started_at = time.monotonic()
+            backup = asyncio.ensure_future(self.get(urls[1 % len(urls)], output, headers))
+            tasks.append(backup)
+            pending = {primary, backup}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        continue
+                    if task is backup:
+                        policy.hedge_won += 1
+                    # the latency of the request that answered, not of the whole hedged call
+                    policy.record(time.monotonic() - (backup_started_at if task is backup else started_at))
+                    return task.result()
+            return await primary  # both failed, raise the primary error
+        finally:
+            # also when the caller is cancelled while waiting
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
     async def post(
             self,
             url: str,
@@ -114,6 +202,7 @@ class AsyncHttp:
                 else:
                     result = await response.json()
 
+                tracing.mark_response()
                 return result
         except aiohttp.ClientResponseError as e:
             if hasattr(e, 'status') and e.status == 429:
@@ -0,0 +1,147 @@
+import re
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Pattern, Set, Tuple
+
+import settings
+from common import CoinSource
+
+EXCLUDE = 'exclude'
+INCLUDE = 'include'
+
+
+class Rule(NamedTuple):
+    '''Excludes a symbol, or includes it despite exclusions of the same scope.
+
+    A pattern wrapped in slashes, e.g. `/\\w?USD\\w?/`, is a regex matched from the symbol
+    start, others are exact symbols. A rule without source applies to every part, a symbol
+    passes when both those and its source rules allow it, so `exclude /.*/` with includes
+    of one source is a white list of that source.
+    '''
+    action: str
+    pattern: str
+    source: Optional[CoinSource] = None
+
+    @property
+    def is_regex(self) -> bool:
+        return len(self.pattern) > 2 and self.pattern.startswith('/') and self.pattern.endswith('/')
+
+    def __str__(self):
+        scope = self.source.name if self.source else 'all'
+        return f'{self.action} {self.pattern} ({scope})'
+
+
+class _Scope(NamedTuple):
+    excluded: FrozenSet[str]
+    excluded_regex: Optional[Pattern]
+    included: FrozenSet[str]
+
+
+def _compile_scope(rules: List[Rule]) -> _Scope:
+    excluded = frozenset(r.pattern for r in rules if r.action == EXCLUDE and not r.is_regex)
+    patterns = [r.pattern[1:-1] for r in rules if r.action == EXCLUDE and r.is_regex]
+    included = frozenset(r.pattern for r in rules if r.action == INCLUDE)
+    return _Scope(
+        excluded,
+        re.compile('|'.join(f'(?:{p})' for p in patterns)) if patterns else None,
+        included,
+    )
+
+
+class RuleEngine:
+    '''Exclusion and inclusion rules of detected symbols, compiled to one matcher per part source.
+
+    Verdicts are cached per (symbol, source), every rule change recompiles and drops the cache.
+    '''
+
+    def __init__(self, rules: Iterable[Rule] = ()):
+        self._rules: List[Rule] = []
+        self._scopes: Dict[Optional[CoinSource], _Scope] = {}
+        self._verdicts: Dict[Tuple[str, Optional[CoinSource]], bool] = {}
+        self.hits = 0
+        self.misses = 0
+        self.load(rules)
+
+    @property
+    def rules(self) -> List[Rule]:
+        return list(self._rules)
+
+    def load(self, rules: Iterable[Rule]):
+        rules = list(dict.fromkeys(rules))
+        for rule in rules:
+            self._validate(rule)
+        self._rules = rules
+        self._compile()
+
+    @staticmethod
+    def _validate(rule: Rule):
+        if rule.action not in (EXCLUDE, INCLUDE):
+            raise ValueError(f'unknown action {rule.action!r}')
+        if rule.is_regex:
+            if rule.action == INCLUDE:
+                raise ValueError('include rules take exact symbols')
+            re.compile(rule.pattern[1:-1])
+
+    def add(self, rule: Rule) -> bool:
+        self._validate(rule)
+        if rule in self._rules:
+            return False
+        self._rules.append(rule)
+        self._compile()
+        return True
+
+    def remove(self, rule: Rule) -> bool:
+        if rule not in self._rules:
+            return False
+        self._rules.remove(rule)
+        self._compile()
+        return True
+
+    def _compile(self):
+        by_source: Dict[Optional[CoinSource], List[Rule]] = {}
+        for rule in self._rules:
+            by_source.setdefault(rule.source, []).append(rule)
+        self._scopes = {source: _compile_scope(rules) for source, rules in by_source.items()}
+        self._verdicts = {}
+
+    def allowed(self, symbol: str, source: CoinSource = None) -> bool:
+        key = (symbol, source)
+        verdict = self._verdicts.get(key)
+        if verdict is not None:
+            self.hits += 1
+            return verdict
+
+        self.misses += 1
+        verdict = self._verdicts[key] = all(
+            self._scope_allows(scope, symbol)
+            for scope in (self._scopes.get(None), self._scopes.get(source) if source else None)
+            if scope
+        )
+        return verdict
+
+    @staticmethod
+    def _scope_allows(scope: _Scope, symbol: str) -> bool:
+        if symbol in scope.included:
+            return True
+        if symbol in scope.excluded:
+            return False
+        return not (scope.excluded_regex and scope.excluded_regex.match(symbol))
+
+    def filter(self, symbols: Iterable[str], source: CoinSource = None) -> Set[str]:
+        return {s for s in symbols if self.allowed(s, source)}
+
+    def __str__(self):
+        lines = [str(r) for r in self._rules] or ['no rules']
+        lines.append(f'{len(self._verdicts)} cached verdicts, {self.hits} hits, {self.misses} misses')
+        return '\n'.join(lines)
+
+
+def default_rules() -> List[Rule]:
+    '''Built-in exclusions, SYMBOLS_BLACK_LIST for every part and SYMBOLS_WHITE_LIST for the Upbit BTC channel.'''
+    rules = [Rule(EXCLUDE, s) for s in settings.EXCLUDED_COINS]
+    rules.append(Rule(EXCLUDE, r'/\w?USD\w?/'))
+    rules.extend(Rule(EXCLUDE, s) for s in sorted(settings.SYMBOLS_BLACK_LIST) if s)
+    rules.append(Rule(EXCLUDE, '/.*/', CoinSource.TG_CHNL_UPBIT_BTC))
+    rules.extend(Rule(INCLUDE, s, CoinSource.TG_CHNL_UPBIT_BTC) for s in sorted(settings.SYMBOLS_WHITE_LIST) if s)
+    return rules
+
+
+rules = RuleEngine(default_rules())
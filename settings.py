@@ -1,4 +1,5 @@
 import os
+from decimal import Decimal
 
 import dotenv
 
@@ -22,6 +23,18 @@ AUTHORIZED_USERS_TELEGRAM_IDS = tuple(int(u) for u in os.environ['AUTHORIZED_USE
 LOG_CHANNEL_ID = os.environ['LOG_CHANNEL_ID']
 BALANCE_SHOW_LIMIT_BTC = os.environ.get('BALANCE_SHOW_LIMIT_BTC', '0.005')
 
+# seconds between checks of credentials and phone numbers files for changes, 0 disables reload
+CONFIG_RELOAD_INTERVAL = float(os.environ.get('CONFIG_RELOAD_INTERVAL', 5))
+
+# trigger exchanges, their parts, poll delays, buy amounts and actions, see triggers.yaml.example
+TRIGGERS_FILE = os.environ.get('TRIGGERS_FILE', './triggers.yaml')
+
+# trigger exchanges to run when there is no TRIGGERS_FILE, the others are never imported
+TRIGGER_EXCHANGES = tuple(
+    i.strip() for i in os.environ.get('TRIGGER_EXCHANGES', 'coinbase,coinbase_pro,upbit,telegram').split(',')
+    if i.strip()
+)
+
 # trade
 PRICE_CHANGE_LIMIT_IN_PERCENT = int(os.environ.get('PRICE_CHANGE_LIMIT_IN_PERCENT', 25))
 
@@ -29,27 +42,100 @@ PRICE_CHANGE_LIMIT_IN_PERCENT = int(os.environ.get('PRICE_CHANGE_LIMIT_IN_PERCEN
 TWILIO_FROM_NUMBER = os.environ['TWILIO_FROM_NUMBER']
 TWILIO_ACCOUNT_SID = os.environ['TWILIO_ACCOUNT_SID']
 TWILIO_AUTH_KEY = os.environ['TWILIO_AUTH_KEY']
+TWILIO_API_URL = os.environ.get('TWILIO_API_URL', 'https://api.twilio.com')
+
+# alert calls: parallel calls, seconds a coin is not alerted again, seconds a number is not rung again
+ALERT_CONCURRENCY = int(os.environ.get('ALERT_CONCURRENCY', 10))
+ALERT_DEDUP_WINDOW = float(os.environ.get('ALERT_DEDUP_WINDOW', 600))
+ALERT_NUMBER_COOLDOWN = float(os.environ.get('ALERT_NUMBER_COOLDOWN', 60))
+
+# seconds per alert call attempt and retries of a failed call
+ALERT_CALL_TIMEOUT = float(os.environ.get('ALERT_CALL_TIMEOUT', 15))
+ALERT_CALL_RETRIES = int(os.environ.get('ALERT_CALL_RETRIES', 2))
 
 # trade exchange
 LIMIT_ORDER_MARKUP = int(os.environ.get('LIMIT_ORDER_MARKUP', 15))
 
+# trade exchange endpoints, point them at a simulator/ server to run without the real exchanges
+BINANCE_API_URL = os.environ.get('BINANCE_API_URL', 'https://api.binance.com')
+BINANCE_WS_URL = os.environ.get('BINANCE_WS_URL', 'wss://stream.binance.com:9443')
+HUOBI_API_URL = os.environ.get('HUOBI_API_URL', 'https://api.huobi.pro')
+HUOBI_WS_URL = os.environ.get('HUOBI_WS_URL', 'wss://api.huobi.pro')
+
+# independent ticker websocket connections per trade exchange, merged by event time
+TICKER_WS_CONNECTIONS = int(os.environ.get('TICKER_WS_CONNECTIONS', 1))
+
+# refresh pair ticker before buying when it is missing or older than this many seconds
+TICKER_MAX_AGE = float(os.environ.get('TICKER_MAX_AGE', 5))
+# max seconds to wait for refreshed ticker before giving up on it
+TICKER_REFRESH_TIMEOUT = float(os.environ.get('TICKER_REFRESH_TIMEOUT', 0.5))
+
+# renamed and aliased tickers as `alias:symbol` pairs, both sides of a listing are compared by symbol
+SYMBOL_ALIASES = dict(
+    tuple(x.strip().upper() for x in i.split(':'))
+    for i in os.environ.get('SYMBOL_ALIASES', 'BCHABC:BCH,BCC:BCH,BCHSV:BSV,XBT:BTC').split(',')
+    if i.strip()
+)
+# seconds between reloads of trade exchange market metadata for the symbol index
+MARKETS_UPDATE_INTERVAL = int(os.environ.get('MARKETS_UPDATE_INTERVAL', 60 * 60))
+
+# seconds to keep watching for pairs not listed yet when coin was detected, 0 disables
+PAIR_WATCH_WINDOW = int(os.environ.get('PAIR_WATCH_WINDOW', 120))
+
+# seconds of per-symbol price history kept from ticker websockets
+TICKER_HISTORY_SECONDS = int(os.environ.get('TICKER_HISTORY_SECONDS', 300))
+# short-horizon price change limits as `seconds:percent` pairs, e.g. 10:20,60:30,300:40
+SHORT_PRICE_CHANGE_LIMITS = tuple(
+    tuple(int(x) for x in i.split(':'))
+    for i in os.environ.get('SHORT_PRICE_CHANGE_LIMITS', '10:20,60:30,300:40').split(',')
+    if i.strip()
+)
+
+# seconds to keep pair depth stream open after the pair was checked for buying, 0 disables depth books
+ORDER_BOOK_TTL = int(os.environ.get('ORDER_BOOK_TTL', 600))
+# percent added to the price that fills order amount in the book, result is capped by LIMIT_ORDER_MARKUP
+ORDER_BOOK_PRICE_BUFFER = Decimal(os.environ.get('ORDER_BOOK_PRICE_BUFFER', '1'))
+# seconds first buy orders of a pair wait for its just opened book to sync, the wait is on the listing
+# critical path. 0 prices them by depth only if the book is already synced (opened by the pair watcher or
+# an earlier check), by the ticker markup otherwise
+ORDER_BOOK_SYNC_TIMEOUT = float(os.environ.get('ORDER_BOOK_SYNC_TIMEOUT', 0))
+
 DISABLE_BUY = bool(os.environ.get('DISABLE_BUY', False))
 
 ORDER_CANCEL_DELAY = int(os.environ.get('ORDER_CANCEL_DELAY', 15))
 
-# MEM
-# MEM_CHECK_INTERVAL = int(os.environ['MEM_CHECK_INTERVAL'])
+# parallel cancel requests per account when an exchange has no batch cancel endpoint
+ORDER_CANCEL_CONCURRENCY = int(os.environ.get('ORDER_CANCEL_CONCURRENCY', 5))
+
+# carry binance tickers and account streams of all accounts over shared combined-stream sockets
+BINANCE_STREAM_MUX = bool(int(os.environ.get('BINANCE_STREAM_MUX', 1)))
+
+# sign buy orders on a thread pool of this size, 0 signs inline on the event loop
+ORDER_SIGNING_THREADS = int(os.environ.get('ORDER_SIGNING_THREADS', 0))
+
+# decode large huobi websocket frames on a thread pool of this size, 0 decodes inline
+HUOBI_DECODE_THREADS = int(os.environ.get('HUOBI_DECODE_THREADS', 1))
+
+# MEM, memory reports every MEM_CHECK_INTERVAL seconds, 0 disables them and pympler is not imported
+MEM_CHECK_INTERVAL = int(os.environ.get('MEM_CHECK_INTERVAL', 0))
 # MEM_WATCH_LIMIT = int(os.environ['MEM_WATCH_LIMIT'])
 # MEM_EXIT_LIMIT = int(os.environ['MEM_EXIT_LIMIT'])
-# MEM_OBJECTS_COUNT_LIMIT = int(os.environ['MEM_OBJECTS_COUNT_LIMIT'])
+MEM_OBJECTS_COUNT_LIMIT = int(os.environ.get('MEM_OBJECTS_COUNT_LIMIT', 100))
 
-# parse jayden channel
+# parse jayden channel, only needed with the telegram trigger exchange
 
-LISTEN_CHANNEL_ID = int(os.environ['LISTEN_CHANNEL_ID'])
+LISTEN_CHANNEL_ID = int(os.environ.get('LISTEN_CHANNEL_ID', 0))
 
-# symbols black&white lists
+# symbols never bought, detections of them are renames or stablecoins
+EXCLUDED_COINS = set(
+    i.strip() for i in os.environ.get('EXCLUDED_COINS', 'BTC,ETH,KRW,PAX,DAI,BCH,BSV,PST,BTT,CELR').split(',')
+    if i.strip()
+)
+# symbols never bought from any trigger part; before the rule engine it only filtered the telegram handler.
+# Rules can be edited with bot commands
 SYMBOLS_BLACK_LIST = set(i.strip() for i in os.environ.get('SYMBOLS_BLACK_LIST', '').split(','))
+# the only symbols let through the upbit BTC channel, empty lets nothing through
 SYMBOLS_WHITE_LIST = set(i.strip() for i in os.environ.get('SYMBOLS_WHITE_LIST', '').split(','))
 
-UPBIT_KRW_PRICE_CHANGE_LIMIT = int(os.environ['UPBIT_KRW_PRICE_CHANGE_LIMIT'])
-UPBIT_BTC_PRICE_CHANGE_LIMIT = int(os.environ['UPBIT_BTC_PRICE_CHANGE_LIMIT'])
+UPBIT_KRW_PRICE_CHANGE_LIMIT = int(os.environ.get('UPBIT_KRW_PRICE_CHANGE_LIMIT', PRICE_CHANGE_LIMIT_IN_PERCENT))
+UPBIT_BTC_PRICE_CHANGE_LIMIT = int(os.environ.get('UPBIT_BTC_PRICE_CHANGE_LIMIT', PRICE_CHANGE_LIMIT_IN_PERCENT))
@@ -0,0 +1,291 @@
+import asyncio
+import itertools
+import random
+import time
+from abc import ABC, abstractmethod
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Set
+
+from aiohttp import web
+
+from common import Balance
+
+
+class SimulatorConfig(NamedTuple):
+    # seconds added to every REST response, plus up to `jitter` random seconds
+    latency: float = 0
+    jitter: float = 0
+    # REST requests per second per api key, 0 is unlimited
+    rate_limit: int = 0
+    # seconds between ticker stream pushes of every market
+    ticker_interval: float = 1
+
+
+class SimulatedMarket:
+    def __init__(self, base: str, quote: str, price: Decimal, open_price: Decimal = None):
+        self.base = base
+        self.quote = quote
+        self.price = price
+        self.open_price = open_price or price
+
+    @property
+    def change_percent(self) -> Decimal:
+        return ((self.price / self.open_price - 1) * 100).quantize(Decimal('.01'))
+
+
+class SimulatedOrder(NamedTuple):
+    id: str
+    symbol: str
+    qty: Decimal
+    price: Decimal
+    created_at: float
+
+
+class SimulatedAccount:
+    '''Balances and open limit orders of one api key, open orders lock their quote amount.'''
+
+    def __init__(self, account_id: int, api_key: str, balances: Dict[str, Decimal]):
+        self.id = account_id
+        self.api_key = api_key
+        self.balances = {asset: Balance(free, Decimal(0)) for asset, free in balances.items()}
+        self.orders: Dict[str, SimulatedOrder] = {}
+        # names of streams carrying this account updates
+        self.streams: Set[str] = set()
+
+    def lock(self, asset: str, amount: Decimal) -> bool:
+        balance = self.balances.get(asset)
+        if balance is None or balance.free < amount:
+            return False
+        self.balances[asset] = Balance(balance.free - amount, balance.locked + amount)
+        return True
+
+    def unlock(self, asset: str, amount: Decimal):
+        balance = self.balances[asset]
+        self.balances[asset] = Balance(balance.free + amount, balance.locked - amount)
+
+
+class _RateLimiter:
+    '''Fixed one second windows per key.'''
+
+    def __init__(self, limit: int):
+        self._limit = limit
+        self._windows: Dict[str, List] = {}
+
+    def allow(self, key: str) -> bool:
+        if not self._limit:
+            return True
+        now = int(time.monotonic())
+        window = self._windows.setdefault(key, [now, 0])
+        if window[0] != now:
+            window[0], window[1] = now, 0
+        window[1] += 1
+        return window[1] <= self._limit
+
+
+class SimulatorStats:
+    def __init__(self):
+        self.requests = 0
+        self.rate_limited = 0
+        self.orders = 0
+        self.canceled = 0
+        # monotonic arrival times of order requests, for fan-out spread
+        self.order_times: List[float] = []
+
+    def __str__(self):
+        spread = (max(self.order_times) - min(self.order_times)) * 1000 if self.order_times else 0
+        return (
+            f'{self.requests} requests, {self.rate_limited} rate limited, '
+            f'{self.orders} orders arriving over {spread:.1f} ms, {self.canceled} canceled'
+        )
+
+
+class StreamConnection:
+    '''Server side of one websocket, sends frames in order from its own queue.'''
+
+    def __init__(self, ws: web.WebSocketResponse, streams: Set[str], tag: str = None):
+        self.ws = ws
+        self.streams = streams
+        # protocol variant of the connection, e.g. combined streams
+        self.tag = tag
+        self._queue: 'asyncio.Queue[Any]' = asyncio.Queue()
+        self._task = asyncio.ensure_future(self._send_loop())
+
+    def send(self, frame: Any):
+        self._queue.put_nowait(frame)
+
+    async def _send_loop(self):
+        while True:
+            frame = await self._queue.get()
+            if isinstance(frame, bytes):
+                await self.ws.send_bytes(frame)
+            else:
+                await self.ws.send_str(frame)
+
+    def close(self):
+        self._task.cancel()
+
+
+class BaseSimulator(ABC):
+    '''Local stand-in of an exchange REST and websocket API for load and latency tests.
+
+    Subclasses add the routes of the API subset our clients use. Accounts are created with
+    `add_account`, markets with `list_market`, a listed market is pushed to ticker streams
+    right away, every market again every `ticker_interval` seconds.
+    '''
+    name: str = None
+    RATE_LIMIT_CODE: Any = None
+
+    def __init__(self, config: SimulatorConfig = SimulatorConfig()):
+        self.config = config
+        self.markets: Dict[str, SimulatedMarket] = {}
+        self.accounts: Dict[str, SimulatedAccount] = {}
+        self.stats = SimulatorStats()
+        self._account_ids = itertools.count(1000)
+        self._order_ids = itertools.count(1)
+        self._limiter = _RateLimiter(config.rate_limit)
+        self._connections: Set[StreamConnection] = set()
+        self._runner: web.AppRunner = None
+        self._ticker_task: asyncio.Task = None
+        self.address: str = None
+
+        self.app = web.Application(middlewares=[self._middleware])
+        self._add_routes(self.app.router)
+
+    @abstractmethod
+    def _add_routes(self, router: web.UrlDispatcher):
+        '''Adds REST and websocket routes of the simulated API.'''
+
+    @abstractmethod
+    def _api_key(self, request: web.Request) -> Optional[str]:
+        '''Returns api key of the request, None for public endpoints.'''
+
+    @abstractmethod
+    def _error(self, status: int, code: Any, message: str) -> web.Response:
+        '''Returns error response in the exchange format.'''
+
+    @abstractmethod
+    def symbol(self, market: SimulatedMarket) -> str:
+        '''Returns exchange symbol of the market.'''
+
+    @abstractmethod
+    def _publish_tickers(self, markets: List[SimulatedMarket]):
+        '''Pushes markets to subscribed ticker streams.'''
+
+    def _notify_order(self, account: SimulatedAccount, order: SimulatedOrder, status: str):
+        '''Pushes order update to account streams.'''
+
+    def _notify_balance(self, account: SimulatedAccount, assets: List[str]):
+        '''Pushes balance update to account streams.'''
+
+    def add_account(self, api_key: str, balances: Dict[str, Decimal]) -> SimulatedAccount:
+        account = self.accounts[api_key] = SimulatedAccount(next(self._account_ids), api_key, balances)
+        return account
+
+    def list_market(self, base: str, quote: str, price: Decimal, open_price: Decimal = None) -> SimulatedMarket:
+        market = SimulatedMarket(base, quote, price, open_price)
+        self.markets[self.symbol(market)] = market
+        self._publish_tickers([market])
+        return market
+
+    @property
+    def http_url(self) -> str:
+        return f'http://{self.address}'
+
+    @property
+    def ws_url(self) -> str:
+        return f'ws://{self.address}'
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> str:
+        '''Starts serving, returns `host:port`, a zero port picks a free one.'''
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.address = f'{host}:{port}'
+        self._ticker_task = asyncio.ensure_future(self._ticker_loop())
+        return self.address
+
+    async def close(self):
+        if self._ticker_task:
+            self._ticker_task.cancel()
+        for connection in list(self._connections):
+            connection.close()
+            await connection.ws.close()
+        if self._runner:
+            await self._runner.cleanup()
+
+    async def _ticker_loop(self):
+        while True:
+            await asyncio.sleep(self.config.ticker_interval)
+            if self.markets:
+                self._publish_tickers(list(self.markets.values()))
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler):
+        if request.headers.get('Upgrade', '').lower() == 'websocket':
+            return await handler(request)
+
+        self.stats.requests += 1
+        if not self._limiter.allow(self._api_key(request) or request.remote):
+            self.stats.rate_limited += 1
+            return self._error(429, self.RATE_LIMIT_CODE, 'Too many requests')
+
+        if self.config.latency or self.config.jitter:
+            await asyncio.sleep(self.config.latency + random.uniform(0, self.config.jitter))
+        return await handler(request)
+
+    def _account(self, request: web.Request) -> Optional[SimulatedAccount]:
+        return self.accounts.get(self._api_key(request))
+
+    def create_order(self, account: SimulatedAccount, symbol: str, qty: Decimal, price: Decimal) -> Optional[str]:
+        '''Opens limit buy order, returns None when the market is unknown or balance is short.'''
+        self.stats.orders += 1
+        self.stats.order_times.append(time.monotonic())
+        market = self.markets.get(symbol)
+        if market is None or not account.lock(market.quote, qty * price):
+            return None
+
+        order = SimulatedOrder(str(next(self._order_ids)), symbol, qty, price, time.time())
+        account.orders[order.id] = order
+        self._notify_order(account, order, 'NEW')
+        self._notify_balance(account, [market.quote])
+        return order.id
+
+    def cancel_order(self, account: SimulatedAccount, order_id: str) -> Optional[SimulatedOrder]:
+        order = account.orders.pop(str(order_id), None)
+        if order is None:
+            return None
+        self.stats.canceled += 1
+        market = self.markets[order.symbol]
+        account.unlock(market.quote, order.qty * order.price)
+        self._notify_order(account, order, 'CANCELED')
+        self._notify_balance(account, [market.quote])
+        return order
+
+    def _broadcast(self, stream: str, frame_for: Callable[[StreamConnection], Any]):
+        '''Sends `frame_for(connection)` to connections subscribed to stream, None skips one.'''
+        for connection in self._connections:
+            if stream in connection.streams:
+                frame = frame_for(connection)
+                if frame is not None:
+                    connection.send(frame)
+
+    async def _serve_ws(self, request: web.Request, streams: Set[str], on_message=None,
+                        tag: str = None) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        connection = StreamConnection(ws, streams, tag)
+        self._connections.add(connection)
+        try:
+            self._on_connect(connection)
+            async for msg in ws:
+                if on_message:
+                    await on_message(connection, msg)
+        finally:
+            self._connections.discard(connection)
+            connection.close()
+        return ws
+
+    def _on_connect(self, connection: StreamConnection):
+        '''Sends initial frames of the connection streams.'''
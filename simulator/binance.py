@@ -0,0 +1,257 @@
+import time
+import uuid
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, List
+
+import ujson
+from aiohttp import web, WSMsgType
+
+from simulator.base import BaseSimulator, SimulatedAccount, SimulatedMarket, SimulatedOrder, StreamConnection
+
+_COMBINED = 'combined'
+
+
+def _ms() -> int:
+    return int(time.time() * 1000)
+
+
+class BinanceSimulator(BaseSimulator):
+    '''Binance REST api v1/v3 subset of aiobinance and the trade exchange, raw and combined streams.'''
+    name = 'binance'
+    RATE_LIMIT_CODE = -1003
+
+    def _add_routes(self, router: web.UrlDispatcher):
+        router.add_get('/api/v1/ping', self.ping)
+        router.add_get('/api/v1/ticker/24hr', self.ticker_24h)
+        router.add_get('/api/v1/exchangeInfo', self.exchange_info)
+        router.add_get('/api/v1/depth', self.depth)
+        router.add_post('/api/v1/userDataStream', self.create_listen_key)
+        router.add_put('/api/v1/userDataStream', self.keepalive_listen_key)
+        router.add_delete('/api/v1/userDataStream', self.close_listen_key)
+        router.add_get('/api/v3/account', self.account)
+        router.add_post('/api/v3/order', self.order_create)
+        router.add_delete('/api/v3/order', self.order_cancel)
+        router.add_get('/api/v3/openOrders', self.open_orders)
+        router.add_delete('/api/v3/openOrders', self.open_orders_cancel)
+        router.add_get('/ws/{stream}', self.ws_raw)
+        router.add_get('/stream', self.ws_combined)
+
+    def _api_key(self, request: web.Request):
+        return request.headers.get('X-MBX-APIKEY')
+
+    def _error(self, status: int, code: Any, message: str) -> web.Response:
+        return web.json_response({'code': code, 'msg': message}, status=status)
+
+    def symbol(self, market: SimulatedMarket) -> str:
+        return f'{market.base}{market.quote}'
+
+    def _signed_account(self, request: web.Request) -> SimulatedAccount:
+        account = self._account(request)
+        if account is None or 'signature' not in request.query:
+            raise web.HTTPUnauthorized(
+                text=ujson.dumps({'code': -2015, 'msg': 'Invalid API-key, IP, or permissions for action.'}),
+                content_type='application/json'
+            )
+        return account
+
+    @staticmethod
+    def _ticker(symbol: str, market: SimulatedMarket) -> Dict:
+        return {
+            'symbol': symbol,
+            'priceChangePercent': str(market.change_percent),
+            'lastPrice': str(market.price),
+            'askPrice': str(market.price),
+            'openPrice': str(market.open_price),
+        }
+
+    @staticmethod
+    def _order(order: SimulatedOrder, status: str) -> Dict:
+        return {
+            'symbol': order.symbol,
+            'orderId': int(order.id),
+            'clientOrderId': f'sim{order.id}',
+            'transactTime': int(order.created_at * 1000),
+            'price': str(order.price),
+            'origQty': str(order.qty),
+            'executedQty': '0',
+            'status': status,
+            'timeInForce': 'GTC',
+            'type': 'LIMIT',
+            'side': 'BUY',
+        }
+
+    async def ping(self, request: web.Request):
+        return web.json_response({})
+
+    async def ticker_24h(self, request: web.Request):
+        symbol = request.query.get('symbol')
+        if symbol is None:
+            return web.json_response([self._ticker(s, m) for s, m in self.markets.items()])
+        if symbol not in self.markets:
+            return self._error(400, -1121, 'Invalid symbol.')
+        return web.json_response(self._ticker(symbol, self.markets[symbol]))
+
+    async def exchange_info(self, request: web.Request):
+        return web.json_response({
+            'serverTime': _ms(),
+            'symbols': [
+                {'symbol': s, 'status': 'TRADING', 'baseAsset': m.base, 'quoteAsset': m.quote}
+                for s, m in self.markets.items()
+            ]
+        })
+
+    async def depth(self, request: web.Request):
+        market = self.markets.get(request.query.get('symbol'))
+        if market is None:
+            return self._error(400, -1121, 'Invalid symbol.')
+        return web.json_response({'lastUpdateId': 1, 'bids': [], 'asks': [[str(market.price), '1000000']]})
+
+    async def create_listen_key(self, request: web.Request):
+        account = self._account(request)
+        if account is None:
+            return self._error(401, -2015, 'Invalid API-key, IP, or permissions for action.')
+        listen_key = uuid.uuid4().hex
+        account.streams.add(listen_key)
+        return web.json_response({'listenKey': listen_key})
+
+    async def keepalive_listen_key(self, request: web.Request):
+        return web.json_response({})
+
+    async def close_listen_key(self, request: web.Request):
+        account = self._account(request)
+        if account:
+            account.streams.discard(request.query.get('listenKey'))
+        return web.json_response({})
+
+    async def account(self, request: web.Request):
+        account = self._signed_account(request)
+        return web.json_response({
+            'canTrade': True,
+            'balances': [
+                {'asset': asset, 'free': str(b.free), 'locked': str(b.locked)}
+                for asset, b in account.balances.items()
+            ]
+        })
+
+    async def order_create(self, request: web.Request):
+        account = self._signed_account(request)
+        symbol = request.query.get('symbol')
+        try:
+            qty, price = Decimal(request.query['quantity']), Decimal(request.query['price'])
+        except (KeyError, InvalidOperation):
+            return self._error(400, -1102, 'Mandatory parameter quantity or price was not sent or malformed.')
+        if symbol not in self.markets:
+            return self._error(400, -1121, 'Invalid symbol.')
+
+        order_id = self.create_order(account, symbol, qty, price)
+        if order_id is None:
+            return self._error(400, -2010, 'Account has insufficient balance for requested action.')
+        return web.json_response(self._order(account.orders[order_id], 'NEW'))
+
+    async def order_cancel(self, request: web.Request):
+        account = self._signed_account(request)
+        order = self.cancel_order(account, request.query.get('orderId'))
+        if order is None:
+            return self._error(400, -2011, 'Unknown order sent.')
+        return web.json_response(self._order(order, 'CANCELED'))
+
+    async def open_orders(self, request: web.Request):
+        account = self._signed_account(request)
+        symbol = request.query.get('symbol')
+        return web.json_response([
+            self._order(o, 'NEW') for o in account.orders.values() if symbol is None or o.symbol == symbol
+        ])
+
+    async def open_orders_cancel(self, request: web.Request):
+        account = self._signed_account(request)
+        symbol = request.query.get('symbol')
+        order_ids = [o.id for o in account.orders.values() if o.symbol == symbol]
+        if not order_ids:
+            return self._error(400, -2011, 'Unknown order sent.')
+        return web.json_response([self._order(self.cancel_order(account, i), 'CANCELED') for i in order_ids])
+
+    async def ws_raw(self, request: web.Request):
+        return await self._serve_ws(request, {request.match_info['stream']})
+
+    async def ws_combined(self, request: web.Request):
+        streams = {s for s in request.query.get('streams', '').split('/') if s}
+        return await self._serve_ws(request, streams, self._on_combined_message, tag=_COMBINED)
+
+    @staticmethod
+    async def _on_combined_message(connection: StreamConnection, msg):
+        if msg.type != WSMsgType.TEXT:
+            return
+        data = ujson.loads(msg.data)
+        if data.get('method') == 'SUBSCRIBE':
+            connection.streams.update(data['params'])
+        elif data.get('method') == 'UNSUBSCRIBE':
+            connection.streams.difference_update(data['params'])
+        connection.send(ujson.dumps({'result': None, 'id': data.get('id')}))
+
+    @staticmethod
+    def _frame(connection: StreamConnection, stream: str, data: Any) -> str:
+        return ujson.dumps({'stream': stream, 'data': data} if connection.tag == _COMBINED else data)
+
+    def _publish(self, stream: str, data: Any):
+        # one encoding per connection kind
+        frames = {}
+
+        def frame_for(connection: StreamConnection):
+            frame = frames.get(connection.tag)
+            if frame is None:
+                frame = frames[connection.tag] = self._frame(connection, stream, data)
+            return frame
+
+        self._broadcast(stream, frame_for)
+
+    def _ticker_event(self, market: SimulatedMarket, now: int) -> Dict:
+        return {
+            'e': '24hrTicker',
+            'E': now,
+            's': self.symbol(market),
+            'P': str(market.change_percent),
+            'c': str(market.price),
+            'a': str(market.price),
+            'o': str(market.open_price),
+        }
+
+    def _publish_tickers(self, markets: List[SimulatedMarket]):
+        now = _ms()
+        events = [self._ticker_event(m, now) for m in markets]
+        for event in events:
+            self._publish(f'{event["s"].lower()}@ticker', event)
+        self._publish('!ticker@arr', events)
+
+    def _on_connect(self, connection: StreamConnection):
+        # single pair ticker streams start with the current ticker
+        for stream in connection.streams:
+            symbol, _, kind = stream.partition('@')
+            market = self.markets.get(symbol.upper())
+            if kind == 'ticker' and market:
+                connection.send(self._frame(connection, stream, self._ticker_event(market, _ms())))
+
+    def _notify_order(self, account: SimulatedAccount, order: SimulatedOrder, status: str):
+        event = {
+            'e': 'executionReport',
+            'E': _ms(),
+            's': order.symbol,
+            'S': 'BUY',
+            'o': 'LIMIT',
+            'X': status,
+            'i': int(order.id),
+            'q': str(order.qty),
+            'p': str(order.price),
+            'z': '0',
+            'Z': '0',
+        }
+        for listen_key in account.streams:
+            self._publish(listen_key, event)
+
+    def _notify_balance(self, account: SimulatedAccount, assets: List[str]):
+        event = {
+            'e': 'outboundAccountInfo',
+            'E': _ms(),
+            'B': [{'a': a, 'f': str(b.free), 'l': str(b.locked)} for a, b in account.balances.items()],
+        }
+        for listen_key in account.streams:
+            self._publish(listen_key, event)
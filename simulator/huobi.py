@@ -0,0 +1,275 @@
+import gzip
+import time
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, List, Optional
+
+import ujson
+from aiohttp import web, WSMsgType
+
+from simulator.base import BaseSimulator, SimulatedAccount, SimulatedMarket, SimulatedOrder, StreamConnection
+
+_MARKET = 'market'
+_ACCOUNT = 'account'
+
+
+def _ms() -> int:
+    return int(time.time() * 1000)
+
+
+def _frame(data: Any) -> bytes:
+    return gzip.compress(ujson.dumps(data).encode(), compresslevel=1)
+
+
+class HuobiSimulator(BaseSimulator):
+    '''Huobi REST subset of aiohuobi and the trade exchange, gzipped market and account v1 streams.
+
+    Account streams authenticate with the access key only, signatures are not checked.
+    '''
+    name = 'huobi'
+    RATE_LIMIT_CODE = 'api-rate-limit'
+    PRICE_PRECISION = 8
+    AMOUNT_PRECISION = 4
+
+    def _add_routes(self, router: web.UrlDispatcher):
+        router.add_get('/v1/common/symbols', self.symbols)
+        router.add_get('/market/tickers', self.tickers)
+        router.add_get('/market/detail/merged', self.detail_merged)
+        router.add_get('/v1/account/accounts', self.accounts_list)
+        router.add_get('/v1/account/accounts/{account_id}/balance', self.balance)
+        router.add_post('/v1/order/orders/place', self.order_place)
+        router.add_post('/v1/order/orders/batchcancel', self.orders_batch_cancel)
+        router.add_post('/v1/order/orders/{order_id}/submitcancel', self.order_cancel)
+        router.add_get('/v1/order/openOrders', self.open_orders)
+        router.add_get('/ws', self.ws_market)
+        router.add_get('/ws/v1', self.ws_account)
+
+    def _api_key(self, request: web.Request):
+        return request.query.get('AccessKeyId')
+
+    def _error(self, status: int, code: Any, message: str) -> web.Response:
+        return web.json_response({'status': 'error', 'err-code': code, 'err-msg': message}, status=status)
+
+    @staticmethod
+    def _ok(data: Any) -> web.Response:
+        return web.json_response({'status': 'ok', 'data': data})
+
+    def symbol(self, market: SimulatedMarket) -> str:
+        return f'{market.base}{market.quote}'.lower()
+
+    def _signed_account(self, request: web.Request) -> SimulatedAccount:
+        account = self._account(request)
+        if account is None or 'Signature' not in request.query:
+            raise web.HTTPOk(
+                text=ujson.dumps({'status': 'error', 'err-code': 'api-signature-not-valid', 'err-msg': 'invalid key'}),
+                content_type='application/json'
+            )
+        return account
+
+    @staticmethod
+    async def _body(request: web.Request) -> Dict:
+        text = await request.text()
+        return ujson.loads(text) if text else {}
+
+    @staticmethod
+    def _tick(market: SimulatedMarket) -> Dict:
+        return {
+            'open': float(market.open_price),
+            'close': float(market.price),
+            'high': float(max(market.price, market.open_price)),
+            'low': float(min(market.price, market.open_price)),
+        }
+
+    @staticmethod
+    def _order(account: SimulatedAccount, order: SimulatedOrder, state: str) -> Dict:
+        return {
+            'id': int(order.id),
+            'account-id': account.id,
+            'symbol': order.symbol,
+            'type': 'buy-limit',
+            'price': str(order.price),
+            'amount': str(order.qty),
+            'state': state,
+            'created-at': int(order.created_at * 1000),
+        }
+
+    async def symbols(self, request: web.Request):
+        return self._ok([
+            {
+                'base-currency': m.base.lower(),
+                'quote-currency': m.quote.lower(),
+                'symbol': s,
+                'state': 'online',
+                'price-precision': self.PRICE_PRECISION,
+                'amount-precision': self.AMOUNT_PRECISION,
+            }
+            for s, m in self.markets.items()
+        ])
+
+    async def tickers(self, request: web.Request):
+        return web.json_response({
+            'status': 'ok',
+            'ts': _ms(),
+            'data': [{'symbol': s, **self._tick(m)} for s, m in self.markets.items()],
+        })
+
+    async def detail_merged(self, request: web.Request):
+        market = self.markets.get(request.query.get('symbol'))
+        if market is None:
+            return self._error(200, 'invalid-parameter', 'invalid symbol')
+        return web.json_response({'status': 'ok', 'ts': _ms(), 'tick': self._tick(market)})
+
+    async def accounts_list(self, request: web.Request):
+        account = self._signed_account(request)
+        return self._ok([{'id': account.id, 'type': 'spot', 'state': 'working'}])
+
+    async def balance(self, request: web.Request):
+        account = self._signed_account(request)
+        if request.match_info['account_id'] != str(account.id):
+            return self._error(200, 'account-frozen-account-inexistent-error', 'account for id is not found')
+        return self._ok({
+            'id': account.id,
+            'type': 'spot',
+            'state': 'working',
+            'list': [
+                {'currency': asset.lower(), 'type': typ, 'balance': str(amount)}
+                for asset, b in account.balances.items()
+                for typ, amount in (('trade', b.free), ('frozen', b.locked))
+            ],
+        })
+
+    async def order_place(self, request: web.Request):
+        account = self._signed_account(request)
+        body = await self._body(request)
+        symbol = body.get('symbol')
+        try:
+            amount, price = Decimal(body['amount']), Decimal(body['price'])
+        except (KeyError, InvalidOperation):
+            amount, price = None, None
+        if not amount or not price:
+            return self._error(200, 'invalid-amount', 'amount or price is invalid')
+        if symbol not in self.markets:
+            return self._error(200, 'base-symbol-error', 'The symbol is invalid')
+
+        # our buy limit orders send the quote amount, lock exactly that
+        order_id = self.create_order(account, symbol, amount / price, price)
+        if order_id is None:
+            return self._error(200, 'account-frozen-balance-insufficient-error', 'trade account balance is not enough')
+        return self._ok(order_id)
+
+    async def order_cancel(self, request: web.Request):
+        account = self._signed_account(request)
+        order_id = request.match_info['order_id']
+        if self.cancel_order(account, order_id) is None:
+            return self._error(200, 'order-orderstate-error', 'the order state is error')
+        return self._ok(order_id)
+
+    async def orders_batch_cancel(self, request: web.Request):
+        account = self._signed_account(request)
+        success, failed = [], []
+        for order_id in (await self._body(request)).get('order-ids', [])[:50]:
+            if self.cancel_order(account, order_id) is None:
+                failed.append({'order-id': order_id, 'err-code': 'order-orderstate-error', 'err-msg': 'not found'})
+            else:
+                success.append(order_id)
+        return self._ok({'success': success, 'failed': failed})
+
+    async def open_orders(self, request: web.Request):
+        account = self._signed_account(request)
+        return self._ok([self._order(account, o, 'submitted') for o in account.orders.values()])
+
+    async def ws_market(self, request: web.Request):
+        return await self._serve_ws(request, set(), self._on_market_message, tag=_MARKET)
+
+    async def ws_account(self, request: web.Request):
+        return await self._serve_ws(request, set(), self._on_account_message, tag=_ACCOUNT)
+
+    async def _on_market_message(self, connection: StreamConnection, msg):
+        if msg.type != WSMsgType.TEXT:
+            return
+        data = ujson.loads(msg.data)
+        channel = data.get('sub')
+        if not channel:
+            return
+
+        market = self._channel_market(channel)
+        if channel != 'market.tickers' and market is None:
+            connection.send(_frame({'status': 'error', 'err-code': 'bad-request', 'err-msg': f'invalid topic {channel}'}))
+            return
+
+        connection.streams.add(channel)
+        connection.send(_frame({'id': data.get('id'), 'status': 'ok', 'subbed': channel, 'ts': _ms()}))
+        if channel.endswith('.detail'):
+            connection.send(_frame({'ch': channel, 'ts': _ms(), 'tick': self._tick(market)}))
+        elif channel.endswith('.depth.step0'):
+            connection.send(_frame({
+                'ch': channel,
+                'ts': _ms(),
+                'tick': {'bids': [], 'asks': [[float(market.price), 1000000.0]], 'version': 1},
+            }))
+
+    def _channel_market(self, channel: str) -> Optional[SimulatedMarket]:
+        parts = channel.split('.')
+        return self.markets.get(parts[1]) if len(parts) > 2 else None
+
+    async def _on_account_message(self, connection: StreamConnection, msg):
+        if msg.type != WSMsgType.TEXT:
+            return
+        data = ujson.loads(msg.data)
+        op = data.get('op')
+        if op == 'auth':
+            account = self.accounts.get(data.get('AccessKeyId'))
+            if account is None:
+                connection.send(_frame({'op': 'auth', 'err-code': 2002, 'err-msg': 'invalid.auth.state'}))
+                return
+            # the account stream of a connection is named after its access key
+            connection.streams.add(account.api_key)
+            account.streams.add(account.api_key)
+            connection.send(_frame({'op': 'auth', 'err-code': 0, 'data': {'user-id': account.id}}))
+        elif op == 'sub':
+            connection.send(_frame({'op': 'sub', 'topic': data.get('topic'), 'err-code': 0, 'ts': _ms()}))
+
+    def _publish_tickers(self, markets: List[SimulatedMarket]):
+        ts = _ms()
+        frame = _frame({
+            'ch': 'market.tickers',
+            'ts': ts,
+            'data': [{'symbol': self.symbol(m), **self._tick(m)} for m in markets],
+        })
+        self._broadcast('market.tickers', lambda connection: frame)
+        for market in markets:
+            channel = f'market.{self.symbol(market)}.detail'
+            detail = _frame({'ch': channel, 'ts': ts, 'tick': self._tick(market)})
+            self._broadcast(channel, lambda connection: detail)
+
+    def _notify_order(self, account: SimulatedAccount, order: SimulatedOrder, status: str):
+        frame = _frame({
+            'op': 'notify',
+            'topic': f'orders.{order.symbol}',
+            'ts': _ms(),
+            'data': {
+                'order-id': int(order.id),
+                'symbol': order.symbol,
+                'account-id': account.id,
+                'order-type': 'buy-limit',
+                'order-amount': str(order.qty),
+                'price': str(order.price),
+                'order-state': 'submitted' if status == 'NEW' else 'canceled',
+            },
+        })
+        self._broadcast(account.api_key, lambda connection: frame)
+
+    def _notify_balance(self, account: SimulatedAccount, assets: List[str]):
+        frame = _frame({
+            'op': 'notify',
+            'topic': 'accounts',
+            'ts': _ms(),
+            'data': {
+                'event': 'order.place',
+                'list': [
+                    {'account-id': account.id, 'currency': asset.lower(), 'type': typ, 'balance': str(amount)}
+                    for asset in assets
+                    for typ, amount in (('trade', account.balances[asset].free), ('frozen', account.balances[asset].locked))
+                ],
+            },
+        })
+        self._broadcast(account.api_key, lambda connection: frame)
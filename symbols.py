@@ -0,0 +1,69 @@
+from typing import Callable, Dict, Iterable, NamedTuple, Optional, Sequence, Tuple
+
+import settings
+
+
+def canonical_symbol(symbol: str) -> str:
+    '''Symbol an asset is known by on every exchange, renamed tickers map to their current name.'''
+    symbol = symbol.strip().upper()
+    return settings.SYMBOL_ALIASES.get(symbol, symbol)
+
+
+class Market(NamedTuple):
+    base: str
+    quote: str
+    pair: str
+    trading: bool = True
+
+
+class SymbolIndex:
+    '''Exchange pair identifiers by canonical (base, quote), built from exchange market metadata.
+
+    Lookups are single dict reads. Pairs missing from metadata, i.e. not listed yet, fall back
+    to the exchange `make_pair` format so they can still be watched until they are listed.
+    '''
+
+    def __init__(self, make_pair: Callable[[str, str], str]):
+        self._make_pair = make_pair
+        self._pairs: Dict[Tuple[str, str], str] = {}
+        # pair -> canonical (base, quote)
+        self._assets: Dict[str, Tuple[str, str]] = {}
+
+    def load(self, markets: Iterable[Sequence]):
+        '''Replaces the index with (base, quote, pair[, trading]) markets as the exchange names them.
+
+        When aliases map two markets to the same canonical pair, the trading one wins, then the
+        one listed under the canonical names.
+        '''
+        chosen: Dict[Tuple[str, str], Market] = {}
+        assets = {}
+        for market in markets:
+            market = Market(*market)
+            key = canonical_symbol(market.base), canonical_symbol(market.quote)
+            assets[market.pair] = key
+            current = chosen.get(key)
+            if current is None or self._rank(market, key) > self._rank(current, key):
+                chosen[key] = market
+        self._pairs = {key: market.pair for key, market in chosen.items()}
+        self._assets = assets
+
+    @staticmethod
+    def _rank(market: Market, key: Tuple[str, str]) -> Tuple[bool, bool]:
+        return market.trading, (market.base.upper(), market.quote.upper()) == key
+
+    def __len__(self):
+        return len(self._pairs)
+
+    def pair(self, base: str, quote: str) -> str:
+        pair = self._pairs.get((base, quote))
+        if pair is None:
+            # not listed under any alias, the exchange names it as given
+            pair = self._pairs.get((canonical_symbol(base), canonical_symbol(quote))) or self._make_pair(base, quote)
+        return pair
+
+    def listed(self, base: str, quote: str) -> bool:
+        return (canonical_symbol(base), canonical_symbol(quote)) in self._pairs
+
+    def assets(self, pair: str) -> Optional[Tuple[str, str]]:
+        '''Returns canonical (base, quote) of a listed pair.'''
+        return self._assets.get(pair)
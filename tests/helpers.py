@@ -0,0 +1,61 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+
+from simulator.base import BaseSimulator
+
+
+class Trigger:
+    '''Trigger exchange stand-in for buys, spends 10% of every quote.'''
+    name = 'test'
+
+    @staticmethod
+    def buy_amount_percent(quote_symbol: str) -> int:
+        return 10
+
+
+async def wait_for(condition, timeout: float = 5):
+    '''Waits until `condition()` is true, fails the test after `timeout` seconds.'''
+    loop = asyncio.get_event_loop()
+    deadline = loop.time() + timeout
+    while not condition():
+        if loop.time() > deadline:
+            raise AssertionError(f'condition not met in {timeout}s')
+        await asyncio.sleep(0.01)
+
+
+class SimulatorTestCase(unittest.TestCase):
+    '''Runs test coroutines on a fresh loop against a started simulator, exchange urls point at it.'''
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        self.loop.run_until_complete(self._cancel_tasks())
+        self.loop.close()
+
+    @staticmethod
+    async def _cancel_tasks():
+        # streams and timers the exchange left behind
+        tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def run_with(self, sim: BaseSimulator, test, timeout: float = 10, **settings):
+        '''Runs `test()` with `settings` patched, the simulator is closed afterwards.'''
+        async def run():
+            await sim.start()
+            with patch.multiple(
+                    'settings',
+                    BINANCE_API_URL=sim.http_url, BINANCE_WS_URL=sim.ws_url,
+                    HUOBI_API_URL=sim.http_url, HUOBI_WS_URL=sim.ws_url,
+                    **settings
+            ):
+                try:
+                    await test()
+                finally:
+                    await sim.close()
+
+        self.loop.run_until_complete(asyncio.wait_for(run(), timeout))
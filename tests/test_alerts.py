@@ -0,0 +1,130 @@
+import asyncio
+import time
+import unittest
+from unittest.mock import patch
+
+from aiohttp import web
+
+from alerts import AlertDispatcher
+from caller import Caller
+from tests.test_caller import mock_read_file
+
+
+class FakeTwilio:
+    '''Local stand-in for the Twilio Calls endpoint.'''
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = []
+        self.failures = {}
+
+    async def create_call(self, request: web.Request):
+        data = await request.post()
+        number = data['To']
+        self.calls.append((request.match_info['sid'], number))
+        await asyncio.sleep(self.delay)
+        if self.failures.get(number):
+            self.failures[number] -= 1
+            return web.json_response({'code': 20500, 'message': 'Internal Server Error'}, status=500)
+        return web.json_response({'sid': f'CA{len(self.calls)}', 'to': number, 'status': 'queued'}, status=201)
+
+    async def start(self) -> str:
+        app = web.Application()
+        app.router.add_post('/2010-04-01/Accounts/{sid}/Calls.json', self.create_call)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        port = self.runner.addresses[0][1]
+        return f'http://127.0.0.1:{port}'
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+
+class TestAlertDispatcher(unittest.TestCase):
+    NUMBERS = ['+79991234567', '+79997654321']
+
+    def setUp(self):
+        self.previous_loop = asyncio.get_event_loop()
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.twilio = FakeTwilio()
+        url = self.loop.run_until_complete(self.twilio.start())
+        with patch.object(Caller, '_read_file', mock_read_file):
+            self.caller = Caller('from', 'sid', 'authkey', loop=self.loop, api_url=url)
+
+    def tearDown(self):
+        self.loop.run_until_complete(self.caller.close())
+        self.loop.run_until_complete(self.twilio.stop())
+        self.loop.close()
+        asyncio.set_event_loop(self.previous_loop)
+
+    def dispatcher(self, **kwargs) -> AlertDispatcher:
+        kwargs.setdefault('retry_delay', 0.01)
+        return AlertDispatcher(self.caller, **kwargs)
+
+    def test_calls_all_numbers_and_measures_latency(self):
+        dispatcher = self.dispatcher()
+        detected_at = time.monotonic()
+        called = self.loop.run_until_complete(dispatcher.alert(['ABC'], detected_at=detected_at))
+
+        self.assertEqual(called, self.NUMBERS)
+        self.assertEqual(sorted(n for _, n in self.twilio.calls), self.NUMBERS)
+        self.assertEqual({sid for sid, _ in self.twilio.calls}, {'sid'})
+        self.assertEqual(dispatcher.calls, 2)
+        self.assertGreater(dispatcher.last_latency, 0)
+        self.assertLess(dispatcher.last_latency, time.monotonic() - detected_at + 0.001)
+
+    def test_dedup_window_and_number_cooldown(self):
+        dispatcher = self.dispatcher(number_cooldown=60)
+        self.loop.run_until_complete(dispatcher.alert(['ABC']))
+        self.assertEqual(self.loop.run_until_complete(dispatcher.alert(['ABC'])), [])
+        self.assertEqual(dispatcher.deduplicated, 1)
+
+        # a new coin right after is not rung again
+        self.assertEqual(self.loop.run_until_complete(dispatcher.alert(['XYZ'])), [])
+        self.assertEqual(len(self.twilio.calls), 2)
+
+        dispatcher = self.dispatcher(dedup_window=0, number_cooldown=0)
+        self.loop.run_until_complete(dispatcher.alert(['ABC']))
+        self.loop.run_until_complete(dispatcher.alert(['ABC']))
+        self.assertEqual(len(self.twilio.calls), 6)
+
+    def test_retries_failed_call(self):
+        self.twilio.failures[self.NUMBERS[0]] = 1
+        dispatcher = self.dispatcher(retries=1)
+        called = self.loop.run_until_complete(dispatcher.alert(['ABC']))
+
+        self.assertEqual(called, self.NUMBERS)
+        self.assertEqual(dispatcher.retried_calls, 1)
+        self.assertEqual(len(self.twilio.calls), 3)
+
+        self.twilio.failures[self.NUMBERS[1]] = 5
+        dispatcher = self.dispatcher(retries=1, number_cooldown=0)
+        called = self.loop.run_until_complete(dispatcher.alert(['XYZ']))
+        self.assertEqual(called, self.NUMBERS[:1])
+        self.assertEqual(dispatcher.failed_calls, 1)
+
+    def test_timeout_and_concurrency(self):
+        self.twilio.delay = 0.2
+        dispatcher = self.dispatcher(timeout=0.05, retries=0)
+        started = time.monotonic()
+        called = self.loop.run_until_complete(dispatcher.alert(['ABC']))
+
+        self.assertEqual(called, [])
+        self.assertEqual(dispatcher.failed_calls, 2)
+        # both calls timed out together
+        self.assertLess(time.monotonic() - started, 0.15)
+        # let the stand-in finish the abandoned requests
+        self.loop.run_until_complete(asyncio.sleep(0.2))
+
+        self.twilio.delay = 0.05
+        dispatcher = self.dispatcher(concurrency=1)
+        started = time.monotonic()
+        self.loop.run_until_complete(dispatcher.alert(['XYZ']))
+        self.assertGreaterEqual(time.monotonic() - started, 0.1)
+
+
+if __name__ == '__main__':
+    unittest.main()
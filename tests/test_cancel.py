@@ -0,0 +1,89 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+
+from common import NTCredential
+from exchanges.trade.binance.account import BinanceAccount
+from exchanges.trade.binance.exchange import BinanceTradeExchange
+from exchanges.trade.bittrex.account import BittrexAccount
+from exchanges.trade.bittrex.exchange import BittrexTradeExchange
+from exchanges.trade.huobi.account import HuobiAccount
+from exchanges.trade.huobi.exchange import HuobiTradeExchange
+
+
+class FakeClient:
+    def __init__(self, delay=0.01):
+        self.delay = delay
+        self.requests = []
+        self.running = 0
+        self.max_running = 0
+
+    async def _call(self, *args):
+        self.requests.append(args)
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(self.delay)
+        self.running -= 1
+
+    async def cancel_order(self, order_id):
+        await self._call('cancel_order', order_id)
+        if order_id == 'bad':
+            raise ValueError('unknown order')
+        return {'success': True}
+
+    async def cancel_open_orders(self, symbol):
+        await self._call('cancel_open_orders', symbol)
+        return [{'symbol': symbol}] * 2
+
+    async def batch_cancel_orders(self, order_ids):
+        await self._call('batch_cancel_orders', order_ids)
+        return {'status': 'ok', 'data': {'success': order_ids[:-1], 'failed': order_ids[-1:]}}
+
+
+class TestCancelOrders(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.client = FakeClient()
+
+    def tearDown(self):
+        self.loop.close()
+
+    def _account(self, account_cls, exchange_cls):
+        account = account_cls(exchange_cls(), NTCredential('owner', 'exchange', 'key', 'secret'))
+        account.client = self.client
+        return account
+
+    def test_fallback_is_bounded(self):
+        account = self._account(BittrexAccount, BittrexTradeExchange)
+        orders = {(str(i), None) for i in range(10)} | {('bad', None)}
+        with patch('settings.ORDER_CANCEL_CONCURRENCY', 3):
+            canceled = self.loop.run_until_complete(account.cancel_orders(orders))
+
+        self.assertEqual(canceled, 10)
+        self.assertEqual(len(self.client.requests), 11)
+        self.assertEqual(self.client.max_running, 3)
+
+    def test_binance_cancels_per_symbol(self):
+        account = self._account(BinanceAccount, BinanceTradeExchange)
+        orders = {('1', 'ABCBTC'), ('2', 'ABCBTC'), ('3', 'XYZBTC'), ('4', 'XYZBTC')}
+        canceled = self.loop.run_until_complete(account.cancel_orders(orders))
+
+        self.assertEqual(canceled, 4)
+        self.assertEqual(
+            sorted(self.client.requests),
+            [('cancel_open_orders', 'ABCBTC'), ('cancel_open_orders', 'XYZBTC')]
+        )
+
+    def test_huobi_batches(self):
+        account = self._account(HuobiAccount, HuobiTradeExchange)
+        orders = {(f'{i:03}', None) for i in range(120)}
+        canceled = self.loop.run_until_complete(account.cancel_orders(orders))
+
+        self.assertEqual([len(ids) for _, ids in self.client.requests], [50, 50, 20])
+        # the fake fails the last order of every batch
+        self.assertEqual(canceled, 117)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+from config import ConfigWatcher
+from utils import load_yaml
+
+
+class TestConfigWatcher(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.dir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.dir.name, 'config.yaml')
+        self._write('a: 1', 1000)
+        self.watcher = ConfigWatcher(0)
+        self.loaded = []
+        self.watcher.watch(self.filename, self._reload)
+
+    def tearDown(self):
+        self.dir.cleanup()
+        self.loop.close()
+
+    def _write(self, text, mtime):
+        with open(self.filename, 'w') as f:
+            f.write(text)
+        os.utime(self.filename, (mtime, mtime))
+
+    async def _reload(self):
+        with open(self.filename) as f:
+            data = load_yaml(f.read())
+        if not isinstance(data, dict):
+            raise ValueError('config must be a mapping')
+        self.loaded.append(data)
+
+    def _check(self):
+        return self.loop.run_until_complete(self.watcher.check())
+
+    def test_reloads_changed_file_only(self):
+        self.assertEqual(self._check(), [])
+
+        self._write('a: 2', 2000)
+        self.assertEqual(self._check(), [self.filename])
+        self.assertEqual(self._check(), [])
+        self.assertEqual(self.loaded, [{'a': 2}])
+
+    def test_invalid_change_keeps_config(self):
+        self._write('- not a mapping', 2000)
+        self.assertEqual(self._check(), [])
+        self.assertEqual(self.loaded, [])
+
+        # fixed file is picked up again
+        self._write('a: 3', 3000)
+        self.assertEqual(self._check(), [self.filename])
+        self.assertEqual(self.loaded, [{'a': 3}])
+
+        os.remove(self.filename)
+        self.assertEqual(self._check(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,7 @@
 import unittest
 
 from common import NTCredential
-from credentials import NonUniqueCredentials, check_unique
+from credentials import NonUniqueCredentials, check_unique, diff_credentials
 
 
 class TestCredentials(unittest.TestCase):
@@ -40,6 +40,19 @@ class TestCredentials(unittest.TestCase):
         ]
         self.assertEqual(uniq, check_unique(uniq))
 
+    def test_diff_credentials(self):
+        kept = NTCredential('owner1', 'exchange1', 'key1', 'secret1')
+        removed = NTCredential('owner2', 'exchange1', 'key2', 'secret2')
+        rotated = NTCredential('owner3', 'exchange2', 'key3', 'secret3')
+        new_key = rotated._replace(api_key='key4', api_secret='secret4')
+        added = NTCredential('owner4', 'exchange2', 'key5', 'secret5')
+
+        self.assertEqual(
+            diff_credentials([kept, removed, rotated], [kept, new_key, added]),
+            ([new_key, added], [removed, rotated])
+        )
+        self.assertEqual(diff_credentials([kept], [kept]), ([], []))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,73 @@
+import asyncio
+import unittest
+from typing import NamedTuple
+
+from events import EventBus
+
+
+class Ping(NamedTuple):
+    n: int
+
+
+class Other(NamedTuple):
+    n: int
+
+
+class TestEventBus(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.bus = EventBus()
+
+    def tearDown(self):
+        self.loop.close()
+
+    def test_fast_subscribers_by_priority(self):
+        calls = []
+
+        def failing(event):
+            raise ValueError('boom')
+
+        self.bus.subscribe(Ping, lambda e: calls.append(('low', e.n)))
+        self.bus.subscribe(Ping, failing, priority=50)
+        self.bus.subscribe(Ping, lambda e: calls.append(('high', e.n)), priority=100)
+        self.bus.subscribe(Other, lambda e: calls.append(('other', e.n)))
+
+        self.bus.publish(Ping(1))
+        self.assertEqual(calls, [('high', 1), ('low', 1)])
+
+    def test_queue_consumer(self):
+        handled, batches = [], []
+        release = asyncio.Event()
+
+        async def slow(event):
+            await release.wait()
+            handled.append(event.n)
+
+        async def batched(events):
+            batches.append([e.n for e in events])
+
+        async def run():
+            consumer = self.bus.subscribe_queue(Ping, slow, maxsize=2)
+            batch_consumer = self.bus.subscribe_queue(Ping, batched, batch=True)
+            await asyncio.sleep(0)
+
+            for n in range(4):
+                self.bus.publish(Ping(n))
+            await asyncio.sleep(0.01)
+            release.set()
+            await asyncio.sleep(0.01)
+            await self.bus.close()
+            return consumer, batch_consumer
+
+        consumer, batch_consumer = self.loop.run_until_complete(run())
+        # publishing does not yield, so the two oldest events were dropped
+        self.assertEqual(handled, [2, 3])
+        self.assertEqual(consumer.dropped, 2)
+        self.assertEqual(batches, [[0, 1, 2, 3]])
+        self.assertEqual(batch_consumer.handled, 4)
+        self.assertIn('Ping: 0 fast subscribers', self.bus.stats())
+
+
+if __name__ == '__main__':
+    unittest.main()
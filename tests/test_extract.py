@@ -1,10 +1,23 @@
 import unittest
 
-import settings
-from tgbot.handlers.zdefault import extract_symbols_keywords, extract_symbols_endpoint_btc, extract_symbols_endpoint_krw
+from common import CoinSource
+from rules import EXCLUDE, INCLUDE, Rule, default_rules, rules
+from tgbot.handlers.zdefault import extract_symbols_keywords, extract_symbols_endpoint_btc, extract_symbols_endpoint_krw, \
+    extract_symbols
 
 
 class TestExtractSymbols(unittest.TestCase):
+    def setUp(self):
+        self.addCleanup(rules.load, rules.rules)
+
+    @staticmethod
+    def set_lists(black_list=(), white_list=()):
+        rules.load(
+            default_rules() +
+            [Rule(EXCLUDE, s) for s in black_list] +
+            [Rule(INCLUDE, s, CoinSource.TG_CHNL_UPBIT_BTC) for s in white_list]
+        )
+
     def test_extract_symbols_keywords(self):
         data = [
             ('[이벤트] 디센트럴랜드(MANA) 원화마켓 오픈 이벤트  - MANA TOP 트레이딩 이벤트', {'MANA'}),
@@ -20,7 +33,7 @@ class TestExtractSymbols(unittest.TestCase):
         for msg, expected in data:
             self.assertEqual(extract_symbols_keywords(msg), expected)
 
-        settings.SYMBOLS_BLACK_LIST = {'MEDX', 'CRE'}
+        self.set_lists(black_list={'MEDX', 'CRE'})
         data = [
             ('[이벤트] 디센트럴랜드(MANA) 원화마켓 오픈 이벤트  - MANA TOP 트레이딩 이벤트', {'MANA'}),
             ('[이벤트] 펀디엑스(NPXS) 원화마켓 오픈 이벤트 : TOP 트레이딩 이벤트', {'NPXS'}),
@@ -44,7 +57,7 @@ class TestExtractSymbols(unittest.TestCase):
         for msg, expected in data:
             self.assertEqual(extract_symbols_endpoint_krw(msg), expected)
 
-        settings.SYMBOLS_WHITE_LIST = {'LAMB', 'CPT', 'ATOM', 'COSM'}
+        self.set_lists(white_list={'LAMB', 'CPT', 'ATOM', 'COSM'})
         data = [
             ('by @CMfree Upbit Endpoint #1 (Jayden_Cryptơ): ATOM/KRW', set()),
             ('by @CMfree Upbit Endpoint #1 (Jayden_Cryptơ): LAMB/BTC CPT/BTC', {'LAMB', 'CPT'}),
@@ -53,7 +66,7 @@ class TestExtractSymbols(unittest.TestCase):
         for msg, expected in data:
             self.assertEqual(extract_symbols_endpoint_btc(msg), expected)
 
-        settings.SYMBOLS_WHITE_LIST = {'LAMB', 'CPT', 'ATOM', 'COSM'}
+        self.set_lists(white_list={'LAMB', 'CPT', 'ATOM', 'COSM'})
         data = [
             ('by @CMfree Upbit Endpoint #1 (Jayden_Cryptơ): ATOM/KRW', {'ATOM'}),
             ('by @CMfree Upbit Endpoint #1 (Jayden_Cryptơ): LAMB/BTC CPT/BTC', set()),
@@ -62,6 +75,20 @@ class TestExtractSymbols(unittest.TestCase):
         for msg, expected in data:
             self.assertEqual(extract_symbols_endpoint_krw(msg), expected)
 
+    def test_extract_symbols(self):
+        self.set_lists(black_list={'MEDX'}, white_list={'LAMB', 'ATOM', 'COSM'})
+        data = [
+            ('by @CMfree Upbit Endpoint #1 (Jayden_Cryptơ): ATOM/KRW', (set(), {'ATOM'})),
+            ('by @CMfree Upbit Endpoint #1 (Jayden_Cryptơ): LAMB/BTC CPT/BTC', ({'LAMB'}, set())),
+            ('by @CMfree Upbit Endpoint #3 (Jaýden.Crypto) added BTC-COSM KRW-ATOM', ({'COSM'}, {'ATOM'})),
+            ('by @CMfree Upbit Endpoint #3 (Jaýden.Crypto) added BTC-ATOM/KRW', ({'ATOM'}, {'ATOM'})),
+            ('[이벤트] 메디블록(MEDX) 신촌세브란스병원 업무협약 기념 - MEDX TOP 트레이딩 이벤트', (set(), set())),
+            ('[입금] 코스모스(ATOM) 입금 오픈 (5/3 원화마켓 오픈 예정)', (set(), {'ATOM'})),
+            ('ATOM/KRW BTC-COSM', (set(), set())),
+        ]
+        for msg, expected in data:
+            self.assertEqual(extract_symbols(msg), expected)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+
+from exchanges.trade.base.history import TickerHistory
+
+
+class TestTickerHistory(unittest.TestCase):
+    def test_change_percent(self):
+        history = TickerHistory(horizon=60)
+        history.record('ABCBTC', 1.0, now=1000)
+        history.record('ABCBTC', 1.1, now=1030)
+        history.record('ABCBTC', 1.5, now=1055)
+
+        self.assertAlmostEqual(history.change_percent('ABCBTC', 10, now=1060), (1.5 / 1.1 - 1) * 100)
+        self.assertAlmostEqual(history.change_percent('ABCBTC', 60, now=1060), 50)
+        self.assertEqual(history.change_percent('ABCBTC', 3, now=1060), 0)
+        self.assertIsNone(history.change_percent('ABCBTC', 61, now=1060))
+        self.assertIsNone(history.change_percent('XYZBTC', 10, now=1060))
+
+    def test_not_enough_history(self):
+        history = TickerHistory(horizon=300)
+        history.record('ABCBTC', 1.0, now=1000)
+        self.assertIsNone(history.change_percent('ABCBTC', 60, now=1030))
+        self.assertEqual(history.change_percent('ABCBTC', 10, now=1030), 0)
+
+    def test_gap_longer_than_horizon(self):
+        history = TickerHistory(horizon=10)
+        history.record('ABCBTC', 1.0, now=1000)
+        history.record('ABCBTC', 2.0, now=1003)
+        history.record('ABCBTC', 4.0, now=2000)
+        self.assertAlmostEqual(history.change_percent('ABCBTC', 10, now=2000), 100)
+        self.assertEqual(history.change_percent('ABCBTC', 10, now=2010), 0)
+
+    def test_footprint_is_bounded(self):
+        history = TickerHistory(horizon=300)
+        for i in range(10000):
+            history.record('ABCBTC', float(i), now=i)
+        self.assertLess(history.footprint(), 4096)
+        self.assertEqual(len(history), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import asyncio
+import gzip
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import ujson
+
+from exchanges.trade.huobi.stream import HuobiStreamDecoder
+
+
+def frame(payload) -> bytes:
+    return gzip.compress(ujson.dumps(payload).encode())
+
+
+class TestHuobiStreamDecoder(unittest.TestCase):
+    def test_decode(self):
+        decoder = HuobiStreamDecoder()
+        data = {'ch': 'market.tickers', 'ts': 1, 'data': [{'symbol': 'atombtc', 'open': 1.5, 'close': 2.5}]}
+        self.assertEqual(decoder.decode(frame(data)), data)
+        self.assertEqual(decoder.decode(frame({'ping': 1571234567890})), {'ping': 1571234567890})
+        self.assertEqual(
+            decoder.decode(frame({'op': 'ping', 'ts': 1571234567890})),
+            {'op': 'ping', 'ts': 1571234567890}
+        )
+        self.assertEqual(decoder.decode(frame({'ping': 'abc'})), {'ping': 'abc'})
+
+    def test_decode_async_keeps_order(self):
+        decoder = HuobiStreamDecoder(ThreadPoolExecutor(2), offload_size=0)
+        frames = [frame({'ch': 'market.tickers', 'ts': i, 'data': []}) for i in range(20)]
+
+        async def run():
+            return [(await decoder.decode_async(f))['ts'] for f in frames]
+
+        loop = asyncio.new_event_loop()
+        try:
+            self.assertEqual(loop.run_until_complete(run()), list(range(20)))
+        finally:
+            loop.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
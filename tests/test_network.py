@@ -0,0 +1,91 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+
+from network import AsyncHttp, HedgePolicy
+
+
+class TestHedgePolicy(unittest.TestCase):
+    def test_delay(self):
+        policy = HedgePolicy(min_samples=3, initial_delay=2.0, min_delay=0.01)
+        self.assertEqual(policy.delay(), 2.0)
+        for latency in (0.1, 0.2, 0.3, 0.4, 5.0):
+            policy.record(latency)
+        self.assertEqual(policy.delay(), 0.4)
+
+    def test_can_hedge(self):
+        policy = HedgePolicy(max_extra_ratio=0.5)
+        self.assertFalse(policy.can_hedge())
+        policy.requests = 2
+        self.assertTrue(policy.can_hedge())
+        policy.hedged = 1
+        self.assertFalse(policy.can_hedge())
+
+
+class TestGetHedged(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        self.loop.close()
+
+    def _run(self, delays, policy):
+        async def fake_get(_, url, output=None, headers=None):
+            await asyncio.sleep(delays[url])
+            return url
+
+        async def run():
+            http = AsyncHttp(loop=self.loop)
+            try:
+                with patch.object(AsyncHttp, 'get', fake_get):
+                    return await http.get_hedged(['primary', 'backup'], policy)
+            finally:
+                await http.close()
+
+        return self.loop.run_until_complete(run())
+
+    def test_fast_primary(self):
+        policy = HedgePolicy(initial_delay=0.05, max_extra_ratio=1)
+        self.assertEqual(self._run({'primary': 0, 'backup': 0}, policy), 'primary')
+        self.assertEqual((policy.requests, policy.hedged, policy.hedge_won), (1, 0, 0))
+
+    def test_slow_primary(self):
+        policy = HedgePolicy(initial_delay=0.2, max_extra_ratio=1)
+        self.assertEqual(self._run({'primary': 1, 'backup': 0}, policy), 'backup')
+        self.assertEqual((policy.requests, policy.hedged, policy.hedge_won), (1, 1, 1))
+        # the backup latency is recorded, not the time since the primary started
+        self.assertLess(policy._latencies[0], 0.1)
+
+    def test_cancel_before_hedge(self):
+        policy = HedgePolicy(initial_delay=1, max_extra_ratio=1)
+        requests = []
+
+        async def fake_get(_, url, output=None, headers=None):
+            requests.append(asyncio.current_task())
+            await asyncio.sleep(10)
+
+        async def run():
+            http = AsyncHttp(loop=self.loop)
+            try:
+                with patch.object(AsyncHttp, 'get', fake_get):
+                    call = asyncio.ensure_future(http.get_hedged(['primary', 'backup'], policy))
+                    await asyncio.sleep(0.01)
+                    call.cancel()
+                    await asyncio.gather(call, return_exceptions=True)
+                    await asyncio.sleep(0)
+            finally:
+                await http.close()
+
+        self.loop.run_until_complete(run())
+        self.assertEqual(len(requests), 1)
+        self.assertTrue(requests[0].cancelled())
+
+    def test_hedge_budget(self):
+        policy = HedgePolicy(initial_delay=0.01, max_extra_ratio=0)
+        self.assertEqual(self._run({'primary': 0.05, 'backup': 0}, policy), 'primary')
+        self.assertEqual(policy.hedged, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import unittest
+from decimal import Decimal
+from unittest.mock import patch
+
+from common import NTCredential
+from exchanges.trade.base.exchange import SymbolTicker
+from exchanges.trade.base.orderbook import OrderBook, OrderBookGap
+from exchanges.trade.base.ws import WebsocketSupervisor
+from exchanges.trade.binance.account import BinanceAccount
+from exchanges.trade.binance.exchange import BinanceTradeExchange
+from simulator.binance import BinanceSimulator
+from tests.helpers import SimulatorTestCase, Trigger
+
+
+class TestOrderBook(unittest.TestCase):
+    def _book(self):
+        book = OrderBook('ABCBTC')
+        book.load_snapshot(
+            [['0.9', '10'], ['0.8', '5']],
+            [['1.1', '1'], ['1.0', '2'], ['1.2', '0']],
+            100
+        )
+        return book
+
+    def test_snapshot_sorted(self):
+        book = self._book()
+        self.assertEqual(list(book.asks.levels()), [(1.0, 2.0), (1.1, 1.0)])
+        self.assertEqual(book.bids.best(), 0.9)
+
+    def test_apply_diff(self):
+        book = self._book()
+        book.apply_diff([], [['1.0', '5']], 90, 100)  # covered by snapshot
+        book.apply_diff([['0.9', '0']], [['1.05', '3'], ['1.1', '0']], 95, 101)
+        book.apply_diff([], [['1.05', '4']], 102, 102)
+
+        self.assertEqual(list(book.asks.levels()), [(1.0, 2.0), (1.05, 4.0)])
+        self.assertEqual(book.bids.best(), 0.8)
+        self.assertEqual(book.last_update_id, 102)
+
+        with self.assertRaises(OrderBookGap):
+            book.apply_diff([], [], 104, 105)
+        self.assertFalse(book.synced)
+
+    def test_diff_before_snapshot(self):
+        with self.assertRaises(OrderBookGap):
+            OrderBook('ABCBTC').apply_diff([], [], 1, 2)
+
+    def test_price_to_fill(self):
+        book = self._book()
+        self.assertEqual(book.price_to_fill(1.5), 1.0)
+        self.assertEqual(book.price_to_fill(3.0), 1.1)
+        self.assertIsNone(book.price_to_fill(3.2))
+
+
+class TestLimitPrice(unittest.TestCase):
+    def test_limit_price(self):
+        exchange = BinanceTradeExchange()
+        exchange.tickers['ABCBTC'] = SymbolTicker(Decimal(0), Decimal('1.0'))
+        self.assertEqual(exchange.limit_price('ABCBTC', Decimal(1)), Decimal('1.15'))
+
+        supervisor = WebsocketSupervisor('depth:ABCBTC', None, None, None)
+        supervisor.health.connected = True
+        book = exchange.order_books['ABCBTC'] = OrderBook('ABCBTC')
+        exchange._order_book_streams['ABCBTC'] = (supervisor, None, None)
+        book.load_snapshot([], [['1.0', '1'], ['1.05', '1'], ['1.5', '10']])
+
+        self.assertEqual(exchange.limit_price('ABCBTC', Decimal(2)), Decimal('1.0605'))
+        self.assertEqual(exchange.limit_price('ABCBTC', Decimal(5)), Decimal('1.15'))
+
+        supervisor.health.connected = False
+        self.assertEqual(exchange.limit_price('ABCBTC', Decimal(2)), Decimal('1.15'))
+
+
+class TestPrimaryBuyDepth(SimulatorTestCase):
+    def test_first_orders_wait_for_book(self):
+        sim = BinanceSimulator()
+        sim.add_account('key', {'BTC': Decimal(1)})
+        sim.list_market('SIM', 'BTC', Decimal('0.001'))
+
+        async def test():
+            with patch.object(BinanceTradeExchange, 'buy_symbols', {'BTC'}):
+                exchange = BinanceTradeExchange()
+                await exchange.init_session()
+                account = BinanceAccount(exchange, NTCredential('owner', 'binance', 'key', 'secret'))
+                await account.init()
+                exchange.accounts.append(account)
+                # a fresh ticker, nothing delays the orders but the book
+                exchange._set_ticker('SIMBTC', SymbolTicker(Decimal(0), Decimal('0.001')))
+
+                await exchange.buy(Trigger, 'SIM', 100)
+
+                for pair in list(exchange.order_books):
+                    exchange.close_order_book(pair)
+                await account.close()
+                await exchange.streams.close()
+                await exchange.http.close()
+
+        # books are not waited for by default, this waits for the one buy just opened
+        self.run_with(sim, test, ORDER_BOOK_SYNC_TIMEOUT=2)
+
+        # the simulated book fills at the ticker price, so depth pricing is just the 1% buffer
+        orders = list(sim.accounts['key'].orders.values())
+        self.assertEqual([o.price for o in orders], [Decimal('0.00101')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import asyncio
+import unittest
+
+import ujson
+
+import settings
+from common import CoinSource, Symbol
+from exchanges.trigger.base.part import BaseTriggerExchangePushPart, BaseTriggerExchangeGeneratorPart
+from exchanges.trigger.coinbase_pro.part import TwitterPart
+
+
+class FakeTriggerExchange:
+    name = 'fake'
+
+    def __init__(self):
+        self.processed = asyncio.Queue()
+
+    async def process_coins(self, part, coins):
+        await self.processed.put(coins)
+
+
+class FakePushPart(BaseTriggerExchangePushPart):
+    @property
+    def source(self) -> CoinSource:
+        return CoinSource.TELEGRAM
+
+
+class FlakyStreamPart(BaseTriggerExchangeGeneratorPart):
+    RECONNECT_BACKOFF_BASE = 0.001
+    streams = 0
+
+    @property
+    def source(self) -> CoinSource:
+        return CoinSource.TWITTER
+
+    async def stream(self):
+        self.streams += 1
+        if self.streams == 1:
+            raise ConnectionError('reset')
+        yield {Symbol(f'C{self.streams}', CoinSource.TWITTER)}
+
+
+class TestPushPart(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        self.loop.close()
+
+    def test_push_wakes_consumer(self):
+        async def run():
+            exchange = FakeTriggerExchange()
+            part = FakePushPart(exchange)
+            task = asyncio.ensure_future(part.check_part())
+
+            coins = {Symbol('ATOM', CoinSource.TELEGRAM)}
+            part.push(coins)
+            part.push(set())
+            try:
+                return await asyncio.wait_for(exchange.processed.get(), 1), exchange.processed.qsize()
+            finally:
+                task.cancel()
+
+        processed, left = self.loop.run_until_complete(run())
+        self.assertEqual(processed, {Symbol('ATOM', CoinSource.TELEGRAM)})
+        self.assertEqual(left, 0)
+
+
+class TestGeneratorPart(unittest.TestCase):
+    def test_reconnects(self):
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+        asyncio.set_event_loop(loop)
+
+        async def run():
+            exchange = FakeTriggerExchange()
+            part = FlakyStreamPart(exchange)
+            enabled = settings.TWITTER_ENABLED
+            settings.TWITTER_ENABLED = True
+            self.addCleanup(setattr, settings, 'TWITTER_ENABLED', enabled)
+
+            task = asyncio.ensure_future(part.check_part())
+            try:
+                return [await asyncio.wait_for(exchange.processed.get(), 1) for _ in range(2)]
+            finally:
+                task.cancel()
+
+        processed = loop.run_until_complete(run())
+        self.assertEqual(processed, [{Symbol('C2', CoinSource.TWITTER)}, {Symbol('C3', CoinSource.TWITTER)}])
+
+
+class TestTwitterPart(unittest.TestCase):
+    def setUp(self):
+        self.part = TwitterPart(FakeTriggerExchange())
+
+    def test_user_id_pushdown(self):
+        tweet = {'created_at': 'x', 'id_str': '1', 'text': 'hi', 'user': {'id': 720487892670410753, 'id_str': 'x'}}
+        line = ujson.dumps(tweet).encode()
+        self.assertEqual(self.part._loads(line), tweet)
+
+        tweet['user']['id'] = 1
+        self.assertIsNone(self.part._loads(ujson.dumps(tweet).encode()))
+        self.assertIsNone(self.part._loads(b'{"delete":{"status":{"id":1}}}'))
+
+    def test_listing_symbols(self):
+        text = 'Inbound transfers for Stellar Lumens (XLM) and $ZRX are now available. BTC pairs LATER.'
+        self.assertTrue(self.part.LISTING_REGEX.search(text))
+        self.assertEqual(self.part._get_symbols(text), {'XLM', 'ZRX'})
+        self.assertIsNone(self.part.LISTING_REGEX.search('Scheduled MAINTENANCE (API) tonight'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import asyncio
+import unittest
+from decimal import Decimal
+
+from common import Balance, NTCredential
+from exchanges.trade.base.exchange import SymbolTicker
+from exchanges.trade.binance.account import BinanceAccount
+from exchanges.trade.binance.exchange import BinanceTradeExchange
+
+
+class TestPortfolio(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.exchange = BinanceTradeExchange()
+        self.account = BinanceAccount(self.exchange, NTCredential('owner', 'binance', 'key', 'secret'))
+        self.portfolio = self.account.portfolio
+
+    def tearDown(self):
+        self.loop.close()
+
+    def _balance(self, asset, free, locked='0'):
+        self.loop.run_until_complete(self.account.update_balance(asset, Balance(Decimal(free), Decimal(locked))))
+
+    def _assets(self):
+        return {v.asset: v.value for v in self.portfolio.significant()}
+
+    def test_values_follow_balances_and_tickers(self):
+        self.exchange.tickers['ABCBTC'] = SymbolTicker(Decimal(0), Decimal('0.001'))
+        self._balance('BTC', '1')
+        self._balance('ABC', '2', '3')
+        self._balance('DUST', '1')
+        self._balance('ZERO', '0')
+        self.exchange._set_ticker('DUSTBTC', SymbolTicker(Decimal(0), Decimal('0.000001')))
+
+        self.assertEqual(self._assets(), {'BTC': Decimal(1), 'ABC': Decimal('0.005')})
+        self.assertEqual(self.portfolio.total, Decimal('1.005001'))
+
+        # a ticker update revalues only its asset
+        self.exchange._set_ticker('ABCBTC', SymbolTicker(Decimal(0), Decimal('0.0001')))
+        self.assertEqual(self._assets(), {'BTC': Decimal(1)})
+
+        self._balance('DUST', '10000')
+        self.assertEqual(self._assets(), {'BTC': Decimal(1), 'DUST': Decimal('0.01')})
+
+        self._balance('DUST', '0')
+        self.assertNotIn('DUSTBTC', self.exchange._price_watchers)
+
+    def test_unpriced_and_quote_assets(self):
+        self._balance('NEW', '5')
+        self._balance('USDT', '100')
+        self.assertEqual(self._assets(), {'NEW': None, 'USDT': None})
+
+        self.exchange._set_ticker('BTCUSDT', SymbolTicker(Decimal(0), Decimal('10000')))
+        self.assertEqual(self._assets(), {'NEW': None, 'USDT': Decimal('0.01')})
+
+    def test_rest_snapshot_revalues(self):
+        self._balance('ABC', '2')
+        self.assertEqual(self._assets(), {'ABC': None})
+
+        async def init_ticker():
+            self.exchange.tickers = {'ABCBTC': SymbolTicker(Decimal(0), Decimal('0.5'))}
+
+        self.exchange._init_ticker = init_ticker
+        self.loop.run_until_complete(self.exchange.snapshot_tickers())
+        self.assertEqual(self._assets(), {'ABC': Decimal(1)})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,22 @@
+import unittest
+
+from exchanges.registry import ExchangeRegistry, TRADE_EXCHANGES, TRIGGER_EXCHANGES
+
+
+class TestExchangeRegistry(unittest.TestCase):
+    def test_names_match_exchanges(self):
+        for paths in (TRADE_EXCHANGES, TRIGGER_EXCHANGES):
+            registry = ExchangeRegistry(paths)
+            self.assertEqual(registry.loaded(), [])
+            for name in registry.names:
+                self.assertEqual(registry.get(name).name.fget(None), name)
+
+    def test_lazy_lookup(self):
+        registry = ExchangeRegistry(TRADE_EXCHANGES)
+        self.assertIsNone(registry.get('unknown'))
+        self.assertIs(registry.get('huobi'), registry.get('huobi'))
+        self.assertEqual(registry.loaded(), ['huobi'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+
+from common import CoinSource
+from rules import EXCLUDE, INCLUDE, Rule, RuleEngine
+
+
+class TestRuleEngine(unittest.TestCase):
+    def setUp(self):
+        self.engine = RuleEngine([
+            Rule(EXCLUDE, 'BTC'),
+            Rule(EXCLUDE, r'/\w?USD\w?/'),
+            Rule(EXCLUDE, '/.*/', CoinSource.TG_CHNL_UPBIT_BTC),
+            Rule(INCLUDE, 'ATOM', CoinSource.TG_CHNL_UPBIT_BTC),
+        ])
+
+    def test_verdicts(self):
+        self.assertTrue(self.engine.allowed('ATOM'))
+        self.assertFalse(self.engine.allowed('BTC', CoinSource.API_PAIR))
+        self.assertFalse(self.engine.allowed('TUSD'))
+        self.assertFalse(self.engine.allowed('USDT', CoinSource.TWITTER))
+        # source white list on top of global rules
+        self.assertTrue(self.engine.allowed('ATOM', CoinSource.TG_CHNL_UPBIT_BTC))
+        self.assertFalse(self.engine.allowed('LAMB', CoinSource.TG_CHNL_UPBIT_BTC))
+        self.assertTrue(self.engine.allowed('LAMB', CoinSource.TG_CHNL_UPBIT_KRW))
+        self.assertEqual(self.engine.filter({'ATOM', 'BTC', 'LAMB'}), {'ATOM', 'LAMB'})
+
+    def test_cache_and_updates(self):
+        self.assertTrue(self.engine.allowed('LAMB'))
+        self.assertTrue(self.engine.allowed('LAMB'))
+        self.assertEqual((self.engine.hits, self.engine.misses), (1, 1))
+
+        self.assertTrue(self.engine.add(Rule(EXCLUDE, 'LAMB')))
+        self.assertFalse(self.engine.add(Rule(EXCLUDE, 'LAMB')))
+        self.assertFalse(self.engine.allowed('LAMB'))
+
+        self.assertTrue(self.engine.add(Rule(INCLUDE, 'BTC')))
+        self.assertTrue(self.engine.allowed('BTC'))
+        self.assertTrue(self.engine.remove(Rule(INCLUDE, 'BTC')))
+        self.assertFalse(self.engine.remove(Rule(INCLUDE, 'BTC')))
+        self.assertFalse(self.engine.allowed('BTC'))
+
+    def test_invalid(self):
+        for rule in [Rule('drop', 'BTC'), Rule(EXCLUDE, '/(/'), Rule(INCLUDE, '/A.*/')]:
+            with self.assertRaises(Exception, msg=rule):
+                self.engine.add(rule)
+        self.assertEqual(len(self.engine.rules), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
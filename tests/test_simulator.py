@@ -0,0 +1,99 @@
+import unittest
+from decimal import Decimal
+
+from common import Balance, NTCredential
+from exchange_libs.aiobinance.exceptions import BinanceAPIException
+from exchanges.trade.binance.account import BinanceAccount
+from exchanges.trade.binance.exchange import BinanceTradeExchange
+from exchanges.trade.huobi.account import HuobiAccount
+from exchanges.trade.huobi.exchange import HuobiTradeExchange
+from simulator.base import SimulatorConfig
+from simulator.binance import BinanceSimulator
+from simulator.huobi import HuobiSimulator
+from tests.helpers import SimulatorTestCase, wait_for
+
+
+class TestSimulator(SimulatorTestCase):
+    def test_binance_orders_and_account_stream(self):
+        sim = BinanceSimulator()
+        sim.add_account('key', {'BTC': Decimal(1)})
+        sim.list_market('SIM', 'BTC', Decimal('0.001'))
+        credential = NTCredential('owner', 'binance', 'key', 'secret')
+
+        async def test():
+            exchange = BinanceTradeExchange()
+            account = BinanceAccount(exchange, credential)
+            await account.init()
+            self.assertEqual(account.balance['BTC'], Balance(Decimal(1), Decimal(0)))
+
+            order_id = await account.client.send_prepared(
+                account.client.prepare_order_limit_buy('SIMBTC', '100', Decimal('0.001'))
+            )
+            order_id = order_id['orderId']
+            # balance update comes over the listen key stream of the shared connection
+            await wait_for(lambda: account.balance['BTC'].locked)
+            self.assertEqual(account.balance['BTC'], Balance(Decimal('0.9'), Decimal('0.1')))
+            self.assertEqual(await account.get_open_orders_id(), {(str(order_id), 'SIMBTC')})
+
+            with self.assertRaises(BinanceAPIException) as e:
+                await account.client.order_limit_buy('SIMBTC', '1000', Decimal('0.001'))
+            self.assertEqual(e.exception.api_code, -2010)
+
+            self.assertEqual(await account.cancel_orders({(str(order_id), 'SIMBTC')}), 1)
+            await wait_for(lambda: not account.balance['BTC'].locked)
+
+            account.portfolio.update_balance('SIM', Balance(Decimal(1), Decimal(0)))
+            self.assertIn('SIMBTC', exchange._price_watchers)
+            await account.close()
+            # a removed account leaves neither a listen key nor a price watcher behind
+            self.assertEqual(sim.accounts['key'].streams, set())
+            self.assertEqual(exchange._price_watchers, {})
+            await exchange.streams.close()
+
+        self.run_with(sim, test)
+        self.assertEqual((sim.stats.orders, sim.stats.canceled), (2, 1))
+
+    def test_binance_rate_limit(self):
+        sim = BinanceSimulator(SimulatorConfig(rate_limit=2))
+        sim.add_account('key', {'BTC': Decimal(1)})
+
+        async def test():
+            account = BinanceAccount(BinanceTradeExchange(), NTCredential('owner', 'binance', 'key', 'secret'))
+            await account._init_client()
+            await account.client.get_account()
+            await account.client.get_account()
+            with self.assertRaises(BinanceAPIException) as e:
+                await account.client.get_account()
+            self.assertEqual((e.exception.http_code, e.exception.api_code), (429, -1003))
+            await account.client.close_session()
+
+        self.run_with(sim, test)
+        self.assertEqual((sim.stats.requests, sim.stats.rate_limited), (3, 1))
+
+    def test_huobi_orders_and_account_stream(self):
+        sim = HuobiSimulator()
+        sim.add_account('key', {'BTC': Decimal(1)})
+        sim.list_market('SIM', 'BTC', Decimal('0.001'))
+        credential = NTCredential('owner', 'huobi', 'key', 'secret')
+
+        async def test():
+            account = HuobiAccount(HuobiTradeExchange(), credential)
+            await account.init()
+            self.assertEqual(account.balance['BTC'], Balance(Decimal(1), Decimal(0)))
+
+            result = await account.client.buy_limit_order(account.account_id, Decimal('0.1'), 'simbtc', Decimal('0.001'))
+            order_id = result['data']
+            await wait_for(lambda: account.balance['BTC'].locked)
+            self.assertEqual(account.balance['BTC'], Balance(Decimal('0.9'), Decimal('0.1')))
+            self.assertEqual(await account.get_open_orders_id(), {(order_id, None)})
+
+            self.assertEqual(await account.cancel_orders({(order_id, None), ('404', None)}), 1)
+            await wait_for(lambda: not account.balance['BTC'].locked)
+            await account.close()
+
+        self.run_with(sim, test)
+        self.assertEqual((sim.stats.orders, sim.stats.canceled), (1, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
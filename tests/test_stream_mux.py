@@ -0,0 +1,141 @@
+import asyncio
+import unittest
+
+import ujson
+import websockets
+
+from exchanges.trade.binance.stream import BinanceStreamMux
+
+
+class TestBinanceStreamMux(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        self.loop.close()
+
+    def test_routes_and_live_subscribe(self):
+        paths, requests = [], []
+        received = {'a': [], 'b': []}
+        backfills = []
+
+        async def server_handler(ws, path=None):
+            paths.append(path or ws.request.path)
+            await ws.send(ujson.dumps({'stream': 'a', 'data': 1}))
+            async for msg in ws:
+                request = ujson.loads(msg)
+                requests.append(request)
+                await ws.send(ujson.dumps({'result': None, 'id': request['id']}))
+                for stream in request['params']:
+                    await ws.send(ujson.dumps({'stream': stream, 'data': 2}))
+
+        async def backfill():
+            backfills.append(True)
+
+        async def run():
+            server = await websockets.serve(server_handler, '127.0.0.1', 0)
+            port = server.sockets[0].getsockname()[1]
+
+            mux = BinanceStreamMux()
+            mux.URL = f'ws://127.0.0.1:{port}/stream?streams='
+
+            first = await mux.subscribe('a', received['a'].append, backfill=backfill)
+            while not received['a']:
+                await asyncio.sleep(0.01)
+
+            async def handle_b(data):
+                received['b'].append(data)
+
+            second = await mux.subscribe('b', handle_b)
+            while not received['b']:
+                await asyncio.sleep(0.01)
+
+            self.assertIs(first, second)
+            # the first connect does not backfill, the subscribers have just initialized
+            self.assertEqual(backfills, [])
+
+            await first.connection.close()
+            while not backfills:
+                await asyncio.sleep(0.01)
+            await mux.close()
+            server.close()
+            await server.wait_closed()
+
+        self.loop.run_until_complete(asyncio.wait_for(run(), 5))
+
+        self.assertEqual(paths, ['/stream?streams=a', '/stream?streams=a/b'])
+        self.assertEqual(requests, [{'method': 'SUBSCRIBE', 'params': ['b'], 'id': 1}])
+        self.assertEqual(received, {'a': [1, 1], 'b': [2]})
+        self.assertEqual(backfills, [True])
+
+    def test_stale_timeout_of_market_streams_only(self):
+        async def server_handler(ws, path=None):
+            async for _ in ws:
+                pass
+
+        async def run():
+            server = await websockets.serve(server_handler, '127.0.0.1', 0)
+            mux = BinanceStreamMux()
+            mux.URL = f'ws://127.0.0.1:{server.sockets[0].getsockname()[1]}/stream?streams='
+            supervisor = await mux.subscribe('listen-key', print)
+            self.assertIsNone(supervisor.stale_timeout)
+            await mux.subscribe('!ticker@arr', print, stale_timeout=30)
+            self.assertEqual(supervisor.stale_timeout, 30)
+            await mux.unsubscribe('!ticker@arr')
+            self.assertIsNone(supervisor.stale_timeout)
+            await mux.close()
+            server.close()
+            await server.wait_closed()
+
+        self.loop.run_until_complete(run())
+
+    def test_ticker_after_listen_key_detects_stale(self):
+        async def server_handler(ws, path=None):
+            async for _ in ws:
+                pass
+
+        async def run():
+            server = await websockets.serve(server_handler, '127.0.0.1', 0)
+            mux = BinanceStreamMux()
+            mux.URL = f'ws://127.0.0.1:{server.sockets[0].getsockname()[1]}/stream?streams='
+            supervisor = await mux.subscribe('listen-key', print)
+            # the socket is consumed with no timeout before the ticker joins it
+            await asyncio.sleep(0.05)
+            await mux.subscribe('!ticker@arr', print, stale_timeout=0.1)
+            for _ in range(100):
+                if supervisor.health.stale:
+                    break
+                await asyncio.sleep(0.01)
+            self.assertEqual(supervisor.health.stale, 1)
+            await mux.close()
+            server.close()
+            await server.wait_closed()
+
+        self.loop.run_until_complete(run())
+
+    def test_first_connect_failure_raises(self):
+        async def run():
+            mux = BinanceStreamMux()
+            mux.URL = 'ws://127.0.0.1:1/stream?streams='
+            with self.assertRaises(OSError):
+                await mux.subscribe('a', print)
+            self.assertEqual(mux.connections[0].routes, {})
+            self.assertIsNone(mux.connections[0].supervisor)
+
+        self.loop.run_until_complete(run())
+
+    def test_spreads_streams_over_connections(self):
+        mux = BinanceStreamMux()
+        mux.MAX_STREAMS_PER_CONNECTION = 2
+        conns = []
+        for stream in 'abc':
+            conn = mux._find_connection(stream)
+            conn.routes[stream] = None
+            conns.append(conn)
+        self.assertEqual([c.number for c in conns], [0, 0, 1])
+        self.assertIs(mux._find_connection('a'), conns[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+
+from exchanges.trade.binance.exchange import BinanceTradeExchange
+from exchanges.trade.bittrex.exchange import BittrexTradeExchange
+from symbols import SymbolIndex, canonical_symbol
+
+
+class TestSymbolIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = SymbolIndex(BittrexTradeExchange.make_pair)
+        self.index.load([
+            ('ATOM', 'BTC', 'BTC-ATOM'),
+            ('BCHABC', 'BTC', 'BTC-BCHABC'),
+            ('BTC', 'USDT', 'USDT-BTC'),
+        ])
+
+    def test_canonical_symbol(self):
+        self.assertEqual(canonical_symbol(' atom '), 'ATOM')
+        self.assertEqual(canonical_symbol('BCHABC'), 'BCH')
+        self.assertEqual(canonical_symbol('BCHSV'), 'BSV')
+
+    def test_pairs(self):
+        self.assertEqual(len(self.index), 3)
+        self.assertEqual(self.index.pair('ATOM', 'BTC'), 'BTC-ATOM')
+        # aliases resolve to the pair the exchange lists
+        self.assertEqual(self.index.pair('BCH', 'BTC'), 'BTC-BCHABC')
+        self.assertEqual(self.index.pair('bchabc', 'BTC'), 'BTC-BCHABC')
+        self.assertEqual(self.index.assets('BTC-BCHABC'), ('BCH', 'BTC'))
+        # not listed yet, built in the exchange format
+        self.assertFalse(self.index.listed('NEW', 'BTC'))
+        self.assertEqual(self.index.pair('NEW', 'BTC'), 'BTC-NEW')
+
+    def test_unlisted_alias_keeps_exchange_name(self):
+        index = SymbolIndex(BinanceTradeExchange.make_pair)
+        index.load([('BCC', 'USDT', 'BCCUSDT')])
+        # no BCH-BTC market under any name, so the pair is built from the symbol the exchange reported
+        self.assertEqual(index.pair('BCHABC', 'BTC'), 'BCHABCBTC')
+
+    def test_alias_collision_prefers_trading_market(self):
+        index = SymbolIndex(BinanceTradeExchange.make_pair)
+        index.load([
+            ('BCHABC', 'BTC', 'BCHABCBTC', True),
+            ('BCC', 'BTC', 'BCCBTC', False),
+            ('BCH', 'USDT', 'BCHUSDT', False),
+            ('BCC', 'USDT', 'BCCUSDT', False),
+        ])
+        self.assertEqual(index.pair('BCH', 'BTC'), 'BCHABCBTC')
+        self.assertEqual(index.pair('BCC', 'BTC'), 'BCHABCBTC')
+        # neither trades, the canonical name wins
+        self.assertEqual(index.pair('BCH', 'USDT'), 'BCHUSDT')
+        self.assertEqual(index.assets('BCCBTC'), ('BCH', 'BTC'))
+
+
+if __name__ == '__main__':
+    unittest.main()
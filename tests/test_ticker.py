@@ -0,0 +1,141 @@
+import asyncio
+import time
+import unittest
+from decimal import Decimal
+from unittest.mock import patch
+
+import settings
+from exchanges.trade.base.exchange import SymbolTicker
+from exchanges.trade.binance.exchange import BinanceTradeExchange
+from exchanges.trade.bittrex.exchange import BittrexTradeExchange
+from tests.helpers import Trigger
+
+
+class TestTickerRefresh(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.exchange = BinanceTradeExchange()
+
+    def tearDown(self):
+        self.loop.close()
+
+    def _refresh(self, rest_delay, ws_delay, rest_error=None, rest_ticker=SymbolTicker(Decimal(1), Decimal('0.1'))):
+        async def fetch(pair):
+            await asyncio.sleep(rest_delay)
+            if rest_error:
+                raise rest_error
+            return rest_ticker
+
+        async def stream(pair):
+            await asyncio.sleep(ws_delay)
+            return SymbolTicker(Decimal(2), Decimal('0.2'))
+
+        self.exchange._fetch_ticker = fetch
+        self.exchange._stream_ticker = stream
+        return self.loop.run_until_complete(self.exchange.refresh_ticker('ABCBTC'))
+
+    def test_fastest_source_wins(self):
+        self.assertEqual(self._refresh(0, 0.2).price, Decimal('0.1'))
+        self.assertEqual(self._refresh(0.2, 0).price, Decimal('0.2'))
+        self.assertEqual(self.exchange.tickers['ABCBTC'].price, Decimal('0.2'))
+        self.assertLess(self.exchange.ticker_age('ABCBTC'), 1)
+
+    def test_failed_source_falls_back(self):
+        self.assertEqual(self._refresh(0, 0.05, rest_error=ValueError('boom')).price, Decimal('0.2'))
+
+    def test_bounded_wait(self):
+        timeout = settings.TICKER_REFRESH_TIMEOUT
+        settings.TICKER_REFRESH_TIMEOUT = 0.05
+        self.addCleanup(setattr, settings, 'TICKER_REFRESH_TIMEOUT', timeout)
+
+        self.assertIsNone(self._refresh(1, 1))
+        self.assertNotIn('ABCBTC', self.exchange.tickers)
+        self.assertGreater(self.exchange.ticker_age('ABCBTC'), settings.TICKER_MAX_AGE)
+
+    def test_unknown_pair_ends_race(self):
+        started_at = time.monotonic()
+        self.assertIsNone(self._refresh(0.01, 1, rest_ticker=None))
+        self.assertLess(time.monotonic() - started_at, 0.2)
+
+    def test_unlisted_pair_not_refreshed(self):
+        refreshed = []
+
+        async def refresh(pair):
+            refreshed.append(pair)
+
+        self.exchange.symbols.load([('ABC', 'BTC', 'ABCBTC')])
+        self.exchange.refresh_ticker = refresh
+        self.exchange.open_order_book = lambda pair: None
+        self.assertFalse(self.loop.run_until_complete(self.exchange.check_pair(Trigger, 'ABCETH', 'ETH', 100)))
+        self.assertFalse(self.loop.run_until_complete(self.exchange.check_pair(Trigger, 'ABCBTC', 'BTC', 100)))
+        self.assertEqual(refreshed, ['ABCBTC'])
+
+
+class TestBuyPairs(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.exchange = BinanceTradeExchange()
+        self.exchange.open_order_book = lambda pair: None
+
+    def tearDown(self):
+        self.loop.close()
+
+    def test_slow_check_does_not_hold_other_pairs(self):
+        events = []
+
+        async def refresh(pair):
+            await asyncio.sleep(0.3)
+
+        async def place_buy_orders(trigger_exchange, pairs):
+            events.append(('sent', pairs, time.monotonic() - started_at))
+
+        async def on_not_listed(pair, quote_symbol):
+            events.append(('not listed', pair, time.monotonic() - started_at))
+
+        self.exchange.tickers['ABCBTC'] = SymbolTicker(Decimal(1), Decimal('0.1'))
+        self.exchange._ticker_updated_at['ABCBTC'] = time.monotonic()
+        self.exchange.refresh_ticker = refresh
+        self.exchange.place_buy_orders = place_buy_orders
+
+        with patch.object(BinanceTradeExchange, 'buy_symbols', {'BTC', 'ETH'}):
+            started_at = time.monotonic()
+            not_listed = self.loop.run_until_complete(self.exchange.buy(Trigger, 'ABC', 100, on_not_listed))
+
+        self.assertEqual(not_listed, [('ABCETH', 'ETH')])
+        (sent, pairs, sent_after), (listed, pair, listed_after) = events
+        self.assertEqual((sent, pairs, listed, pair), ('sent', [('ABCBTC', 'BTC')], 'not listed', 'ABCETH'))
+        self.assertLess(sent_after, 0.1)
+        self.assertGreater(listed_after, 0.25)
+
+
+class TestBittrexSummaries(unittest.TestCase):
+    def test_batch(self):
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+        exchange = BittrexTradeExchange()
+        logged = []
+
+        async def log(message, *args, **kwargs):
+            logged.append(message % args)
+
+        exchange.log = log
+        deltas = [
+            {'market_name': 'BTC-ABC', 'ask': 0.00012345, 'prev_day': 0.0001},
+            {'market_name': 'BTC-XYZ', 'ask': None, 'prev_day': 0.0001},
+            {'market_name': 'BTC-QWE', 'ask': 0.5, 'prev_day': 0},
+        ]
+        loop.run_until_complete(exchange._process_ticker_update({'deltas': deltas, 'nonce': 1}))
+        loop.run_until_complete(exchange._process_ticker_update({'deltas': deltas[1:], 'nonce': 2}))
+
+        ticker = exchange.tickers['BTC-ABC']
+        self.assertEqual(ticker.price, Decimal('0.00012345'))
+        self.assertEqual(ticker.price_change_percent, Decimal('23.45'))
+        self.assertEqual(set(exchange.tickers), {'BTC-ABC'})
+        self.assertEqual(exchange.incorrect_tickers, 4)
+        self.assertEqual(len(logged), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
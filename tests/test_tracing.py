@@ -0,0 +1,63 @@
+import unittest
+
+from common import CoinSource, Symbol
+from tracing import Trace, TraceLog, current_trace, mark, mark_response
+
+
+class TestTrace(unittest.TestCase):
+    def test_symbol_equality(self):
+        traced = Symbol('AAA', CoinSource.API_PAIR, None, Trace({'fetch': 1.0}))
+        self.assertEqual(traced, Symbol('AAA', CoinSource.API_PAIR))
+        self.assertEqual(len({traced, Symbol('AAA', CoinSource.API_PAIR)}), 1)
+        self.assertNotEqual(traced, Symbol('BBB', CoinSource.API_PAIR))
+
+    def test_first_mark_wins(self):
+        trace = Trace()
+        trace.mark('fetch', 1.0)
+        trace.mark('fetch', 2.0)
+        copy = trace.copy()
+        copy.mark('detected', 3.0)
+        self.assertEqual(trace.marks, {'fetch': 1.0})
+        self.assertEqual(repr(copy), 'Trace(fetch=+0.0ms, detected=+2000.0ms)')
+
+    def test_response_only_for_fetch(self):
+        trace = Trace({'received': 1.0})
+        current_trace.set(trace)
+        try:
+            mark_response()
+            mark('process')
+            self.assertEqual(list(trace.marks), ['received', 'process'])
+        finally:
+            current_trace.set(None)
+
+    def test_report(self):
+        log = TraceLog()
+        log.record('upbit', 'API_PAIR', 'AAA', Trace({'fetch': 0.0, 'response': 0.1, 'detected': 0.2}))
+        log.record('upbit', 'TELEGRAM', 'AAA', Trace({'received': 0.4, 'detected': 0.5, 'binance:sent': 0.7}))
+        log.record('upbit', 'TELEGRAM', 'BBB', Trace({'received': 1.0, 'detected': 1.1}))
+
+        wins = log.wins()
+        self.assertEqual(wins['upbit API_PAIR'][0], 1)
+        self.assertAlmostEqual(wins['upbit API_PAIR'][1], 0.3)
+        self.assertEqual(wins['upbit TELEGRAM'], (1, None))
+
+        stages = log.stages()
+        self.assertEqual(stages['received -> detected'][0], 2)
+        self.assertAlmostEqual(stages['detected -> sent'][2], 0.2)
+        self.assertIn('upbit API_PAIR: 1, mean lead 300 ms', log.report())
+
+    def test_wins_per_listing(self):
+        log = TraceLog(window=60)
+        log.record('upbit', 'API_PAIR', 'AAA', Trace({'detected': 0.0}), 'ApiPairsPart')
+        log.record('upbit', 'API_PAIR', 'AAA', Trace({'detected': 2.0}), 'ApiPairsBTCOnlyPart', first=False)
+        # the same symbol listed again much later
+        log.record('upbit', 'API_PAIR', 'AAA', Trace({'detected': 1000.0}), 'ApiPairsBTCOnlyPart')
+
+        wins = log.wins()
+        self.assertEqual(wins['upbit ApiPairsPart API_PAIR'], (1, 2.0))
+        self.assertEqual(wins['upbit ApiPairsBTCOnlyPart API_PAIR'], (1, None))
+        self.assertIn('3 traced detections, 1 late', log.report())
+
+
+if __name__ == '__main__':
+    unittest.main()
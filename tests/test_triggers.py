@@ -0,0 +1,147 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+
+from common import CoinSource, Symbol
+from events import bus, CoinDetected
+from exchanges.registry import TRIGGER_EXCHANGES
+from exchanges.trigger.base.exchange import BaseTriggerExchange
+from exchanges.trigger.base.part import BaseTriggerExchangePart, BaseTriggerExchangePushPart
+from exchanges.trigger.config import InvalidTriggersConfig, PartConfig, TriggerExchangeConfig, load_triggers, \
+    parse_triggers
+from tracing import TraceLog, mark_response
+
+
+class ListingPart(BaseTriggerExchangePart):
+    DELAY = 0.01
+    coins = {'AAA'}
+
+    @property
+    def source(self) -> CoinSource:
+        return CoinSource.API_PAIR
+
+    async def get(self):
+        mark_response()
+        return {Symbol(c, self.source) for c in self.coins}
+
+
+class ChannelPart(BaseTriggerExchangePushPart):
+    @property
+    def source(self) -> CoinSource:
+        return CoinSource.TELEGRAM
+
+
+class FakeTriggerExchange(BaseTriggerExchange):
+    _buy_amounts = {'BTC': 50}
+
+    @property
+    def name(self) -> str:
+        return 'fake'
+
+    async def _init_parts(self):
+        self._parts = [ListingPart(self), ChannelPart(self)]
+
+
+class TestTriggersConfig(unittest.TestCase):
+    def test_example_is_valid(self):
+        config = load_triggers('triggers.yaml.example', TRIGGER_EXCHANGES)
+        self.assertFalse(config['bittrex'].enabled)
+        self.assertEqual(config['upbit'].parts['ApiPairsBTCOnlyPart'], PartConfig(delay=10))
+        self.assertEqual(config['telegram'].parts['TelegramTriggerPart'].actions, {'buy'})
+        self.assertIsNone(load_triggers('missing.yaml', TRIGGER_EXCHANGES))
+
+    def test_invalid(self):
+        for data in [
+            {'nasdaq': {}},
+            {'upbit': {'buy_amounts': {'BTC': 150}}},
+            {'upbit': {'parts': {'ApiPairsPart': {'actions': ['sell']}}}},
+            {'upbit': {'parts': {'ApiPairsPart': {'delay': -1}}}},
+            {'upbit': {'parts': {'ApiPairsPart': {'dealy': 1}}}},
+        ]:
+            with self.assertRaises(InvalidTriggersConfig, msg=data):
+                parse_triggers(data, TRIGGER_EXCHANGES)
+
+
+class TestRuntimeParts(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        with patch('exchanges.trigger.base.exchange.CoinMarketCap'):
+            self.exchange = FakeTriggerExchange()
+        self.exchange.configure(TriggerExchangeConfig(
+            buy_amounts={'BTC': 20},
+            parts={
+                'ListingPart': PartConfig(enabled=False, delay=0.001),
+                'ChannelPart': PartConfig(actions=frozenset({'call'}), price_change_limit=5),
+            }
+        ))
+        self.detected = []
+        bus.subscribe(CoinDetected, self.detected.append)
+
+    def tearDown(self):
+        bus.unsubscribe(CoinDetected, self.detected.append)
+        self.loop.run_until_complete(self.exchange.on_shutdown())
+        self.loop.close()
+
+    def test_configured_parts(self):
+        async def run():
+            await self.exchange.init()
+            await self.exchange.schedule_parts_check()
+            listing, channel = self.exchange._all_parts
+
+            self.assertEqual(self.exchange.buy_amount_percent('BTC'), 20)
+            self.assertEqual(self.exchange.parts, [channel])
+            self.assertEqual(listing.DELAY, 0.001)
+            self.assertEqual(self.exchange.part_actions(channel), {'call'})
+            self.assertEqual(self.exchange.part_price_change_limit(channel), 5)
+            self.assertEqual(self.exchange.part_actions(listing), {'buy', 'call'})
+
+            # coins listed before enabling are known, only later ones are detected
+            self.assertTrue(await self.exchange.enable_part('listingpart'))
+            self.assertFalse(await self.exchange.enable_part('ListingPart'))
+            self.assertIn('AAA', self.exchange.known_coins)
+            ListingPart.coins = {'AAA', 'BBB'}
+            await asyncio.sleep(0.05)
+            self.assertEqual([e.coin.symbol for e in self.detected], ['BBB'])
+            marks = self.detected[0].coin.trace.marks
+            self.assertEqual(list(marks), ['fetch', 'response', 'parsed', 'detected'])
+            self.assertEqual(marks['detected'], self.detected[0].detected_at)
+
+            self.assertTrue(await self.exchange.disable_part('ListingPart'))
+            ListingPart.coins = {'AAA', 'BBB', 'CCC'}
+            await asyncio.sleep(0.05)
+            self.assertEqual(len(self.detected), 1)
+            self.assertEqual(
+                self.exchange.parts_status(),
+                [('ListingPart', False, 0.001), ('ChannelPart', True, None)]
+            )
+            self.assertFalse(self.exchange.set_part_delay('ChannelPart', 1))
+
+            for task in self.exchange._part_tasks.values():
+                task.cancel()
+
+        self.loop.run_until_complete(run())
+
+    def test_late_detection_traced(self):
+        self.exchange.configure(TriggerExchangeConfig())
+        log = TraceLog()
+
+        async def run():
+            await self.exchange.init()
+            listing, channel = self.exchange._all_parts
+            with patch('exchanges.trigger.base.exchange.traces', log):
+                await self.exchange.process_coins(channel, {Symbol('DDD', CoinSource.TELEGRAM)})
+                await self.exchange.process_coins(listing, {Symbol('DDD', CoinSource.API_PAIR)})
+                await self.exchange.process_coins(listing, {Symbol('DDD', CoinSource.API_PAIR)})
+
+        self.loop.run_until_complete(run())
+        self.assertEqual([e.coin.symbol for e in self.detected], ['DDD'])
+        self.assertEqual(
+            [(r.part, r.first) for r in log._records],
+            [('ChannelPart', True), ('ListingPart', False)]
+        )
+        self.assertEqual(list(log.wins()), ['fake ChannelPart Telegram'])
+
+
+if __name__ == '__main__':
+    unittest.main()
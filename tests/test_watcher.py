@@ -0,0 +1,125 @@
+import asyncio
+import unittest
+from decimal import Decimal
+
+from common import NTCredential
+from exchanges.trade.base.exchange import SymbolTicker
+from exchanges.trade.binance.exchange import BinanceTradeExchange
+from exchanges.trade.huobi.account import HuobiAccount
+from exchanges.trade.huobi.exchange import HuobiTradeExchange
+from exchanges.trade.watcher import PairWatcher
+from simulator.huobi import HuobiSimulator
+from tests.helpers import SimulatorTestCase, Trigger, wait_for
+from tracing import Trace, current_trace, mark
+
+
+class TestPairWatcher(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.exchange = BinanceTradeExchange()
+        self.exchange.DEPTH_STREAM = False
+        self.bought = []
+
+        async def buy_pair(trigger_exchange, pair, quote_symbol, price_change_limit):
+            mark('binance:sent')
+            self.bought.append((pair, quote_symbol, price_change_limit))
+
+        self.exchange.buy_pair = buy_pair
+
+    def tearDown(self):
+        self.loop.close()
+
+    def test_buys_on_first_ticker(self):
+        watcher = PairWatcher(10)
+
+        async def run():
+            watcher.watch(self.exchange, None, [('ABCBTC', 'BTC'), ('ABCETH', 'ETH')], 25)
+            self.exchange._set_ticker('XYZBTC', SymbolTicker(Decimal(0), Decimal(1)))
+            self.exchange._set_ticker('ABCBTC', SymbolTicker(Decimal(0), Decimal(1)))
+            self.exchange._set_ticker('ABCBTC', SymbolTicker(Decimal(0), Decimal(1)))
+            await asyncio.sleep(0.01)
+
+        self.loop.run_until_complete(run())
+        self.assertEqual(self.bought, [('ABCBTC', 'BTC', 25)])
+        self.assertEqual(self.exchange.pending_pairs, {'ABCETH'})
+        self.assertEqual(watcher.watching, [('binance', 'ABCETH')])
+
+    def test_buy_keeps_listing_trace(self):
+        watcher = PairWatcher(10)
+        trace = Trace()
+
+        async def watch():
+            current_trace.set(trace)
+            watcher.watch(self.exchange, None, [('ABCBTC', 'BTC')], 25)
+
+        async def run():
+            await asyncio.ensure_future(watch())
+            # the ticker stream task runs without a trace
+            self.exchange._set_ticker('ABCBTC', SymbolTicker(Decimal(0), Decimal(1)))
+            await asyncio.sleep(0.01)
+
+        self.loop.run_until_complete(run())
+        self.assertEqual(list(trace.marks), ['binance:sent'])
+
+    def test_buys_on_snapshot(self):
+        watcher = PairWatcher(10)
+
+        async def init_ticker():
+            self.exchange.tickers = {'ABCBTC': SymbolTicker(Decimal(0), Decimal(1))}
+
+        async def run():
+            watcher.watch(self.exchange, None, [('ABCBTC', 'BTC')], 25)
+            # a reconnect backfill is the first to see the pair
+            self.exchange._init_ticker = init_ticker
+            await self.exchange.snapshot_tickers()
+            await asyncio.sleep(0.01)
+
+        self.loop.run_until_complete(run())
+        self.assertEqual(self.bought, [('ABCBTC', 'BTC', 25)])
+        self.assertEqual(self.exchange.pending_pairs, set())
+
+    def test_window_expires(self):
+        watcher = PairWatcher(0.01)
+
+        async def run():
+            watcher.watch(self.exchange, None, [('ABCBTC', 'BTC')], 25)
+            await asyncio.sleep(0.05)
+            self.exchange._set_ticker('ABCBTC', SymbolTicker(Decimal(0), Decimal(1)))
+            await asyncio.sleep(0.01)
+
+        self.loop.run_until_complete(run())
+        self.assertEqual(self.bought, [])
+        self.assertEqual(self.exchange.pending_pairs, set())
+        self.assertEqual(watcher.watching, [])
+
+
+class TestPairWatcherOrders(SimulatorTestCase):
+    def test_huobi_pair_listed_after_startup(self):
+        sim = HuobiSimulator()
+        sim.add_account('key', {'BTC': Decimal(1)})
+
+        async def test():
+            exchange = HuobiTradeExchange()
+            await exchange.init_session()
+            await exchange.init_price_filters()
+            account = HuobiAccount(exchange, NTCredential('owner', 'huobi', 'key', 'secret'))
+            await account.init()
+            exchange.accounts.append(account)
+
+            watcher = PairWatcher(10)
+            watcher.watch(exchange, Trigger, [('SIMBTC', 'BTC')], 25)
+            sim.list_market('SIM', 'BTC', Decimal('0.001'))
+            exchange._set_ticker('SIMBTC', SymbolTicker(Decimal(0), Decimal('0.001')))
+            await wait_for(lambda: sim.stats.orders)
+
+            await account.close()
+            await exchange.http.close()
+
+        self.run_with(sim, test, ORDER_BOOK_TTL=0)
+        # price filters of the new pair were loaded before the order was prepared
+        self.assertEqual(len(sim.accounts['key'].orders), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import asyncio
+import unittest
+
+from exchanges.trade.base.ws import WebsocketSupervisor
+from exchanges.trade.binance.exchange import BinanceTradeExchange
+
+
+class FakeConnection:
+    def __init__(self, messages, hang=False):
+        self._messages = messages
+        self._hang = hang
+        self.closed = False
+
+    async def iterate(self):
+        for msg in self._messages:
+            yield msg
+        if self._hang:
+            await asyncio.sleep(3600)
+
+    async def close(self):
+        self.closed = True
+
+
+class TestWebsocketSupervisor(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        self.loop.close()
+
+    def _supervise(self, connections, expected_messages, stale_timeout=None):
+        received, backfills = [], []
+        connections = iter(connections)
+
+        async def connect():
+            connection = next(connections)
+            if isinstance(connection, Exception):
+                raise connection
+            return connection
+
+        async def backfill():
+            backfills.append(len(received))
+
+        async def run():
+            supervisor = WebsocketSupervisor(
+                'test',
+                connect,
+                lambda c: c.iterate(),
+                received.append,
+                backfill=backfill,
+                stale_timeout=stale_timeout,
+                backoff_base=0.001,
+            )
+            task = asyncio.ensure_future(supervisor.run())
+            while len(received) < expected_messages:
+                await asyncio.sleep(0.01)
+            task.cancel()
+            return supervisor
+
+        supervisor = self.loop.run_until_complete(asyncio.wait_for(run(), 5))
+        return supervisor, received, backfills
+
+    def test_reconnect_and_backfill(self):
+        first = FakeConnection([1, 2])
+        supervisor, received, backfills = self._supervise(
+            [first, ConnectionError('refused'), FakeConnection([3], hang=True)],
+            3
+        )
+        self.assertEqual(received, [1, 2, 3])
+        self.assertEqual(backfills, [0, 2])
+        self.assertTrue(first.closed)
+        self.assertEqual(supervisor.health.connects, 2)
+        self.assertEqual(supervisor.health.errors, 1)
+        self.assertEqual(supervisor.health.messages, 3)
+
+    def test_stale_reconnect(self):
+        stale = FakeConnection([1], hang=True)
+        supervisor, received, _ = self._supervise(
+            [stale, FakeConnection([2], hang=True)],
+            2,
+            stale_timeout=0.05
+        )
+        self.assertEqual(received, [1, 2])
+        self.assertTrue(stale.closed)
+        self.assertEqual(supervisor.health.stale, 1)
+
+
+class TestRedundantTickerStreams(unittest.TestCase):
+    def test_merge_by_event_time(self):
+        exchange = BinanceTradeExchange()
+        exchange._ticker_event_ts = {}
+        exchange.ticker_ws_streams = [
+            WebsocketSupervisor(f'tickers#{i}', None, None, None) for i in range(2)
+        ]
+
+        def update(stream, event_ts, ask):
+            exchange._process_ticker_update([{'s': 'ABCBTC', 'E': event_ts, 'P': '1.5', 'a': ask}], stream=stream)
+
+        update(0, 100, '0.1')
+        update(1, 100, '0.1')
+        update(1, 101, '0.2')
+        update(0, 101, '0.2')
+        update(0, 99, '0.05')
+
+        self.assertEqual(str(exchange.tickers['ABCBTC'].price), '0.2')
+        self.assertEqual(exchange.ticker_ws_streams[0].health.first_updates, 1)
+        self.assertEqual(exchange.ticker_ws_streams[0].health.late_updates, 2)
+        self.assertEqual(exchange.ticker_ws_streams[1].health.first_updates, 1)
+        self.assertEqual(exchange.ticker_ws_streams[1].health.late_updates, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
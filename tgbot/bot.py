@@ -8,8 +8,10 @@ from aiogram.utils.executor import start_polling
 
 import settings
 from tgbot.auth_middleware import AuthMiddleware
+from tgbot.handlers.rules import register_rules_handlers
 from tgbot.handlers.testlisting import register_testlisting_handlers
 from tgbot.handlers.trade import register_trade_handlers
+from tgbot.handlers.triggers import register_trigger_handlers
 from tgbot.handlers.zdefault import register_default_handlers
 
 logger = logging.getLogger(__name__)
@@ -26,6 +28,8 @@ def register_middlewares(dp: Dispatcher):
 def register_handlers(dp: Dispatcher):
     register_testlisting_handlers(dp)
     register_trade_handlers(dp)
+    register_trigger_handlers(dp)
+    register_rules_handlers(dp)
 
     register_default_handlers(dp)
 
@@ -0,0 +1,61 @@
+from typing import Optional
+
+from aiogram import types
+from aiogram.dispatcher import Dispatcher
+from aiogram.utils import markdown as md
+
+from common import CoinSource
+from rules import EXCLUDE, INCLUDE, Rule, rules
+
+
+def register_rules_handlers(dp: Dispatcher):
+    dp.register_message_handler(cmd_rules, commands=['rules'])
+    dp.register_message_handler(cmd_exclude, commands=['exclude'])
+    dp.register_message_handler(cmd_include, commands=['include'])
+    dp.register_message_handler(cmd_unrule, commands=['unrule'])
+
+
+async def cmd_rules(message: types.Message):
+    await message.reply(md.hcode(str(rules)))
+
+
+def _parse_rule(action: str, args) -> Optional[Rule]:
+    if action not in (EXCLUDE, INCLUDE) or len(args) not in (1, 2):
+        return None
+    pattern = args[0] if args[0].startswith('/') else args[0].upper()
+    source = None
+    if len(args) == 2:
+        source = CoinSource.__members__.get(args[1].upper())
+        if source is None:
+            return None
+    return Rule(action, pattern, source)
+
+
+async def _add_rule(message: types.Message, action: str):
+    rule = _parse_rule(action, message.text.split()[1:])
+    if not rule:
+        sources = ', '.join(CoinSource.__members__)
+        return await message.reply(f'Usage: /{action} <symbol or /regex/> [source], sources: {sources}')
+    try:
+        added = rules.add(rule)
+    except Exception as e:
+        return await message.reply(f'Invalid rule: {type(e).__name__}: {e}')
+    await message.reply(f'Added {rule}.' if added else f'Rule {rule} already exists.')
+
+
+async def cmd_exclude(message: types.Message):
+    await _add_rule(message, EXCLUDE)
+
+
+async def cmd_include(message: types.Message):
+    await _add_rule(message, INCLUDE)
+
+
+async def cmd_unrule(message: types.Message):
+    args = message.text.split()[1:]
+    rule = _parse_rule(args[0], args[1:]) if args else None
+    if not rule:
+        return await message.reply('Usage: /unrule <exclude|include> <symbol or /regex/> [source]')
+    if not rules.remove(rule):
+        return await message.reply(f'Rule {rule} not found.')
+    await message.reply(f'Removed {rule}.')
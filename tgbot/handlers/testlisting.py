@@ -1,15 +1,22 @@
 from aiogram import types
 from aiogram.dispatcher import Dispatcher
 
-# from exchanges.trade.manager import trade_mgr
 from common import CoinSource, Symbol
+from events import bus
+from exchanges.trade.manager import trade_mgr
 from exchanges.trigger.manager import trigger_mgr
+from tracing import traces
 
 
 def register_testlisting_handlers(dp: Dispatcher):
     dp.register_message_handler(cmd_delete_coin, commands=['delete_coin', 'dc'])
     dp.register_message_handler(cmd_fake_coin, commands=['fake_coin', 'fk'])
-    # dp.register_message_handler(cmd_websockets_status, commands=['websocket_status', 'ws'])
+    dp.register_message_handler(cmd_hedge_stats, commands=['hedge_stats', 'hs'])
+    dp.register_message_handler(cmd_websockets_status, commands=['websocket_status', 'ws'])
+    dp.register_message_handler(cmd_ticker_history, commands=['ticker_history', 'th'])
+    dp.register_message_handler(cmd_bus_stats, commands=['bus'])
+    dp.register_message_handler(cmd_alerts_stats, commands=['alerts'])
+    dp.register_message_handler(cmd_traces, commands=['traces'])
 
 
 async def cmd_delete_coin(message: types.Message):
@@ -34,37 +41,66 @@ async def cmd_fake_coin(message: types.Message):
     coin_name = str(args.pop(0))
     coin_name = coin_name.upper()
 
-    trigger_exchange = None
-    for e in trigger_mgr.exchanges:
-        if e.name == 'telegram':
-            trigger_exchange = e
-            break
+    trigger_exchange = trigger_mgr.get_exchange('telegram')
     if not trigger_exchange:
         return
 
-    fake_part = None
-    for p in trigger_exchange._parts:
-        if p.source == CoinSource.TELEGRAM:
-            fake_part = p
-
+    fake_part = trigger_exchange.get_part(CoinSource.TELEGRAM)
     if not fake_part:
         return
 
-    fake_part.coins.add(
-        Symbol(
-            coin_name,
-            CoinSource.TELEGRAM,
-            'http://fake.telegram.url'
-        )
+    fake_part.push(
+        {
+            Symbol(
+                coin_name,
+                CoinSource.TELEGRAM,
+                'http://fake.telegram.url'
+            )
+        }
     )
 
     await message.reply(f'Added {coin_name} to the fake trigger.')
 
-# async def cmd_websockets_status(message: types.Message):
-#     msg = ''
-#     for e in trade_mgr.exchanges:
-#         msg += e.name + '\n'
-#         for a in e.accounts:
-#             msg += a._credential.owner + str(a._ws_account.state.name) + '\n'
-#         msg += '\n'
-#     await message.reply(msg)
+
+async def cmd_hedge_stats(message: types.Message):
+    msg = '\n'.join(
+        f'{e.name} {type(p).__name__}: {p.hedge}'
+        for e in trigger_mgr.exchanges
+        for p in e.parts
+        if getattr(p, 'hedge', None)
+    )
+    await message.reply(msg or 'No hedged parts.')
+
+
+async def cmd_websockets_status(message: types.Message):
+    msg = ''
+    for e in trade_mgr.exchanges:
+        msg += f'{e.name}\n'
+        for s in e.ticker_ws_streams:
+            msg += f'  {s.name}: {s.health}\n'
+        for a in e.accounts:
+            if a.account_ws:
+                msg += f'  {a.owner}: {a.account_ws.health}\n'
+        msg += '\n'
+    await message.reply(msg or 'No trade exchanges.')
+
+
+async def cmd_ticker_history(message: types.Message):
+    msg = '\n'.join(
+        f'{e.name}: {len(e.ticker_history)} symbols, {e.ticker_history.horizon}s, '
+        f'{e.ticker_history.footprint() / 1024 / 1024:.2f} MB'
+        for e in trade_mgr.exchanges
+    )
+    await message.reply(msg or 'No trade exchanges.')
+
+
+async def cmd_bus_stats(message: types.Message):
+    await message.reply(bus.stats() or 'No subscribers.')
+
+
+async def cmd_alerts_stats(message: types.Message):
+    await message.reply(str(trade_mgr.alerts))
+
+
+async def cmd_traces(message: types.Message):
+    await message.reply(traces.report())
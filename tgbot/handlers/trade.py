@@ -1,17 +1,16 @@
 import asyncio
 import itertools
 import logging
-from decimal import Decimal
-from typing import List, Dict, Optional
+import time
+from typing import List
 
 from aiogram import types
 from aiogram.dispatcher import Dispatcher
 from aiogram.utils import markdown as md
 
 import settings
-from common import Balance
 from exchanges.trade.base.account import BaseAccount
-from exchanges.trade.base.exchange import BaseTradeExchange, SymbolTicker
+from exchanges.trade.base.exchange import BaseTradeExchange
 from exchanges.trade.manager import trade_mgr
 from utils import norm
 
@@ -26,13 +25,8 @@ def register_trade_handlers(dp: Dispatcher):
 async def cmd_balances(message: types.Message):
     msg = []
     all_accounts = get_all_accounts()
-    longest_asset: str = max(
-        itertools.chain.from_iterable(
-            a.balance.keys()
-            for a in all_accounts
-        ),
-        key=len
-    )
+    significant = {id(a): a.portfolio.significant() for a in all_accounts}
+    width = max((len(v.asset) for values in significant.values() for v in values), default=0)
 
     msg.append(f'Assets that cost less than ₿{settings.BALANCE_SHOW_LIMIT_BTC} are ignored.\n')
 
@@ -40,24 +34,20 @@ async def cmd_balances(message: types.Message):
         msg.append(md.hbold(owner))
         for account in accounts:
             exchange: BaseTradeExchange = account.trade_exchange
-            msg.append(f'\t{exchange.name}')
+            msg.append(f'\t{exchange.name} ≈ ₿{norm(account.portfolio.total)}')
 
             account_balances_msg = []
-            balances: Dict[str, Balance] = account.balance
-            logger.info('Owner %s, exchange %s, balances: %s', owner, exchange.name, balances)
-            for asset in sorted(balances.keys()):
-                balance = balances[asset]
-                if check_cost(asset, balance.total(), account):
-                    asset_balance = '\t\t{asset:<{width}} = {free}'.format(
-                        asset=asset,
-                        width=len(longest_asset),
-                        free=norm(balance.free),
-                    )
-
-                    if balance.free != balance.total():
-                        asset_balance = f'{asset_balance}/{norm(balance.total())}'
-
-                    account_balances_msg.append(md.hcode(asset_balance))
+            for asset, balance, _ in significant[id(account)]:
+                asset_balance = '\t\t{asset:<{width}} = {free}'.format(
+                    asset=asset,
+                    width=width,
+                    free=norm(balance.free),
+                )
+
+                if balance.free != balance.total():
+                    asset_balance = f'{asset_balance}/{norm(balance.total())}'
+
+                account_balances_msg.append(md.hcode(asset_balance))
 
             if account_balances_msg:
                 msg.extend(account_balances_msg)
@@ -87,25 +77,21 @@ async def cancel_orders_on_account(message: types.Message, account: BaseAccount)
     exchange: BaseTradeExchange = account.trade_exchange
     owner = account.owner
 
+    started = time.monotonic()
     logger.info('Fetching %s open orders on %s', owner, exchange.name)
     open_orders = await account.get_open_orders_id()
     logger.info('Got %d open orders for owner %s at %s', len(open_orders), owner, exchange.name)
 
     if len(open_orders) > 0:
-        cancel_orders = await asyncio.gather(
-            *[
-                account.cancel_order(order_id, symbol)
-                for order_id, symbol in open_orders
-            ]
-        )
-
-        logger.info('Got cancel results for %s at %s: %s', owner, exchange.name, cancel_orders)
+        canceled = await account.cancel_orders(open_orders)
+        logger.info('Canceled %d orders for %s at %s', canceled, owner, exchange.name)
     else:
         logger.info('Nothing to cancel for %s at %s', owner, exchange.name)
-        cancel_orders = []
+        canceled = 0
+    elapsed = time.monotonic() - started
 
     await message.reply(
-        f'{owner}@{exchange.name}: canceled {len(cancel_orders)}/{len(open_orders)} orders'
+        f'{owner}@{exchange.name}: canceled {canceled}/{len(open_orders)} orders in {elapsed * 1000:.0f} ms'
     )
 
 
@@ -114,49 +100,3 @@ def get_all_accounts() -> List[BaseAccount]:
         itertools.chain.from_iterable(e.accounts for e in trade_mgr.exchanges),
         key=lambda x: x.owner
     )
-
-
-def check_cost(asset: str, total: Decimal, account: BaseAccount, convert_to='BTC') -> bool:
-    cost_limit = Decimal(settings.BALANCE_SHOW_LIMIT_BTC)
-    exchange = account.trade_exchange
-
-    if norm(total) == '0':
-        return False
-
-    if asset == convert_to:
-        return total >= cost_limit
-
-    price = get_price(asset, convert_to, exchange)
-    if price is None:
-        return True
-
-    cost = price * total
-
-    if cost < cost_limit:
-        logger.info(
-            '%s %s balance is %s, too small. Price %s, cost %s. Skipping...',
-            account.owner,
-            asset,
-            total,
-            price,
-            cost
-        )
-        return False
-
-    return True
-
-
-def get_price(asset: str, convert_to: str, exchange: BaseTradeExchange) -> Optional[Decimal]:
-    if 'USD' in asset:
-        btc_pair: str = exchange.make_pair(convert_to, asset)
-    else:
-        btc_pair: str = exchange.make_pair(asset, convert_to)
-
-    ticker: SymbolTicker = exchange.tickers.get(btc_pair)
-    if not ticker:
-        logger.warning('%s ticker not found for exchange %s', btc_pair, exchange.name)
-        return
-
-    if 'USD' in asset:
-        return Decimal(1) / ticker.price
-    return ticker.price
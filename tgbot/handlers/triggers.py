@@ -0,0 +1,65 @@
+from aiogram import types
+from aiogram.dispatcher import Dispatcher
+from aiogram.utils import markdown as md
+
+from exchanges.trigger.manager import trigger_mgr
+
+
+def register_trigger_handlers(dp: Dispatcher):
+    dp.register_message_handler(cmd_parts, commands=['parts'])
+    dp.register_message_handler(cmd_enable_part, commands=['enable_part'])
+    dp.register_message_handler(cmd_disable_part, commands=['disable_part'])
+    dp.register_message_handler(cmd_part_delay, commands=['part_delay'])
+
+
+async def cmd_parts(message: types.Message):
+    msg = []
+    for e in trigger_mgr.exchanges:
+        msg.append(md.hbold(e.name))
+        for name, running, delay in e.parts_status():
+            status = 'on' if running else 'off'
+            delay = '' if delay is None else f', every {delay}s'
+            msg.append(md.hcode(f'\t{name}: {status}{delay}'))
+    await message.reply('\n'.join(msg) or 'No trigger exchanges.')
+
+
+def _parse_part_args(message: types.Message, count: int):
+    args = message.text.split()[1:]
+    if len(args) != count:
+        return None, args
+    return trigger_mgr.get_exchange(args[0]), args
+
+
+async def cmd_enable_part(message: types.Message):
+    exchange, args = _parse_part_args(message, 2)
+    if not exchange:
+        return await message.reply('Usage: /enable_part <exchange> <part>')
+    try:
+        enabled = await exchange.enable_part(args[1])
+    except Exception as e:
+        return await message.reply(f'Unable to enable {args[1]!r}: {type(e).__name__}: {e}')
+    if not enabled:
+        return await message.reply(f'Part {args[1]!r} not found or already running on {exchange.name!r}.')
+    await message.reply(f'{args[1]} enabled on {exchange.name}.')
+
+
+async def cmd_disable_part(message: types.Message):
+    exchange, args = _parse_part_args(message, 2)
+    if not exchange:
+        return await message.reply('Usage: /disable_part <exchange> <part>')
+    if not await exchange.disable_part(args[1]):
+        return await message.reply(f'Part {args[1]!r} not found or not running on {exchange.name!r}.')
+    await message.reply(f'{args[1]} disabled on {exchange.name}.')
+
+
+async def cmd_part_delay(message: types.Message):
+    exchange, args = _parse_part_args(message, 3)
+    try:
+        delay = float(args[2]) if exchange else -1
+    except ValueError:
+        delay = -1
+    if delay < 0:
+        return await message.reply('Usage: /part_delay <exchange> <part> <seconds>')
+    if not exchange.set_part_delay(args[1], delay):
+        return await message.reply(f'Polling part {args[1]!r} not found on {exchange.name!r}.')
+    await message.reply(f'{args[1]} on {exchange.name} polls every {delay}s.')
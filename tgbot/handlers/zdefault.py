@@ -1,15 +1,16 @@
 import re
+from collections import defaultdict
 from logging import getLogger
 from pathlib import Path
-from typing import Set, Optional
+from typing import Set, Optional, Dict, Tuple
 
 from aiogram import types, Dispatcher
 
 import settings
 from common import CoinSource, Symbol
-from exchanges.trigger.base.exchange import BaseTriggerExchange
+from exchanges.trigger.base.part import BaseTriggerExchangePushPart
 from exchanges.trigger.manager import trigger_mgr
-from exchanges.trigger.telegram.part import TelegramTriggerPart
+from rules import rules
 
 logger = getLogger(__name__)
 
@@ -35,102 +36,118 @@ async def channel_handler(message: types.Message):
 
     msg = message.text
 
-    symbols_btc = extract_symbols_endpoint_btc(msg)
-    symbols_krw = extract_symbols_endpoint_krw(msg) | extract_symbols_keywords(msg)
+    symbols_btc, symbols_krw = extract_symbols(msg)
 
     if not symbols_btc and not symbols_krw:
         logger.info('No symbols found in message: %s', msg)
         return
 
     trigger_name = 'telegram'
-    trigger_exchange = get_trigger_exchange(trigger_name)
+    trigger_exchange = trigger_mgr.get_exchange(trigger_name)
     if not trigger_exchange:
         logger.error('No trigger exchange with name %s found!', trigger_name)
         return
 
-    btc_part = get_part(trigger_exchange, CoinSource.TG_CHNL_UPBIT_BTC)
-    krw_part = get_part(trigger_exchange, CoinSource.TG_CHNL_UPBIT_KRW)
+    btc_part = trigger_exchange.get_part(CoinSource.TG_CHNL_UPBIT_BTC)
+    krw_part = trigger_exchange.get_part(CoinSource.TG_CHNL_UPBIT_KRW)
 
-    await add_symbol(btc_part, symbols_btc, CoinSource.TG_CHNL_UPBIT_BTC, message)
-    await add_symbol(krw_part, symbols_krw, CoinSource.TG_CHNL_UPBIT_KRW, message)
+    add_symbol(btc_part, symbols_btc, CoinSource.TG_CHNL_UPBIT_BTC)
+    add_symbol(krw_part, symbols_krw, CoinSource.TG_CHNL_UPBIT_KRW)
 
+    for part, symbols in ((btc_part, symbols_btc), (krw_part, symbols_krw)):
+        if not symbols:
+            continue
+        if not part:
+            await message.reply(f'No part found for symbols {", ".join(sorted(symbols))}.')
+            continue
+        await message.reply(f'Added {", ".join(sorted(symbols))} for part {part.source}.')
 
-def get_trigger_exchange(name: str) -> Optional[BaseTriggerExchange]:
-    trigger_exchange = None
-    for e in trigger_mgr.exchanges:
-        if e.name == name:
-            trigger_exchange = e
-            break
-    return trigger_exchange
 
-
-def get_part(trigger_exchange: BaseTriggerExchange, part_source: CoinSource) -> Optional[TelegramTriggerPart]:
-    part = None
-    for p in trigger_exchange._parts:
-        if p.source == part_source:
-            part = p
-            break
-    return part
-
-
-async def add_symbol(part: TelegramTriggerPart, symbols: Set[str], src: CoinSource, message: types.Message) -> None:
-    if not part:
-        await message.reply(f'No symbols found for part {part}.')
+def add_symbol(part: Optional[BaseTriggerExchangePushPart], symbols: Set[str], src: CoinSource) -> None:
+    if not part or not symbols:
         return
-    for symbol in symbols:
-        part.coins.add(
+
+    # wakes the part consumer right away, no waiting for a poll
+    part.push(
+        set(
             Symbol(
                 symbol,
                 src,
                 'http://from.jayden.channel'
             )
+            for symbol in symbols
         )
-        await message.reply(f'Added {symbol} for part {part.source}.')
+    )
 
 
-def extract_symbols_keywords(msg: str) -> Set[str]:
-    required_words = (
-        '이벤트',
-        '원화',
-    )
+class ListingMessageExtractor:
+    '''Extracts listed symbols from channel posts in a single pass over the message.'''
 
-    if not any(word in msg for word in required_words):
-        return set()
+    def __init__(self, endpoint_marker: str, keywords: Tuple[str, ...], quotes: Tuple[str, ...]):
+        self._endpoint_marker = endpoint_marker
+        self._keywords = keywords
 
-    RE_SYMBOL_IN_BRACKETS = re.compile(r'\(.*?([A-Z0-9]{2,}).*?\)')
+        quotes_group = '|'.join(quotes)
+        # ATOM/KRW → (ATOM, KRW), KRW-ATOM → (KRW, ATOM); lookaheads leave the symbol for the next match
+        self._re_endpoint_pair = re.compile(
+            rf'([A-Z0-9]+)/(?=({quotes_group}))|({quotes_group})-(?=([A-Z0-9]+))'
+        )
+        self._re_symbol_in_brackets = re.compile(r'\(.*?([A-Z0-9]{2,}).*?\)')
 
-    return filter_blacklist(
-        set(i for i in RE_SYMBOL_IN_BRACKETS.findall(msg))
-    )
+    def endpoint_symbols(self, msg: str) -> Dict[str, Set[str]]:
+        result = defaultdict(set)
+        if self._endpoint_marker not in msg:
+            return result
 
+        for slash_symbol, slash_quote, dash_quote, dash_symbol in self._re_endpoint_pair.findall(msg):
+            if slash_symbol:
+                result[slash_quote].add(slash_symbol)
+            else:
+                result[dash_quote].add(dash_symbol)
 
-def extract_symbols_endpoint_btc(msg: str) -> Set[str]:
-    if 'Upbit Endpoint #' not in msg:
-        return set()
+        return result
 
-    RE_DASH_BTC = re.compile(r'BTC-([A-Z0-9]+)')  # BTC-ATOM → ATOM
-    RE_SLASH_BTC = re.compile(r'([A-Z0-9]+)/BTC')  # ATOM/BTC → ATOM
+    def keyword_symbols(self, msg: str) -> Set[str]:
+        if not any(word in msg for word in self._keywords):
+            return set()
 
-    btc_symbols = set(RE_SLASH_BTC.findall(msg)) | set(RE_DASH_BTC.findall(msg))
+        return set(self._re_symbol_in_brackets.findall(msg))
 
-    return filter_whitelist(btc_symbols)
 
+extractor = ListingMessageExtractor(
+    endpoint_marker='Upbit Endpoint #',
+    keywords=(
+        '이벤트',
+        '원화',
+    ),
+    quotes=('BTC', 'KRW'),
+)
 
-def extract_symbols_endpoint_krw(msg: str) -> Set[str]:
-    if 'Upbit Endpoint #' not in msg:
-        return set()
 
-    RE_DASH_KRW = re.compile(r'KRW-([A-Z0-9]+)')  # KRW-ATOM → ATOM
-    RE_SLASH_KRW = re.compile(r'([A-Z0-9]+)/KRW')  # ATOM/KRW → ATOM
+def extract_symbols(msg: str) -> Tuple[Set[str], Set[str]]:
+    endpoint_symbols = extractor.endpoint_symbols(msg)
+
+    symbols_btc = filter_whitelist(endpoint_symbols['BTC'])
+    symbols_krw = filter_blacklist(endpoint_symbols['KRW'] | extractor.keyword_symbols(msg))
+
+    return symbols_btc, symbols_krw
+
+
+def extract_symbols_keywords(msg: str) -> Set[str]:
+    return filter_blacklist(extractor.keyword_symbols(msg))
+
+
+def extract_symbols_endpoint_btc(msg: str) -> Set[str]:
+    return filter_whitelist(extractor.endpoint_symbols(msg)['BTC'])
 
-    krw_symbols = set(RE_SLASH_KRW.findall(msg)) | set(RE_DASH_KRW.findall(msg))
 
-    return filter_blacklist(krw_symbols)
+def extract_symbols_endpoint_krw(msg: str) -> Set[str]:
+    return filter_blacklist(extractor.endpoint_symbols(msg)['KRW'])
 
 
 def filter_blacklist(symbols: Set[str]) -> Set[str]:
-    return symbols.difference(settings.SYMBOLS_BLACK_LIST)
+    return rules.filter(symbols, CoinSource.TG_CHNL_UPBIT_KRW)
 
 
 def filter_whitelist(symbols: Set[str]) -> Set[str]:
-    return symbols.intersection(settings.SYMBOLS_WHITE_LIST)
+    return rules.filter(symbols, CoinSource.TG_CHNL_UPBIT_BTC)
@@ -0,0 +1,151 @@
+import collections
+import contextvars
+import time
+from typing import Deque, Dict, List, NamedTuple, Optional, Tuple
+
+# trace of the listing handled by the current task, set by parts and by the trade manager
+current_trace: 'contextvars.ContextVar[Optional[Trace]]' = contextvars.ContextVar('current_trace', default=None)
+
+
+class Trace:
+    '''Monotonic timestamps of a listing's way from the first request to buy orders, by stage.
+
+    Polling parts mark fetch, response and parsed, push and stream parts mark received, then
+    the trigger exchange marks detected, the trade manager process and every trade exchange
+    `<exchange>:checked` and `<exchange>:sent`. A stage keeps its first mark.
+
+    Compares and hashes like None, so a Symbol carrying a trace is equal to the untraced one.
+    '''
+    __slots__ = ('marks',)
+
+    def __init__(self, marks: Dict[str, float] = None):
+        self.marks = dict(marks) if marks else {}
+
+    def mark(self, stage: str, ts: float = None):
+        if stage not in self.marks:
+            self.marks[stage] = time.monotonic() if ts is None else ts
+
+    def copy(self) -> 'Trace':
+        return Trace(self.marks)
+
+    def __eq__(self, other):
+        return other is None or isinstance(other, Trace)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(None)
+
+    def __repr__(self):
+        if not self.marks:
+            return 'Trace()'
+        start = min(self.marks.values())
+        return 'Trace(%s)' % ', '.join(
+            f'{stage}=+{(ts - start) * 1000:.1f}ms'
+            for stage, ts in sorted(self.marks.items(), key=lambda i: i[1])
+        )
+
+
+def mark(stage: str):
+    trace = current_trace.get()
+    if trace is not None:
+        trace.mark(stage)
+
+
+def mark_response():
+    '''Marks the first response of a polling part fetch, later requests of the listing are not part stages.'''
+    trace = current_trace.get()
+    if trace is not None and 'fetch' in trace.marks:
+        trace.mark('response')
+
+
+class TraceRecord(NamedTuple):
+    exchange: str
+    source: str
+    symbol: str
+    trace: Trace
+    part: Optional[str] = None
+    # False when another part of the exchange detected the symbol before, the coin was not bought again
+    first: bool = True
+
+    @property
+    def detector(self) -> str:
+        return ' '.join(filter(None, (self.exchange, self.part, self.source)))
+
+
+class TraceLog:
+    '''Recent detections, reports which part detects listings first and the latency of each stage.
+
+    Detections of a symbol more than `window` seconds after its first one are another listing.
+    '''
+
+    def __init__(self, maxlen: int = 500, window: float = 600):
+        self._records: Deque[TraceRecord] = collections.deque(maxlen=maxlen)
+        self._window = window
+
+    def record(self, exchange: str, source: str, symbol: str, trace: Trace, part: str = None, first: bool = True):
+        self._records.append(TraceRecord(exchange, source, symbol, trace, part, first))
+
+    def __len__(self):
+        return len(self._records)
+
+    def _listings(self) -> List[List[TraceRecord]]:
+        '''Detected records grouped by listing, each group ordered by detection.'''
+        by_symbol: Dict[str, List[TraceRecord]] = collections.defaultdict(list)
+        for r in self._records:
+            if 'detected' in r.trace.marks:
+                by_symbol[r.symbol].append(r)
+
+        listings = []
+        for records in by_symbol.values():
+            records.sort(key=lambda r: r.trace.marks['detected'])
+            for r in records:
+                if not listings or listings[-1][0].symbol != r.symbol or \
+                        r.trace.marks['detected'] - listings[-1][0].trace.marks['detected'] > self._window:
+                    listings.append([])
+                listings[-1].append(r)
+        return listings
+
+    def wins(self) -> Dict[str, Tuple[int, float]]:
+        '''Returns detector -> (listings detected first, mean lead over the next detector in seconds).'''
+        leads = collections.defaultdict(list)
+        for records in self._listings():
+            winner = records[0]
+            runner_up = next((r for r in records[1:] if r.detector != winner.detector), None)
+            lead = runner_up.trace.marks['detected'] - winner.trace.marks['detected'] if runner_up else None
+            leads[winner.detector].append(lead)
+
+        return {
+            source: (len(values), _mean([v for v in values if v is not None]))
+            for source, values in leads.items()
+        }
+
+    def stages(self) -> Dict[str, Tuple[int, float, float]]:
+        '''Returns `previous stage -> stage` -> (count, mean, max seconds), exchange prefixes are dropped.'''
+        deltas = collections.defaultdict(list)
+        for r in self._records:
+            marks = sorted(r.trace.marks.items(), key=lambda i: i[1])
+            for (previous, previous_ts), (stage, ts) in zip(marks, marks[1:]):
+                key = f'{previous.rpartition(":")[2]} -> {stage.rpartition(":")[2]}'
+                deltas[key].append(ts - previous_ts)
+        return {key: (len(v), _mean(v), max(v)) for key, v in deltas.items()}
+
+    def report(self) -> str:
+        late = sum(1 for r in self._records if not r.first)
+        lines = [f'{len(self._records)} traced detections, {late} late']
+        lines.append('first to detect:')
+        for source, (count, lead) in sorted(self.wins().items(), key=lambda i: -i[1][0]):
+            lead = '-' if lead is None else f'{lead * 1000:.0f} ms'
+            lines.append(f'  {source}: {count}, mean lead {lead}')
+        lines.append('stages (count, mean, max):')
+        for key, (count, mean, maximum) in self.stages().items():
+            lines.append(f'  {key}: {count}, {mean * 1000:.1f} ms, {maximum * 1000:.1f} ms')
+        return '\n'.join(lines)
+
+
+def _mean(values: List[float]) -> Optional[float]:
+    return sum(values) / len(values) if values else None
+
+
+traces = TraceLog()
@@ -1,4 +1,11 @@
+import time
 from decimal import Decimal
+from typing import List, Tuple
+
+import yaml
+
+# libyaml parser when PyYAML is built with it
+Loader = getattr(yaml, 'CFullLoader', yaml.FullLoader)
 
 
 def norm(d: Decimal):
@@ -17,3 +24,29 @@ def singleton(cls):
         return instances[cls]
 
     return getinstance
+
+
+class StartupProfile:
+    '''Wall time of startup stages, the first stage is the CPU time spent before profiling started (imports).'''
+
+    def __init__(self):
+        self.stages: List[Tuple[str, float]] = [('imports (cpu)', time.process_time())]
+        self._mark = time.monotonic()
+        self._started = self._mark
+
+    def mark(self, stage: str):
+        now = time.monotonic()
+        self.stages.append((stage, now - self._mark))
+        self._mark = now
+
+    @property
+    def total(self) -> float:
+        return self.stages[0][1] + self._mark - self._started
+
+    def __str__(self):
+        return ', '.join(f'{stage} {seconds * 1000:.0f} ms' for stage, seconds in self.stages) + \
+               f'; total {self.total * 1000:.0f} ms'
+
+
+def load_yaml(text: str):
+    return yaml.load(text, Loader=Loader)